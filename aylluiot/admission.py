@@ -0,0 +1,253 @@
+"""
+Admission control of the incoming traffic of a Thing.
+"""
+
+# General imports
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+CLIENT_RATE = 'client_rate'
+TOPIC_RATE = 'topic_rate'
+IN_FLIGHT = 'in_flight'
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at a constant rate up to its capacity. It is not
+    thread safe by itself, callers must serialize the access to it.
+
+    Attributes
+    ----------
+    rate: float
+        Tokens added per second.
+    capacity: float
+        Maximum number of tokens, i.e. the allowed burst.
+    """
+
+    _rate: float
+    _capacity: float
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        """
+        Constructor method for TokenBucket. It starts full.
+
+        Parameters
+        ----------
+        rate: float
+            Tokens added per second.
+        capacity: float
+            Maximum number of tokens.
+        """
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    @property
+    def tokens(self) -> float:
+        """
+        Number of tokens currently available.
+        """
+        self._refill()
+        return self._tokens
+
+    def take(self, tokens: float = 1) -> None:
+        """
+        Consume tokens, which must have been checked as available.
+
+        Parameters
+        ----------
+        tokens: float, default = 1
+            Number of tokens to consume.
+        """
+        self._refill()
+        self._tokens -= tokens
+
+    def _refill(self) -> None:
+        """
+        Internal helper that adds the tokens earned since the last update.
+        """
+        now = time.monotonic()
+        self._tokens = min(self._capacity,
+                           self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+
+@dataclass()
+class AdmissionStats:
+    """
+    Snapshot of the admission counters.
+    """
+    accepted: int
+    shed: int
+    in_flight: int
+    shed_by: dict = field(default_factory=dict)
+
+
+class AdmissionControl:
+    """
+    Decides whether an incoming message is executed or shed, before any of
+    its content is processed. Publishers and topics are limited by token
+    buckets and the whole Thing by a maximum of messages in flight.
+
+    Attributes
+    ----------
+    client_rate: float
+        Messages per second allowed for each publisher. Zero for no limit.
+    client_burst: int
+        Messages a publisher can send at once above its rate.
+    topic_rate: float
+        Messages per second allowed for each topic. Zero for no limit.
+    topic_burst: int
+        Messages a topic can receive at once above its rate.
+    max_in_flight: int
+        Messages accepted and not yet finished. Zero for no limit.
+    reply: bool
+        Whether to answer the shed messages with a `throttled` error.
+    max_keys: int
+        Maximum number of publishers and topics tracked. The least recently
+        seen ones are forgotten first.
+    """
+
+    _client_rate: float
+    _topic_rate: float
+    _max_in_flight: int
+    _reply: bool
+
+    def __init__(self, client_rate: float = 0, client_burst: int = 10,
+                 topic_rate: float = 0, topic_burst: int = 100,
+                 max_in_flight: int = 0, reply: bool = False,
+                 max_keys: int = 1024) -> None:
+        """
+        Constructor method for AdmissionControl.
+
+        Parameters
+        ----------
+        client_rate: float, default = 0
+            Messages per second allowed for each publisher.
+        client_burst: int, default = 10
+            Burst allowed for each publisher.
+        topic_rate: float, default = 0
+            Messages per second allowed for each topic.
+        topic_burst: int, default = 100
+            Burst allowed for each topic.
+        max_in_flight: int, default = 0
+            Maximum number of messages in flight.
+        reply: bool, default = False
+            Answer the shed messages.
+        max_keys: int, default = 1024
+            Maximum number of publishers and topics tracked.
+        """
+        self._client_rate = client_rate
+        self._client_burst = client_burst
+        self._topic_rate = topic_rate
+        self._topic_burst = topic_burst
+        self._max_in_flight = max_in_flight
+        self._reply = reply
+        self._max_keys = max_keys
+        self._clients: OrderedDict = OrderedDict()
+        self._topics: OrderedDict = OrderedDict()
+        self._in_flight = 0
+        self._accepted = 0
+        self._shed: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def reply(self) -> bool:
+        """
+        Getter method for reply attribute.
+        """
+        return self._reply
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Number of accepted messages not finished yet.
+        """
+        return self._in_flight
+
+    @property
+    def stats(self) -> AdmissionStats:
+        """
+        Getter method for a snapshot of the admission counters.
+
+        Returns
+        -------
+        AdmissionStats
+            Current values of the counters.
+        """
+        with self._lock:
+            return AdmissionStats(self._accepted, sum(self._shed.values()),
+                                  self._in_flight, dict(self._shed))
+
+    def admit(self, client: str, topic: str) -> Optional[str]:
+        """
+        Decide whether a message is accepted. Every accepted message must be
+        followed by a `release` once it is finished.
+
+        Parameters
+        ----------
+        client: str
+            Identity of the publisher.
+        topic: str
+            Topic where the message was received.
+
+        Returns
+        -------
+        Optional[str]
+            None if the message was accepted, otherwise the reason to shed
+            it: `in_flight`, `client_rate` or `topic_rate`.
+        """
+        with self._lock:
+            buckets = []
+            if self._max_in_flight and \
+                    self._in_flight >= self._max_in_flight:
+                return self._count_shed(IN_FLIGHT)
+            if self._client_rate:
+                buckets.append((CLIENT_RATE, self._bucket(
+                    self._clients, client, self._client_rate,
+                    self._client_burst)))
+            if self._topic_rate:
+                buckets.append((TOPIC_RATE, self._bucket(
+                    self._topics, topic, self._topic_rate,
+                    self._topic_burst)))
+            for reason, bucket in buckets:
+                if bucket.tokens < 1:
+                    return self._count_shed(reason)
+            for _, bucket in buckets:
+                bucket.take()
+            self._in_flight += 1
+            self._accepted += 1
+            return None
+
+    def release(self) -> None:
+        """
+        Report an accepted message as finished.
+        """
+        with self._lock:
+            self._in_flight -= 1
+
+    def _bucket(self, buckets: OrderedDict, key: str, rate: float,
+                burst: int) -> TokenBucket:
+        """
+        Internal helper that gets, or creates, the bucket of a key. Lock
+        must be held.
+        """
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(rate, burst)
+            if len(buckets) > self._max_keys:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+        return bucket
+
+    def _count_shed(self, reason: str) -> str:
+        """
+        Internal helper that counts a shed message. Lock must be held.
+        """
+        self._shed[reason] = self._shed.get(reason, 0) + 1
+        return reason
@@ -3,12 +3,14 @@ Runner for AWS IoT Thing Implementation
 """
 
 # General imports
-from threading import Event, Timer
+from threading import Event, Thread, Timer
 from datetime import datetime
+from typing import Optional
+import asyncio
 import sys
 
 # Module imports
-from aylluiot.aws.thing import IotCore
+from aylluiot.aws.thing import IotCore, AsyncIotCore
 
 
 class RepeatTimer(Timer):
@@ -38,12 +40,16 @@ class Runner:
         Timer implementation to schedule an asynchronous action that cleans up
         any sub-topic queued that failed at execution and has been stuck
         on memory.
+    resource_timer: RepeatTimer
+        Timer implementation to schedule the health check of the pooled
+        resources of the Thing handler.
     """
 
     _thing: IotCore
     _event_thread: Event
     _cache_timer: RepeatTimer
     _queue_timer: RepeatTimer
+    _resource_timer: RepeatTimer
 
     def __init__(self, thing_object: IotCore) -> None:
         """
@@ -53,6 +59,7 @@ class Runner:
         self._event_thread = Event()
         self._cache_timer = RepeatTimer(300.0, self._clear_cache)
         self._queue_timer = RepeatTimer(3600.0, self._clear_remnants)
+        self._resource_timer = RepeatTimer(60.0, self._check_resources)
 
     @property
     def thing(self) -> IotCore:
@@ -102,15 +109,27 @@ class Runner:
         """
         return self._queue_timer
 
+    @property
+    def resource_timer(self) -> RepeatTimer:
+        """
+        Getter method for `resource_timer` attribute.
+
+        Returns
+        ------
+        RepeatTimer
+            RepeatTimer instance with `_check_resources` as callback.
+        """
+        return self._resource_timer
+
     def _clear_cache(self) -> None:
         """
         Internal helper function to clean up the `id_cache` of Thing object.
+        Sub-topics cached for longer than the timer interval are forgotten.
         """
-        msg_counter = len(self.thing.id_cache)
-        if msg_counter > 2:
-            print(f"[{datetime.now()}] Cleaning cached messages \
+        msg_counter = self.thing.id_cache.expire(self.cache_timer.interval)
+        if msg_counter:
+            print(f"[{datetime.now()}] Cleaned cached messages \
                     #{msg_counter}...\n")
-            del self.thing.id_cache[msg_counter]
         else:
             print(f"[{datetime.now()}] Message cache is clean\n")
 
@@ -119,15 +138,50 @@ class Runner:
         Internal helper function to clean up any stuck sub-topic in running
         `topic_queue` of Thing object.
         """
-        to_clean = [topic for topic, cache in self.thing.topic_queue.items()
+        to_clean = [topic for topic, cache
+                    in self.thing.topic_queue.snapshot().items()
                     if self._time_diff(cache['start_time']) >= 1]
         print(
             f"[{datetime.now()}] Executing clean up of Queues for \
                 {len(to_clean)} topics...\n")
         for remnant in to_clean:
-            self.thing.topic_queue.pop(remnant)
+            self.thing.topic_queue.pop(remnant, None)
             print(f"[{datetime.now()}] Topic {remnant} erased...\n")
 
+    def _check_resources(self) -> None:
+        """
+        Internal helper function to discard the broken pooled resources of
+        the Thing handler.
+        """
+        discarded = {name: num for name, num
+                     in self.thing.handler.check_resources().items() if num}
+        if discarded:
+            print(f"[{datetime.now()}] Discarded broken resources \
+                    {discarded}...\n")
+
+    def _warm_up(self) -> None:
+        """
+        Internal helper function that warms up the Thing handler, reporting
+        how long each component took.
+        """
+        for name, seconds in self.thing.handler.warm_up().items():
+            print(f"[{datetime.now()}] Warmed up {name} in {seconds:.3f}s\n")
+
+    def _start_warm_up(self) -> Thread:
+        """
+        Internal helper function that warms up the Thing handler on a
+        background thread, so it overlaps with the connection.
+
+        Returns
+        -------
+        Thread
+            The warm-up thread.
+        """
+        warm_up = Thread(target=self._warm_up, name='aylluiot-warm-up',
+                         daemon=True)
+        warm_up.start()
+        return warm_up
+
     def _time_diff(self, start_time: datetime) -> int:
         """
         Internal helper function to calculate a time difference with time at
@@ -151,10 +205,13 @@ class Runner:
         Internal helper function that set-up the context for the runner.
         """
         self.thing.start_logging()
+        self._start_warm_up()
         # Start connection
         thing_connection = self.thing.connection.connect()
         thing_connection.result()
         print("\nConnected!\n")
+        if self.thing.dispatcher is not None:
+            self.thing.dispatcher.start()
         # Subscribe to topic
         _ = self.thing.topic_subscription()
         print("Subscribed!\n")
@@ -174,13 +231,104 @@ class Runner:
             self._initialize_service()
             self.cache_timer.start()
             self.queue_timer.start()
+            self.resource_timer.start()
             self.event_thread.wait()
         # Disconnect
         except KeyboardInterrupt:
             print("Disconnecting...")
+            if self.thing.dispatcher is not None:
+                self.thing.dispatcher.stop()
             disconnect_future = self.thing.connection.disconnect()
             disconnect_future.result()
+            self.thing.handler.close()
             self.event_thread.clear()
             self.cache_timer.cancel()
             self.queue_timer.cancel()
+            self.resource_timer.cancel()
             sys.exit("Disconnected!")
+
+
+class AsyncRunner(Runner):
+    """
+    Execution class for IoT Service running on an asyncio event loop.
+
+    Attributes
+    ---------
+    thing: AsyncIotCore
+        Instance of AsyncIotCore Thing object.
+    """
+
+    _thing: AsyncIotCore
+    _stop_event: Optional[asyncio.Event]
+
+    def __init__(self, thing_object: AsyncIotCore) -> None:
+        """
+        Constructor method for AsyncRunner object.
+        """
+        super().__init__(thing_object)
+        self._stop_event = None
+
+    @property
+    def thing(self) -> AsyncIotCore:
+        """
+        Getter method for `thing` attribute.
+
+        Returns
+        -------
+        AsyncIotCore
+            Thing instance.
+        """
+        return self._thing
+
+    async def _async_initialize_service(self) -> None:
+        """
+        Internal helper function that set-up the context for the runner on
+        the running event loop.
+        """
+        self.thing.start_logging()
+        self.thing.loop = asyncio.get_running_loop()
+        self._start_warm_up()
+        # Start connection
+        await self.thing.connect()
+        print("\nConnected!\n")
+        # Subscribe to topic
+        await self.thing.subscribe()
+        print("Subscribed!\n")
+
+    async def serve(self) -> None:
+        """
+        Coroutine that runs the service until `stop` is called or the task
+        is cancelled.
+        """
+        self._stop_event = asyncio.Event()
+        await self._async_initialize_service()
+        self.cache_timer.start()
+        self.queue_timer.start()
+        self.resource_timer.start()
+        try:
+            await self._stop_event.wait()
+        finally:
+            print("Disconnecting...")
+            await self.thing.drain()
+            await self.thing.disconnect()
+            self.thing.handler.close()
+            self.cache_timer.cancel()
+            self.queue_timer.cancel()
+            self.resource_timer.cancel()
+
+    def stop(self) -> None:
+        """
+        Signal the service to disconnect. Safe to call from any thread.
+        """
+        if self.thing.loop is not None and self._stop_event is not None:
+            self.thing.loop.call_soon_threadsafe(self._stop_event.set)
+
+    def run(self) -> None:
+        """
+        Service main function that initializes the daemon.
+        """
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        sys.exit("Disconnected!")
@@ -3,6 +3,7 @@ Thing object implementations that enable interactiong with AWS services.
 """
 
 # General imports
+import asyncio
 import sys
 import os
 import subprocess
@@ -11,9 +12,10 @@ from uuid import uuid4
 from datetime import datetime
 import json
 import logging
+import time
 
 from abc import ABC
-from typing import Generic
+from typing import Any, Generic, Mapping, Optional
 
 from dotenv import load_dotenv  # type: ignore
 from awscrt import io, mqtt, auth  # type: ignore
@@ -23,8 +25,12 @@ from awsiot import mqtt_connection_builder  # type: ignore
 from aylluiot.utils.path import file_exists, validate_path
 from aylluiot.utils.data import load_configs
 from aylluiot.core import Message, Device, Thing, Processor, \
-    TypeProcessor
+    TypeProcessor, BUSY_ERROR, EXPIRED_ERROR, THROTTLED_ERROR, error_answer, \
+    find_references
 from aylluiot.devices import TypeDevice
+from aylluiot.admission import AdmissionControl
+from aylluiot.dispatch import AdaptiveLimit, MessageDispatcher, QueuePolicy
+from aylluiot.state import IdempotencyStore, StripedMap, StripedSet
 
 TARGET_FOLDERS = ['cert', 'key', 'root-ca']
 TARGET_AWS = ['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'AWS_REGION']
@@ -34,7 +40,18 @@ MESSAGE_TEMPLATE = {
     'client_id': 'Here goes the device id',
     'seq': 'Number of messages [an integer higher than zero]',
     'cmd': '[Here goes a valid function name for this thing device, ...]',
-    'args (optional)': '[{Only if: the function requires it}, ...]'}
+    'args (optional)': '[{Only if: the function requires it}, ...] where \
+"$0.output_1" stands for an output of a previous command',
+    'parallel (optional)': 'true if the commands are independent',
+    'sender (optional)': 'Identifier of the publisher scoping its \
+idempotency keys',
+    'deadline (optional)': 'Unix time after which the request is useless',
+    'ttl (optional)': 'Seconds the request stays useful once received',
+    'priority (optional)': 'Integer, higher values are executed first',
+    'idempotency_key (optional)': 'Unique string to execute it only once'}
+ENVELOPE_OPTIONS = ['parallel', 'sender']
+ANONYMOUS_SENDER = 'anonymous'
+ANSWER_PREFIX = b'{"message_id": "'
 WARNING_TEMPLATE = f"Please follow the guidelines: {MESSAGE_TEMPLATE}\n\
             Note that if any of your commands has an argument you \
             have to fill with `null` the rest of the list to make it \
@@ -130,19 +147,42 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
     ----------
     metadata: dict
         Set-up of configurations set to object trough config file or dict.
-    topic_queue: dict
+    topic_queue: StripedMap
         Sub-topics at runtime. Contain input messages and answers up to current
         status of each sub-topic.
-
+    id_cache: StripedSet
+        Recently finished sub-topics, to ommit the answers published by the
+        Thing itself.
+    dispatcher: Optional[MessageDispatcher]
+        Worker pool executing the incoming messages outside of the MQTT
+        callback thread. None when messages are executed on the callback.
+    admission: Optional[AdmissionControl]
+        Rate limits and in-flight cap applied to the incoming messages
+        before queueing or decoding them. Publishers are told apart by the
+        topic they publish on, which the broker policies vouch for, and the
+        topic limit applies to the whole subscription. None to accept every
+        message.
+    idempotency: Optional[IdempotencyStore]
+        Recent `idempotency_key` values with their answers, replayed for
+        the requests delivered more than once. None to execute them all.
     """
     _connection: mqtt.Connection
     _metadata: dict
     _handler: TypeDevice
-    _topic_queue: dict
-    _id_cache: list[str]
+    _topic_queue: StripedMap
+    _id_cache: StripedSet
     _message_processor: TypeProcessor
-
-    def __init__(self, handler_object, config_path: str) -> None:
+    _dispatcher: Optional[MessageDispatcher]
+    _admission: Optional[AdmissionControl]
+    _idempotency: Optional[IdempotencyStore]
+
+    def __init__(self, handler_object, config_path: str, workers: int = 0,
+                 queue_size: int = 100,
+                 queue_policy: QueuePolicy = QueuePolicy.BLOCK,
+                 admission: Optional[AdmissionControl] = None,
+                 queue_aging: float = 1.0,
+                 concurrency: Optional[AdaptiveLimit] = None,
+                 idempotency: Optional[IdempotencyStore] = None) -> None:
         """
         Constructor method for Thing object
 
@@ -152,6 +192,22 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
             Implementation of Device object to be used as handler.
         config_path: str
             Configuration path for AWS variables.
+        workers: int, default = 0
+            Number of worker threads executing the incoming messages. When
+            zero, messages are executed on the MQTT callback thread.
+        queue_size: int, default = 100
+            Capacity of the ingress queue used by the workers.
+        queue_policy: QueuePolicy, default = QueuePolicy.BLOCK
+            What to do with incoming messages when the queue is full.
+        admission: Optional[AdmissionControl], default = None
+            Admission control for the incoming messages.
+        queue_aging: float, default = 1.0
+            Priority gained per second by the messages waiting on the queue.
+        concurrency: Optional[AdaptiveLimit], default = None
+            Adaptive limit of the messages executed at once by the workers,
+            fed with the latency and errors of each sequence.
+        idempotency: Optional[IdempotencyStore], default = None
+            Store of recent idempotency keys to suppress duplicates.
         """
         self._files_setup(config_path)
         if issubclass(type(handler_object), Device):
@@ -160,8 +216,14 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
             # Pending adding metadata for handler_object
             self._message_processor = Processor.device_processor(
                                                     self.handler.device_type)
-            self.topic_queue = {}
-            self._id_cache = []
+            self.topic_queue = StripedMap()
+            self._id_cache = StripedSet()
+            self._dispatcher = MessageDispatcher(
+                self._process_messages, workers, queue_size, queue_policy,
+                self._reject_messages, self._drop_messages, queue_aging,
+                concurrency, self._prepare_message) if workers > 0 else None
+            self._admission = admission
+            self._idempotency = idempotency
             self.connection = self._create_connection()
         else:
             raise TypeError("Provide a valid device handler")
@@ -179,28 +241,30 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
         return self._metadata
 
     @property
-    def topic_queue(self) -> dict:
+    def topic_queue(self) -> StripedMap:
         """
         Getter method for topic_queue attribute.
 
         Returns
         -------
-        dict
-            Topic Queue dict.
+        StripedMap
+            Topic Queue map, safe to use from several threads.
         """
         return self._topic_queue
 
     @topic_queue.setter
-    def topic_queue(self, new_queue: dict) -> None:
+    def topic_queue(self, new_queue: Mapping) -> None:
         """
         Setter method for topic_queue attribute.
 
         Parameters
         ---------
-        new_queue: dict
-            The new dictionary to be used as queue.
+        new_queue: Mapping
+            The new dictionary to be used as queue. It is copied onto a
+            StripedMap unless it already is one.
         """
-        self._topic_queue = new_queue
+        self._topic_queue = new_queue if isinstance(new_queue, StripedMap) \
+            else StripedMap(dict(new_queue))
 
     @property
     def handler(self) -> TypeDevice:
@@ -215,14 +279,14 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
         return self._handler
 
     @property
-    def id_cache(self) -> list[str]:
+    def id_cache(self) -> StripedSet:
         """
         Getter method for id_cache attribute.
 
         Returns
         -------
-        dict
-            Current list of id_cache of subtopics names.
+        StripedSet
+            Current set of id_cache of subtopics names.
         """
         return self._id_cache
 
@@ -257,10 +321,46 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
         if (self.id_cache) and (num == -1):
             self._id_cache.clear()
         elif (num >= 0) and (len(self.id_cache) >= num):
-            del self._id_cache[0: num]
+            self._id_cache.trim(num)
         else:
             raise KeyError("Provide a valid number to delete")
 
+    @property
+    def dispatcher(self) -> Optional[MessageDispatcher]:
+        """
+        Getter method for dispatcher attribute.
+
+        Returns
+        -------
+        Optional[MessageDispatcher]
+            Worker pool in use, if any.
+        """
+        return self._dispatcher
+
+    @property
+    def admission(self) -> Optional[AdmissionControl]:
+        """
+        Getter method for admission attribute.
+
+        Returns
+        -------
+        Optional[AdmissionControl]
+            Admission control in use, if any.
+        """
+        return self._admission
+
+    @property
+    def idempotency(self) -> Optional[IdempotencyStore]:
+        """
+        Getter method for idempotency attribute.
+
+        Returns
+        -------
+        Optional[IdempotencyStore]
+            Store of recent idempotency keys in use, if any.
+        """
+        return self._idempotency
+
     @property
     def message_processor(self) -> TypeProcessor:
         """
@@ -404,7 +504,15 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
 
     def manage_messages(self, topic: str, payload: bytes) -> None:
         """
-        Method for managing incoming messages onto Thing object
+        Method for managing incoming messages onto Thing object. Every
+        message gets its own sub-topic, which identifies its sequence. When
+        a `dispatcher` is set, the raw message is only queued for the
+        workers, which decode it once, keyed by its sub-topic so the
+        messages of different sequences run in parallel. Answers published
+        by the Thing itself are received back through its subscription, and
+        they are dropped before being queued. So are the messages shed by
+        the `admission` control. The reception time is stamped here, so the
+        `ttl` of a message counts the time it waited on the queue.
 
         Parameters
         ---------
@@ -413,50 +521,455 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
         payload: bytes
             The incoming payload that will make the Message data.
         """
-        data = json.loads(payload.decode('utf-8'))
-        if not self._filter_queue(data):
-            if 'client_id' in data.keys():
-                try:
-                    assert self._get_client_id() == data['client_id']
-                    queued_topic = f"{topic}-{str(uuid4())}"
-                    msg = Message(message_id=queued_topic,
-                                  payload={k: v for k, v in data.items()
-                                           if k != 'client_id'})
-                    msg_queue = self._unpack_payload(msg)
-                    if msg_queue:
-                        print(
-                            f"[{msg.timestamp}] Received message from topic: \
-                                '{queued_topic}'")
-                        self.topic_queue[queued_topic] = {
-                            'incoming': [], 'answers': [],
-                            'start_time': msg.timestamp}
-                        self.topic_queue[queued_topic]['incoming'].extend(
-                            msg_queue)
-                        print(
-                            f"[{datetime.now()}] Initializing sequence \
-                            execution from: {queued_topic}\n\
-                            Using the following queue: \
-                            {self.topic_queue[queued_topic]['incoming']}\n")
-                        device_response = self.message_processor(
-                                    self.topic_queue[queued_topic]['incoming'],
-                                    self.handler, self.connection,
-                                    queued_topic, topic)
-                        self.topic_queue[queued_topic]['answers']\
-                            .extend(device_response)
-                        self.id_cache = [queued_topic]
-                        self.topic_queue.pop(queued_topic)
-                        print(
-                            f"Done with execution for {queued_topic}. \
-                                Continuing with the following message...\n")
-                except AssertionError:
-                    print(
-                        'Client missmatch. Please input the correct client \
-                            id\nContinuing with the following message...\n')
-            else:
-                raise KeyError(f"Missing `client_id`. {WARNING_TEMPLATE}")
+        received = datetime.now()
+        if self._is_echo(payload):
+            return
+        queued_topic = f"{topic}-{str(uuid4())}"
+        if not self._admit(queued_topic, topic):
+            return
+        if self.dispatcher is None:
+            entry = self._prepare_message(queued_topic,
+                                          (topic, payload, received))[0]
+            if entry is not None:
+                self._process_messages(queued_topic, entry)
         else:
+            self.dispatcher.submit(queued_topic, (topic, payload, received))
+
+    def _is_echo(self, payload: bytes) -> bool:
+        """
+        Internal function that recognizes, without decoding it, an answer
+        published by the Thing itself. Answers lead with the `message_id` of
+        a sequence in execution or recently finished.
+
+        Parameters
+        ---------
+        payload: bytes
+            The incoming payload.
+
+        Returns
+        -------
+        bool
+            True if the payload is an answer of the Thing.
+        """
+        if not payload.startswith(ANSWER_PREFIX):
+            return False
+        end = payload.find(b'"', len(ANSWER_PREFIX))
+        if end < 0:
+            return False
+        message_id = payload[len(ANSWER_PREFIX):end].decode('utf-8',
+                                                            'replace')
+        return message_id in self.topic_queue or message_id in self.id_cache
+
+    def _admit(self, queued_topic: str, topic: str) -> bool:
+        """
+        Internal function that applies the `admission` control, if any, to
+        an incoming message before it is queued or decoded. The publisher is
+        identified by the topic of the message and the topic limit by the
+        subscription of the Thing, as both are enforced by the broker.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        topic: str
+            The topic where the message was received.
+
+        Returns
+        -------
+        bool
+            True if the message was accepted.
+        """
+        if self.admission is None:
+            return True
+        reason = self.admission.admit(topic, self._get_topic())
+        if reason is None:
+            return True
+        logging.warning(f"Shedding message {queued_topic} by {reason} \
+limit")
+        if self.admission.reply:
+            self._publish_error(queued_topic, topic, THROTTLED_ERROR,
+                                f"Over the `{reason}` limit. Try again \
+later.")
+        return False
+
+    def _prepare_message(self, queued_topic: str,
+                         entry: tuple[str, bytes, datetime]) \
+            -> tuple[Optional[tuple[str, Any, datetime]], int]:
+        """
+        Internal function that decodes a queued message and computes its
+        scheduling priority. It runs on the `dispatcher` workers, if any,
+        outside of its lock. Messages that are not valid JSON are dropped.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        entry: tuple[str, bytes, datetime]
+            The topic, raw payload and reception time of the incoming
+            message.
+
+        Returns
+        -------
+        tuple[Optional[tuple[str, Any, datetime]], int]
+            The topic, decoded payload and reception time of the message,
+            None if it was dropped, and the priority of its sequence.
+        """
+        try:
+            data = json.loads(entry[1].decode('utf-8'))
+        except ValueError:
+            logging.warning(f"Dropping message {queued_topic} as it is not \
+valid JSON")
+            self._release_admission()
+            return None, 0
+        priority = self._sequence_priority(data) \
+            if isinstance(data, dict) else 0
+        return (entry[0], data, entry[2]), priority
+
+    def _sequence_priority(self, data: dict) -> int:
+        """
+        Internal function with the scheduling priority of an incoming
+        sequence. The highest of its `priority` field and the priorities of
+        its commands on the handler.
+
+        Parameters
+        ---------
+        data: dict
+            The decoded payload of the incoming message.
+
+        Returns
+        -------
+        int
+            Priority of the sequence.
+        """
+        priority = data.get('priority', 0)
+        if not self._valid_priority(priority):
+            priority = 0
+        cmds = data.get('cmd')
+        if isinstance(cmds, list):
+            priority = max([priority] + [self.handler.command_priority(c)
+                                         for c in cmds
+                                         if isinstance(c, str)])
+        return priority
+
+    def _admit_message(self, queued_topic: str, topic: str,
+                       data: dict) -> Optional[dict]:
+        """
+        Internal function that decides whether a decoded incoming message
+        is processed. It runs on the `dispatcher` workers, if any. Self
+        published answers are ommited and duplicated deliveries of a known
+        `idempotency_key` are answered with the stored replies.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        topic: str
+            The topic where the message was received.
+        data: dict
+            The decoded payload of the incoming message.
+
+        Returns
+        -------
+        Optional[dict]
+            The decoded payload, or None if the message must not be
+            processed.
+        """
+        if self._filter_queue(data):
             print("Ommiting message as it's part of a sequence in \
                 execution...\n")
+            return None
+        if self._replay_duplicate(queued_topic, topic, data):
+            return None
+        return data
+
+    def _idempotency_key(self, data: dict) -> Optional[tuple[str, str]]:
+        """
+        Internal function with the idempotency key of an incoming message,
+        scoped to its sender, if it has one and `idempotency` is enabled.
+        """
+        key = data.get('idempotency_key')
+        if self.idempotency is None or not isinstance(key, str) or not key:
+            return None
+        return str(data.get('sender', ANONYMOUS_SENDER)), key
+
+    def _replay_duplicate(self, queued_topic: str, topic: str,
+                          data: dict) -> bool:
+        """
+        Internal function that claims the idempotency key of an incoming
+        message. Duplicates of an executed message get its answers published
+        again, while the ones of a message still in execution are ommited.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        topic: str
+            The topic where the answers are published.
+        data: dict
+            The decoded payload of the incoming message.
+
+        Returns
+        -------
+        bool
+            True if the message is a duplicate and must not be executed.
+        """
+        key = self._idempotency_key(data)
+        if key is None or self.idempotency is None:
+            return False
+        claimed, answers = self.idempotency.claim(key)
+        if claimed:
+            return False
+        if answers is None:
+            print(f"Ommiting message {queued_topic} as its idempotency key \
+is in execution...\n")
+            return True
+        print(f"Replaying answers for message {queued_topic} with a known \
+idempotency key...\n")
+        for answer in answers:
+            if 'message_id' in answer:
+                self.id_cache = [answer['message_id']]
+            self.connection.publish(topic=topic, payload=json.dumps(answer),
+                                    qos=mqtt.QoS.AT_LEAST_ONCE, retain=True)
+        return True
+
+    def _settle_key(self, data: dict,
+                    device_response: Optional[list[Message]]) -> None:
+        """
+        Internal function that stores the answers of a sequence for its
+        idempotency key, if any. Sequences that were not executed or ended
+        with an error release the key instead, so they can be retried.
+
+        Parameters
+        ---------
+        data: dict
+            The decoded payload of the sequence.
+        device_response: Optional[list[Message]]
+            Answers given by the message processor. None if the sequence was
+            not executed.
+        """
+        key = self._idempotency_key(data)
+        if key is None or self.idempotency is None:
+            return
+        if device_response and not any('error' in m.payload
+                                       for m in device_response):
+            self.idempotency.complete(key, [m.payload
+                                            for m in device_response])
+        else:
+            self.idempotency.release(key)
+
+    def _process_messages(self, queued_topic: str,
+                          entry: tuple[str, Any, datetime]) -> None:
+        """
+        Internal function that executes a decoded incoming message, if it
+        is not filtered out, and reports it as finished to the `admission`
+        control.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        entry: tuple[str, Any, datetime]
+            The topic, decoded payload and reception time of the incoming
+            message.
+        """
+        try:
+            data = self._admit_message(queued_topic, entry[0], entry[1])
+            if data is not None:
+                self._execute_sequence(queued_topic,
+                                       (entry[0], data, entry[2]))
+        finally:
+            self._release_admission()
+
+    def _execute_sequence(self, queued_topic: str,
+                          entry: tuple[str, dict, datetime]) -> None:
+        """
+        Internal function with the message treatment logic of an admitted
+        message.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        entry: tuple[str, dict, datetime]
+            The topic, decoded payload and reception time of the incoming
+            message.
+        """
+        started, failed = time.monotonic(), True
+        device_response = None
+        try:
+            msg_queue = self._open_sequence(queued_topic, entry)
+            if msg_queue:
+                device_response = self.message_processor(
+                                    msg_queue, self.handler, self.connection,
+                                    queued_topic, entry[0])
+                self._close_sequence(queued_topic, device_response)
+                failed = any(m.payload.get('error') not in
+                             (None, EXPIRED_ERROR) for m in device_response)
+            else:
+                failed = False
+        finally:
+            self._settle_key(entry[1], device_response)
+            self._record_latency(entry[1], time.monotonic() - started,
+                                 failed)
+
+    def _record_latency(self, data: dict, latency: float,
+                        failed: bool) -> None:
+        """
+        Internal function that feeds the execution of a sequence to the
+        adaptive concurrency limit of the `dispatcher`, if any. Sequences are
+        compared with the ones made of the same commands.
+
+        Parameters
+        ---------
+        data: dict
+            The decoded payload of the sequence.
+        latency: float
+            Duration of the execution in seconds.
+        failed: bool
+            Whether any of its messages ended with an error, other than its
+            deadline passing.
+        """
+        if self.dispatcher is None or self.dispatcher.limiter is None:
+            return
+        cmds = data.get('cmd')
+        name = '+'.join(map(str, cmds)) if isinstance(cmds, list) else ''
+        self.dispatcher.limiter.record(name, latency, failed)
+
+    def _open_sequence(self, queued_topic: str,
+                       entry: tuple[str, dict, datetime]) -> list[Message]:
+        """
+        Internal function that validates an incoming message and registers
+        its sequence of messages on `topic_queue`.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        entry: tuple[str, dict, datetime]
+            The topic, decoded payload and reception time of the incoming
+            message.
+
+        Returns
+        -------
+        list[Message]
+            Sequence of messages to be executed. Empty if there is nothing
+            to execute.
+        """
+        msg_queue: list[Message] = []
+        data = entry[1]
+        if 'client_id' in data.keys():
+            try:
+                assert self._get_client_id() == data['client_id']
+                msg = Message(message_id=queued_topic,
+                              payload={k: v for k, v in data.items()
+                                       if k != 'client_id'},
+                              timestamp=entry[2])
+                msg_queue = self._unpack_payload(msg)
+                if msg_queue:
+                    print(
+                        f"[{msg.timestamp}] Received message from topic: \
+                            '{queued_topic}'")
+                    self.topic_queue[queued_topic] = {
+                        'incoming': [], 'answers': [],
+                        'start_time': msg.timestamp}
+                    self.topic_queue[queued_topic]['incoming'].extend(
+                        msg_queue)
+                    print(
+                        f"[{datetime.now()}] Initializing sequence \
+                        execution from: {queued_topic}\n\
+                        Using the following queue: \
+                        {self.topic_queue[queued_topic]['incoming']}\n")
+            except AssertionError:
+                print(
+                    'Client missmatch. Please input the correct client \
+                        id\nContinuing with the following message...\n')
+        else:
+            raise KeyError(f"Missing `client_id`. {WARNING_TEMPLATE}")
+        return msg_queue
+
+    def _close_sequence(self, queued_topic: str,
+                        device_response: list[Message]) -> None:
+        """
+        Internal function that stores the answers of a finished sequence and
+        removes it from `topic_queue`.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic of the finished sequence.
+        device_response: list[Message]
+            Answers given by the message processor.
+        """
+        self.id_cache = [queued_topic]
+        sequence = self.topic_queue.pop(queued_topic, None)
+        if sequence is not None:
+            sequence['answers'].extend(device_response)
+        print(
+            f"Done with execution for {queued_topic}. \
+                Continuing with the following message...\n")
+
+    def _reject_messages(self, queued_topic: str,
+                         entry: tuple[str, Any, datetime]) -> None:
+        """
+        Internal function that answers an incoming message that was not
+        accepted by the `dispatcher` because its queue is full.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        entry: tuple[str, Any, datetime]
+            The topic, payload and reception time of the incoming message.
+        """
+        self._release_admission()
+        self._publish_error(queued_topic, entry[0], BUSY_ERROR,
+                            'Queue is full. Try again later.')
+
+    def _drop_messages(self, queued_topic: str,
+                       entry: tuple[str, Any, datetime]) -> None:
+        """
+        Internal function that reports a queued message discarded by the
+        `dispatcher` to make room for a new one as finished to the
+        `admission` control.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        entry: tuple[str, Any, datetime]
+            The topic, payload and reception time of the incoming message.
+        """
+        self._release_admission()
+
+    def _release_admission(self) -> None:
+        """
+        Internal function that reports an accepted message as finished to
+        the `admission` control, if any.
+        """
+        if self.admission is not None:
+            self.admission.release()
+
+    def _publish_error(self, queued_topic: str, topic: str, error: str,
+                       detail: str) -> None:
+        """
+        Internal function that answers an incoming message that is not
+        going to be executed.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        topic: str
+            The topic where the answer is published.
+        error: str
+            Short code of the error.
+        detail: str
+            Human readable description of the error.
+        """
+        answer = error_answer(queued_topic, error, detail)
+        self.id_cache = [queued_topic]
+        self.connection.publish(topic=topic, payload=json.dumps(answer),
+                                qos=mqtt.QoS.AT_LEAST_ONCE)
 
     def _unpack_payload(self, input_msg: Message) -> list[Message]:
         """
@@ -480,14 +993,22 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
         main_id = input_msg.message_id
         validation_result = self._validate_payload(input_msg)
         new_payloads = self._repackage_payload(input_msg.payload)
+        deadline = self._message_deadline(input_msg)
+        options = {k: v for k, v in input_msg.payload.items()
+                   if k in ENVELOPE_OPTIONS}
+        if options and new_payloads != [{}]:
+            for new_payload in new_payloads:
+                new_payload.update(options)
         if validation_result and new_payloads != [{}]:
             if input_msg.payload['seq'] > 1:
                 for i in range(0, input_msg.payload['seq']):
                     output_queue.append(Message(message_id=main_id,
-                                                payload=new_payloads[i]))
+                                                payload=new_payloads[i],
+                                                deadline=deadline))
             elif input_msg.payload['seq'] == 1:
                 output_queue.append(Message(message_id=main_id,
-                                            payload=new_payloads[0]))
+                                            payload=new_payloads[0],
+                                            deadline=deadline))
         else:
             raise SyntaxError(f'There was an error figuring out the sequences\
                 of `cmd` and `args` from the Messages given.\
@@ -527,6 +1048,26 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
             raise TypeError(
                 f'Invalid message. `cmd` is not as expected. \
                     {WARNING_TEMPLATE}')
+        elif not isinstance(input_payload.payload.get('parallel', False),
+                            bool):
+            raise TypeError(
+                f'Invalid message. `parallel` must be a boolean. \
+                    {WARNING_TEMPLATE}')
+        elif not all(self._valid_budget(input_payload.payload.get(k))
+                     for k in ['deadline', 'ttl']):
+            raise TypeError(
+                f'Invalid message. `deadline` and `ttl` must be positive \
+                    numbers. {WARNING_TEMPLATE}')
+        elif not self._valid_priority(input_payload.payload.get('priority',
+                                                                0)):
+            raise TypeError(
+                f'Invalid message. `priority` must be an integer. \
+                    {WARNING_TEMPLATE}')
+        elif not isinstance(input_payload.payload.get('idempotency_key', ''),
+                            str):
+            raise TypeError(
+                f'Invalid message. `idempotency_key` must be a string. \
+                    {WARNING_TEMPLATE}')
         try:
             assert len(
                 input_payload.payload['cmd']) == (
@@ -536,10 +1077,51 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
                 commands\n')
         return True
 
+    @staticmethod
+    def _valid_budget(value) -> bool:
+        """
+        Internal helper function that checks an optional `deadline` or `ttl`
+        value of a payload.
+        """
+        return value is None or (isinstance(value, (int, float)) and
+                                 not isinstance(value, bool) and value > 0)
+
+    @staticmethod
+    def _valid_priority(value) -> bool:
+        """
+        Internal helper function that checks the `priority` of a payload.
+        """
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    @staticmethod
+    def _message_deadline(input_msg: Message) -> Optional[float]:
+        """
+        Internal helper function that computes the deadline of a payload as
+        the earliest of its `deadline` and its `ttl` counted from the
+        reception of the message.
+
+        Parameters
+        ----------
+        input_msg: Message
+            Original payload turned as a Message object.
+
+        Returns
+        -------
+        Optional[float]
+            Unix time of the deadline, or None if the payload has none.
+        """
+        candidates = [float(input_msg.payload['deadline'])] \
+            if 'deadline' in input_msg.payload else []
+        if 'ttl' in input_msg.payload:
+            candidates.append(input_msg.timestamp.timestamp() +
+                              input_msg.payload['ttl'])
+        return min(candidates) if candidates else None
+
     def _repackage_payload(self, input_payload: dict) -> list[dict]:
         """
         Internal helper function that rebuild a list of Messages with multiple
-        `payload` parameters for each.
+        `payload` parameters for each. The `args` may only reference the
+        outputs of previous commands of the sequence.
 
         Parameters
         ----------
@@ -579,6 +1161,12 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
         except TypeError:
             print(
                 f"The format of `args` is not as expected. {WARNING_TEMPLATE}")
+        if any(ref >= num for num, p in enumerate(output_payloads)
+               for ref in find_references(p.get('args'))):
+            print(
+                f"`args` can only reference the outputs of previous commands. \
+                    {WARNING_TEMPLATE}")
+            output_payloads = [{}]
         return output_payloads
 
     def _filter_queue(self, check_msg: dict) -> bool:
@@ -597,7 +1185,8 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
             Either True or False depending if the message is in queue or not.
         """
         try:
-            in_queue = check_msg['message_id'] in self.topic_queue.keys()
+            in_queue = check_msg['message_id'] in self.topic_queue \
+                or check_msg['message_id'] in self.id_cache
         except KeyError:
             in_queue = False
         return in_queue
@@ -628,3 +1217,196 @@ class IotCore(Thing, Callbacks, Processor, Generic[TypeDevice, TypeProcessor]):
             qos=mqtt.QoS.AT_LEAST_ONCE,
             callback=self.manage_messages)
         return future_obj
+
+
+class AsyncIotCore(IotCore):
+    """
+    Asyncio implementation of the IotCore Thing. Incoming messages are
+    scheduled as tasks on an event loop, awscrt futures are awaited on it and
+    the executors of the handler can be coroutine functions.
+
+    Attributes
+    ----------
+    loop: Optional[asyncio.AbstractEventLoop]
+        Event loop in charge of executing the incoming messages.
+    in_flight: int
+        Number of incoming messages currently being executed.
+    """
+    _loop: Optional[asyncio.AbstractEventLoop]
+    _pending: set
+
+    def __init__(self, handler_object, config_path: str,
+                 admission: Optional[AdmissionControl] = None,
+                 idempotency: Optional[IdempotencyStore] = None) -> None:
+        """
+        Constructor method for AsyncIotCore object
+
+        Parameters
+        ----------
+        handler_object: TypeDevice
+            Implementation of Device object to be used as handler.
+        config_path: str
+            Configuration path for AWS variables.
+        admission: Optional[AdmissionControl], default = None
+            Admission control for the incoming messages.
+        idempotency: Optional[IdempotencyStore], default = None
+            Store of recent idempotency keys to suppress duplicates.
+        """
+        super().__init__(handler_object, config_path, admission=admission,
+                         idempotency=idempotency)
+        self._message_processor = Processor.async_device_processor(
+                                                    self.handler.device_type)
+        self._loop = None
+        self._pending = set()
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """
+        Getter method for loop attribute.
+
+        Returns
+        -------
+        Optional[asyncio.AbstractEventLoop]
+            Event loop in use, if any.
+        """
+        return self._loop
+
+    @loop.setter
+    def loop(self, new_loop: asyncio.AbstractEventLoop) -> None:
+        """
+        Setter method for loop attribute.
+
+        Parameters
+        ---------
+        new_loop: asyncio.AbstractEventLoop
+            Event loop that will execute the incoming messages.
+        """
+        self._loop = new_loop
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Getter method for in_flight attribute.
+
+        Returns
+        -------
+        int
+            Number of incoming messages currently being executed.
+        """
+        return len(self._pending)
+
+    async def connect(self) -> dict:
+        """
+        Connect to AWS IoT Core awaiting the connection result.
+
+        Returns
+        -------
+        dict
+            Connection result from the MQTT Client Connection.
+        """
+        return await asyncio.wrap_future(self.connection.connect())
+
+    async def disconnect(self) -> dict:
+        """
+        Disconnect from AWS IoT Core awaiting its completion.
+
+        Returns
+        -------
+        dict
+            Disconnection result from the MQTT Client Connection.
+        """
+        return await asyncio.wrap_future(self.connection.disconnect())
+
+    async def subscribe(self) -> dict:
+        """
+        Subscribe to the Thing topic awaiting the 'SUBACK' from the server.
+
+        Returns
+        -------
+        dict
+            Subscription result from the MQTT Client Connection.
+        """
+        return await asyncio.wrap_future(self.topic_subscription())
+
+    async def drain(self) -> None:
+        """
+        Wait for every incoming message being executed to finish.
+        """
+        await asyncio.gather(*[asyncio.wrap_future(f)
+                               for f in list(self._pending)],
+                             return_exceptions=True)
+
+    def manage_messages(self, topic: str, payload: bytes) -> None:
+        """
+        Method for managing incoming messages onto Thing object. Once
+        admitted, it only schedules the execution of the message on the
+        event loop.
+
+        Parameters
+        ---------
+        topic: str
+            The topic which the upcoming messaged should be tagged with.
+        payload: bytes
+            The incoming payload that will make the Message data.
+        """
+        if self.loop is None:
+            raise RuntimeError("There is no event loop set for the Thing")
+        received = datetime.now()
+        queued_topic = f"{topic}-{str(uuid4())}"
+        if self._is_echo(payload) or not self._admit(queued_topic, topic):
+            return
+        future = asyncio.run_coroutine_threadsafe(
+            self._async_process_messages(queued_topic,
+                                         (topic, payload, received)),
+            self.loop)
+        self._pending.add(future)
+        future.add_done_callback(self._on_processed)
+
+    async def _async_process_messages(self, queued_topic: str,
+                                      entry: tuple[str, bytes, datetime])\
+            -> None:
+        """
+        Asyncio counterpart of `_process_messages`.
+
+        Parameters
+        ---------
+        queued_topic: str
+            Sub-topic assigned to the incoming message.
+        entry: tuple[str, bytes, datetime]
+            The topic, raw payload and reception time of the incoming
+            message.
+        """
+        prepared = self._prepare_message(queued_topic, entry)[0]
+        if prepared is None:
+            return
+        topic, data, device_response = entry[0], None, None
+        try:
+            data = self._admit_message(queued_topic, topic, prepared[1])
+            if data is None:
+                return
+            msg_queue = self._open_sequence(queued_topic,
+                                            (topic, data, entry[2]))
+            if msg_queue:
+                device_response = await self.message_processor(
+                                    msg_queue, self.handler, self.connection,
+                                    queued_topic, topic)
+                self._close_sequence(queued_topic, device_response)
+        finally:
+            self._release_admission()
+            if data is not None:
+                self._settle_key(data, device_response)
+
+    def _on_processed(self, future: Future) -> None:
+        """
+        Callback for the execution of an incoming message to forget about it
+        and report any error raised.
+
+        Parameters
+        ---------
+        future: Future
+            Future of the finished execution.
+        """
+        self._pending.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            logging.error("Failed processing message",
+                          exc_info=future.exception())
@@ -0,0 +1,240 @@
+"""
+Micro-batching of the calls of batch-capable executor commands.
+"""
+
+# General imports
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+
+@dataclass()
+class BatchStats:
+    """
+    Snapshot of the counters of a micro-batcher.
+    """
+    name: str
+    batches: int
+    items: int
+    largest: int
+    mean_size: float
+    mean_wait: float
+    max_wait: float
+
+
+class MicroBatcher:
+    """
+    Gathers the arguments of concurrent calls of a command for up to
+    `window` seconds, or until `max_size` of them are waiting, and executes
+    them with a single call of its batch function. A single caller leads:
+    it waits for the window and runs batches until its own calls are
+    answered, then hands the lead to the caller of the oldest call left.
+    The rest wait for their own result, so no caller keeps running the
+    batches of others under sustained load.
+
+    Attributes
+    ----------
+    name: str
+        Identifier of the batcher.
+    window: float
+        Seconds to wait for more calls since the first one of a batch.
+    max_size: int
+        Maximum number of calls per batch.
+    """
+
+    _name: str
+    _window: float
+    _max_size: int
+
+    def __init__(self, name: str, runner: Callable[[list], Any],
+                 window: float = 0.01, max_size: int = 64) -> None:
+        """
+        Constructor method for MicroBatcher.
+
+        Parameters
+        ----------
+        name: str
+            Identifier of the batcher.
+        runner: Callable[[list], Any]
+            Batch function. It receives the list of arguments and must
+            return a sequence with one result for each of them.
+        window: float, default = 0.01
+            Seconds to wait for more calls.
+        max_size: int, default = 64
+            Maximum number of calls per batch.
+        """
+        if max_size < 1 or window < 0:
+            raise ValueError("The size of a batch must be positive and its \
+window not negative")
+        self._name = name
+        self._runner = runner
+        self._window = window
+        self._max_size = max_size
+        self._pending: list[tuple[Any, Future, float, object]] = []
+        self._leader: Optional[object] = None
+        self._batches = 0
+        self._items = 0
+        self._largest = 0
+        self._waited = 0.0
+        self._max_wait = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def name(self) -> str:
+        """
+        Getter method for name attribute.
+        """
+        return self._name
+
+    @property
+    def window(self) -> float:
+        """
+        Getter method for window attribute.
+        """
+        return self._window
+
+    @property
+    def max_size(self) -> int:
+        """
+        Getter method for max_size attribute.
+        """
+        return self._max_size
+
+    @property
+    def stats(self) -> BatchStats:
+        """
+        Getter method for a snapshot of the batcher counters.
+
+        Returns
+        -------
+        BatchStats
+            Current values of the counters.
+        """
+        with self._cond:
+            return BatchStats(
+                self._name, self._batches, self._items, self._largest,
+                self._items / self._batches if self._batches else 0.0,
+                self._waited / self._items if self._items else 0.0,
+                self._max_wait)
+
+    def submit(self, args: Any) -> Any:
+        """
+        Execute a call as part of a batch, blocking until its result is
+        available.
+
+        Parameters
+        ----------
+        args: Any
+            Arguments of the call.
+
+        Returns
+        -------
+        Any
+            The result of the batch function for these arguments.
+        """
+        return self.submit_many([args])[0]
+
+    def submit_many(self, args_list: list) -> list:
+        """
+        Execute several calls as part of the same batches, blocking until
+        all of their results are available.
+
+        Parameters
+        ----------
+        args_list: list
+            Arguments of each call.
+
+        Returns
+        -------
+        list
+            The result of the batch function for each of the arguments.
+        """
+        if not args_list:
+            return []
+        futures: list[Future] = [Future() for _ in args_list]
+        token = object()
+        with self._cond:
+            queued = time.monotonic()
+            self._pending.extend((args, future, queued, token)
+                                 for args, future in zip(args_list, futures))
+            if self._leader is None:
+                self._leader = token
+            if len(self._pending) >= self._max_size:
+                self._cond.notify_all()
+            while self._leader is not token and \
+                    not all(future.done() for future in futures):
+                self._cond.wait()
+            leader = self._leader is token
+        if leader:
+            self._lead(futures)
+        return [future.result() for future in futures]
+
+    def _lead(self, futures: list[Future]) -> None:
+        """
+        Internal helper that runs batches until the calls of the leader are
+        answered, and then hands the lead to the caller of the oldest
+        pending call, if any.
+
+        Parameters
+        ----------
+        futures: list[Future]
+            Futures of the calls of the leader.
+        """
+        try:
+            while not all(future.done() for future in futures):
+                self._run(self._collect())
+                with self._cond:
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._leader = self._pending[0][3] if self._pending \
+                    else None
+                self._cond.notify_all()
+
+    def _collect(self) -> list:
+        """
+        Internal helper that waits for the window of the oldest pending call
+        and takes a batch.
+
+        Returns
+        -------
+        list
+            The batch.
+        """
+        with self._cond:
+            opened = self._pending[0][2]
+            while len(self._pending) < self._max_size:
+                remaining = opened + self._window - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = self._pending[:self._max_size]
+            del self._pending[:self._max_size]
+            return batch
+
+    def _run(self, batch: list) -> None:
+        """
+        Internal helper that executes a batch and hands each caller its
+        result, or the exception raised by the batch function.
+        """
+        started = time.monotonic()
+        waits = [started - queued for _, _, queued, _ in batch]
+        with self._cond:
+            self._batches += 1
+            self._items += len(batch)
+            self._largest = max(self._largest, len(batch))
+            self._waited += sum(waits)
+            self._max_wait = max([self._max_wait] + waits)
+        try:
+            results = list(self._runner([args for args, *_ in batch]))
+            if len(results) != len(batch):
+                raise ValueError(f"Batch `{self._name}` returned \
+{len(results)} results for {len(batch)} calls")
+        except Exception as err:
+            for _, future, *_ in batch:
+                future.set_exception(err)
+            return
+        for (_, future, *_), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,248 @@
+"""
+Argument binding for the commands of executor devices, compiled once from
+their signatures instead of parsing the raw arguments on every call.
+"""
+
+# General imports
+import inspect
+import json
+import typing
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+TRUE_STRINGS = ['true', '1', 'yes', 'on']
+FALSE_STRINGS = ['false', '0', 'no', 'off']
+
+
+@dataclass(frozen=True)
+class BoundArgs:
+    """
+    Positional and keyword arguments ready to be applied to a command.
+    """
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+
+
+def invoke(func: Callable, args: Any) -> Any:
+    """
+    Call a command with its arguments. BoundArgs are applied as positional
+    and keyword arguments, any other value is passed down as a single
+    argument and None means no arguments at all.
+
+    Parameters
+    ----------
+    func: Callable
+        The command to be called.
+    args: Any
+        Arguments for the command.
+
+    Returns
+    -------
+    Any
+        Raw result of the command.
+    """
+    if isinstance(args, BoundArgs):
+        return func(*args.args, **args.kwargs)
+    elif args is not None:
+        return func(args)
+    return func()
+
+
+def _to_bool(value: Any) -> bool:
+    """
+    Internal converter for boolean parameters.
+    """
+    if isinstance(value, str) and value.lower() in TRUE_STRINGS + \
+            FALSE_STRINGS:
+        return value.lower() in TRUE_STRINGS
+    elif isinstance(value, (int, float)) and value in [0, 1]:
+        return bool(value)
+    raise ValueError(value)
+
+
+def _to_int(value: Any) -> int:
+    """
+    Internal converter for integer parameters. Floats must be integral.
+    """
+    if isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+    return int(value)
+
+
+def _to_str(value: Any) -> str:
+    """
+    Internal converter for string parameters. Only numbers are converted.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError(value)
+
+
+def _from_json(kind: type) -> Callable[[Any], Any]:
+    """
+    Internal factory of converters for containers that can be received as
+    JSON strings.
+    """
+    def _convert(value: Any) -> Any:
+        if isinstance(value, str):
+            value = json.loads(value)
+        elif kind is list and isinstance(value, tuple):
+            value = list(value)
+        if not isinstance(value, kind):
+            raise ValueError(value)
+        return value
+    return _convert
+
+
+CONVERTERS: dict[Any, Callable[[Any], Any]] = {
+    bool: _to_bool, int: _to_int, float: float, str: _to_str,
+    list: _from_json(list), dict: _from_json(dict)}
+
+
+class ArgumentBinder:
+    """
+    Maps the `args` of a message onto the parameters of a command. A dict is
+    bound by parameter name, a list or tuple by position and any other value
+    as the first parameter. Values not matching the type hint of their
+    parameter are converted when it is a simple type, such as `int` or
+    `Optional[float]`.
+
+    Attributes
+    ----------
+    name: str
+        Name of the command.
+    coerce: bool
+        Whether to convert the values to the type hints of the parameters.
+    """
+
+    _name: str
+    _coerce: bool
+
+    def __init__(self, func: Callable, coerce: bool = True) -> None:
+        """
+        Constructor method for ArgumentBinder.
+
+        Parameters
+        ----------
+        func: Callable
+            The command, bound to its executor if it is a method.
+        coerce: bool, default = True
+            Convert the values to the type hints of the parameters.
+        """
+        self._name = func.__name__
+        self._coerce = coerce
+        params = list(inspect.signature(func).parameters.values())
+        hints = self._type_hints(func) if coerce else {}
+        self._positional = [p.name for p in params if p.kind in [
+            p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD]]
+        self._keywords = {p.name for p in params if p.kind in [
+            p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY]}
+        self._required = [p.name for p in params
+                          if p.default is p.empty and p.kind not in [
+                              p.VAR_POSITIONAL, p.VAR_KEYWORD]]
+        self._var_args = any(p.kind == p.VAR_POSITIONAL for p in params)
+        self._var_kwargs = any(p.kind == p.VAR_KEYWORD for p in params)
+        self._converters = {n: c for n, c in (
+            (n, self._converter(h)) for n, h in hints.items())
+            if c is not None}
+
+    @property
+    def name(self) -> str:
+        """
+        Getter method for name attribute.
+        """
+        return self._name
+
+    @property
+    def coerce(self) -> bool:
+        """
+        Getter method for coerce attribute.
+        """
+        return self._coerce
+
+    def bind(self, args: Any) -> BoundArgs:
+        """
+        Bind the arguments of a message to the parameters of the command.
+
+        Parameters
+        ----------
+        args: Any
+            The `args` of the message. None for no arguments.
+
+        Returns
+        -------
+        BoundArgs
+            The arguments ready to be applied.
+        """
+        positional: list = []
+        keywords: dict = {}
+        if isinstance(args, dict):
+            unknown = [k for k in args if k not in self._keywords]
+            if unknown and not self._var_kwargs:
+                raise TypeError(f"`{self._name}` got unexpected arguments: \
+{unknown}")
+            keywords = {k: self._convert(k, v) for k, v in args.items()}
+        elif args is not None:
+            values = list(args) if isinstance(args, (list, tuple)) \
+                else [args]
+            if len(values) > len(self._positional) and not self._var_args:
+                raise TypeError(f"`{self._name}` takes at most \
+{len(self._positional)} arguments but {len(values)} were given")
+            positional = [self._convert(n, v) for n, v in
+                          zip(self._positional, values)] + \
+                values[len(self._positional):]
+        given = set(self._positional[:len(positional)]).union(keywords)
+        missing = [n for n in self._required if n not in given]
+        if missing:
+            raise TypeError(f"`{self._name}` is missing arguments: {missing}")
+        return BoundArgs(tuple(positional), keywords)
+
+    def _convert(self, name: str, value: Any) -> Any:
+        """
+        Internal helper that converts the value of a parameter.
+        """
+        converter = self._converters.get(name)
+        if converter is None or value is None:
+            return value
+        try:
+            return converter(value)
+        except (ValueError, TypeError):
+            raise TypeError(f"`{self._name}` got an invalid value for \
+`{name}`: {value!r}")
+
+    @staticmethod
+    def _type_hints(func: Callable) -> dict:
+        """
+        Internal helper with the type hints of the parameters, empty if they
+        can't be resolved.
+        """
+        try:
+            hints = typing.get_type_hints(func)
+        except Exception:
+            return {}
+        hints.pop('return', None)
+        return hints
+
+    @staticmethod
+    def _converter(hint: Any) -> Optional[Callable[[Any], Any]]:
+        """
+        Internal helper with the converter of a type hint. Values already of
+        the hinted type are kept as they are.
+        """
+        if typing.get_origin(hint) is typing.Union:
+            options = [h for h in typing.get_args(hint) if h is not
+                       type(None)]
+            if len(options) != 1:
+                return None
+            hint = options[0]
+        kind = typing.get_origin(hint) or hint
+        converter = CONVERTERS.get(kind)
+        if converter is None:
+            return None
+
+        def _convert(value: Any) -> Any:
+            if isinstance(value, kind) and not (
+                    kind in [int, float] and isinstance(value, bool)):
+                return value
+            return converter(value)
+        return _convert
@@ -0,0 +1,297 @@
+"""
+Memoization and coalescing of the answers of deterministic executor commands.
+"""
+
+# General imports
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional
+
+MISSING = object()
+
+
+@dataclass()
+class CacheStats:
+    """
+    Snapshot of the counters of a result cache.
+    """
+    name: str
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+
+def cache_key(args: Any) -> Optional[Hashable]:
+    """
+    Canonical representation of the arguments of a command, so equivalent
+    requests share their cache entry regardless of the order of their keys.
+
+    Parameters
+    ----------
+    args: Any
+        The `args` of a message.
+
+    Returns
+    -------
+    Optional[Hashable]
+        The key, or None if the arguments can't be represented as JSON.
+    """
+    try:
+        return json.dumps(args, sort_keys=True, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return None
+
+
+class ResultCache:
+    """
+    Bounded cache with least recently used eviction and an optional time to
+    live for its entries.
+
+    Attributes
+    ----------
+    name: str
+        Identifier of the cache.
+    max_size: int
+        Maximum number of entries.
+    ttl: Optional[float]
+        Seconds an entry is valid for. None to keep it until evicted.
+    """
+
+    _name: str
+    _max_size: int
+    _ttl: Optional[float]
+
+    def __init__(self, name: str, max_size: int = 128,
+                 ttl: Optional[float] = None) -> None:
+        """
+        Constructor method for ResultCache.
+
+        Parameters
+        ----------
+        name: str
+            Identifier of the cache.
+        max_size: int, default = 128
+            Maximum number of entries.
+        ttl: Optional[float], default = None
+            Seconds an entry is valid for.
+        """
+        if max_size < 1:
+            raise ValueError("The size of a cache must be positive")
+        self._name = name
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        """
+        Getter method for name attribute.
+        """
+        return self._name
+
+    @property
+    def max_size(self) -> int:
+        """
+        Getter method for max_size attribute.
+        """
+        return self._max_size
+
+    @property
+    def ttl(self) -> Optional[float]:
+        """
+        Getter method for ttl attribute.
+        """
+        return self._ttl
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        Getter method for a snapshot of the cache counters.
+
+        Returns
+        -------
+        CacheStats
+            Current values of the counters.
+        """
+        with self._lock:
+            return CacheStats(self._name, len(self._entries), self._max_size,
+                              self._hits, self._misses, self._evictions,
+                              self._expirations, self._invalidations)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """
+        Look up a valid entry, counting the hit or miss.
+
+        Parameters
+        ----------
+        key: Hashable
+            Key of the entry.
+
+        Returns
+        -------
+        Any
+            The cached value, or MISSING if there is none.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._ttl is not None and \
+                    time.monotonic() - entry[1] >= self._ttl:
+                del self._entries[key]
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store an entry, evicting the least recently used one when full.
+
+        Parameters
+        ----------
+        key: Hashable
+            Key of the entry.
+        value: Any
+            Value to be cached.
+        """
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key: Any = MISSING) -> int:
+        """
+        Remove an entry, or every entry if no key is given.
+
+        Parameters
+        ----------
+        key: Any, default = MISSING
+            Key of the entry to be removed.
+
+        Returns
+        -------
+        int
+            Number of entries removed.
+        """
+        with self._lock:
+            if key is MISSING:
+                removed = len(self._entries)
+                self._entries.clear()
+            else:
+                removed = int(self._entries.pop(key, None) is not None)
+            self._invalidations += removed
+            return removed
+
+
+class SingleFlight:
+    """
+    Registry of the calls in flight by key, so concurrent identical requests
+    attach to the first one instead of repeating it. The first caller of a
+    key leads the call and must `finish` or `fail` it, the rest wait for
+    its future.
+
+    Attributes
+    ----------
+    in_flight: int
+        Number of keys being executed.
+    coalesced: int
+        Number of calls that attached to another one.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor method for SingleFlight.
+        """
+        self._flights: dict[Hashable, Future] = {}
+        self._coalesced = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        """
+        Getter method for in_flight attribute.
+        """
+        return len(self._flights)
+
+    @property
+    def coalesced(self) -> int:
+        """
+        Getter method for coalesced attribute.
+        """
+        return self._coalesced
+
+    def join(self, key: Hashable) -> tuple[Future, bool]:
+        """
+        Attach to the call in flight for a key, or lead a new one.
+
+        Parameters
+        ----------
+        key: Hashable
+            Identity of the call.
+
+        Returns
+        -------
+        tuple[Future, bool]
+            Future with the result of the call and whether the caller leads
+            it.
+        """
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self._coalesced += 1
+                return future, False
+            future = self._flights[key] = Future()
+            return future, True
+
+    def finish(self, key: Hashable, result: Any) -> None:
+        """
+        Hand the result of a led call to the callers attached to it.
+
+        Parameters
+        ----------
+        key: Hashable
+            Identity of the call.
+        result: Any
+            Result of the call.
+        """
+        with self._lock:
+            future = self._flights.pop(key)
+        future.set_result(result)
+
+    def fail(self, key: Hashable, error: BaseException) -> None:
+        """
+        Hand the exception raised by a led call to the callers attached to
+        it.
+
+        Parameters
+        ----------
+        key: Hashable
+            Identity of the call.
+        error: BaseException
+            Exception raised by the call.
+        """
+        with self._lock:
+            future = self._flights.pop(key)
+        future.set_exception(error)
@@ -1,20 +1,163 @@
-from typing import Any, Callable, TypeVar, Generic
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar, \
+    Generic, Optional, Union
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+import asyncio
 import json
+import re
+import threading
+import time
 from awscrt import mqtt  # type: ignore
+# Module imports
+from aylluiot.state import StripedMap, StripedSet
+
+FANOUT_WORKERS = 16
+TIMEOUT_ERROR = 'timeout'
+BUSY_ERROR = 'busy'
+UNAVAILABLE_ERROR = 'unavailable'
+THROTTLED_ERROR = 'throttled'
+EXPIRED_ERROR = 'expired'
+UNRESOLVED_ERROR = 'unresolved'
+FAILED_ERROR = 'failed'
+INVALID_ERROR = 'invalid'
+REFERENCE_PATTERN = re.compile(r'^\$(\d+)((?:\.[^.]+)*)$')
 
 
 @dataclass()
 class Message:
     """
-    Class for the data of messages being pass down to devices objects
+    Class for the data of messages being pass down to devices objects.
+    The optional `deadline` is the Unix time after which the message is no
+    longer worth executing.
     """
     # Implement sort_index
     message_id: str
     payload: dict
-    timestamp: datetime = datetime.now()
+    timestamp: datetime = field(default_factory=datetime.now)
+    deadline: Optional[float] = None
+
+    @property
+    def expired(self) -> bool:
+        """
+        Whether the deadline of the message, if any, has passed.
+        """
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def remaining(self) -> Optional[float]:
+        """
+        Seconds left until the deadline of the message.
+
+        Returns
+        -------
+        Optional[float]
+            The remaining budget, or None if the message has no deadline.
+        """
+        if self.deadline is None:
+            return None
+        return self.deadline - time.time()
+
+
+def error_answer(message_id: str, error: str, detail: str) -> dict:
+    """
+    Build the answer published when a message could not be executed.
+
+    Parameters
+    ----------
+    message_id: str
+        Sub-topic of the message.
+    error: str
+        Short code of the error, such as `timeout`, `busy` or `unavailable`.
+    detail: str
+        Human readable description of the error.
+
+    Returns
+    -------
+    dict
+        The answer to be published.
+    """
+    return {'message_id': message_id, 'error': error, 'detail': detail}
+
+
+def find_references(args: Any) -> list[int]:
+    """
+    Find the previous steps of a sequence referenced by the arguments of a
+    message. A reference is a string such as `"$0.output_1"`, the index of
+    the step followed by the path to a value of its answer. Strings starting
+    with `$$` are literals.
+
+    Parameters
+    ----------
+    args: Any
+        The `args` of a message.
+
+    Returns
+    -------
+    list[int]
+        Index of the referenced steps, in order of appearance.
+    """
+    if isinstance(args, str):
+        match = REFERENCE_PATTERN.match(args)
+        return [int(match.group(1))] if match else []
+    elif isinstance(args, (list, tuple)):
+        return [i for v in args for i in find_references(v)]
+    elif isinstance(args, dict):
+        return [i for v in args.values() for i in find_references(v)]
+    return []
+
+
+def resolve_references(args: Any, answers: list[dict]) -> Any:
+    """
+    Replace the references in the arguments of a message with the values
+    of the answers of the previous steps. A reference to a whole step, such
+    as `"$0"`, takes its answer without the `message_id`.
+
+    Parameters
+    ----------
+    args: Any
+        The `args` of a message.
+    answers: list[dict]
+        Answers of the previous steps of the sequence.
+
+    Returns
+    -------
+    Any
+        The arguments with their references resolved.
+    """
+    if isinstance(args, str):
+        if args.startswith('$$'):
+            return args[1:]
+        match = REFERENCE_PATTERN.match(args)
+        return args if match is None else _follow_reference(
+            args, int(match.group(1)), match.group(2), answers)
+    elif isinstance(args, (list, tuple)):
+        return type(args)(resolve_references(v, answers) for v in args)
+    elif isinstance(args, dict):
+        return {k: resolve_references(v, answers) for k, v in args.items()}
+    return args
+
+
+def _follow_reference(reference: str, step: int, path: str,
+                      answers: list[dict]) -> Any:
+    """
+    Internal helper that looks up the value of a single reference.
+    """
+    if step >= len(answers):
+        raise LookupError(f"`{reference}` refers to a step not executed yet")
+    if 'error' in answers[step]:
+        raise LookupError(f"`{reference}` refers to a failed step")
+    value: Any = {k: v for k, v in answers[step].items()
+                  if k != 'message_id'}
+    for part in path.split('.')[1:]:
+        try:
+            value = value[int(part)] if isinstance(value, list) \
+                else value[part]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise LookupError(f"`{reference}` does not exist on the answer")
+    return value
 
 
 class Device(ABC):
@@ -65,6 +208,125 @@ class Device(ABC):
         defines which function to call and execute
         """
 
+    def close(self) -> None:
+        """
+        Release any resource held by the device. Called on service shutdown.
+        """
+
+    def warm_up(self) -> dict[str, float]:
+        """
+        Prepare whatever the device defers until its first message. Called
+        by the service on a background thread while it connects.
+
+        Returns
+        -------
+        dict[str, float]
+            Seconds each prepared component took, by name.
+        """
+        return {}
+
+    def check_resources(self) -> dict[str, int]:
+        """
+        Health check the pooled resources of the device, if any. Called
+        periodically by the service.
+
+        Returns
+        -------
+        dict[str, int]
+            Number of broken resources discarded by pool name.
+        """
+        return {}
+
+    def relay(self, messages: list[Message],
+              publish: Callable[[str, str], Any]) -> list[dict]:
+        """
+        Republish validated messages to their target. Only implemented by
+        relayer devices.
+
+        Parameters
+        ----------
+        messages: list[Message]
+            The messages to be relayed.
+        publish: Callable[[str, str], Any]
+            Publishes a payload on a topic.
+
+        Returns
+        -------
+        list[dict]
+            The answer of each message.
+        """
+        raise TypeError("The device does not relay messages")
+
+    @property
+    def executor(self) -> Optional['Device']:
+        """
+        Executor device in the same process a relayer hands its messages
+        to, if any. By default None.
+        """
+        return None
+
+    def parallel_safe(self, msg_queue: list[Message]) -> bool:
+        """
+        Whether the messages of a sequence can be executed concurrently.
+        By default only when every message was flagged as `parallel`.
+
+        Parameters
+        ----------
+        msg_queue: list[Message]
+            Sequence of messages of a sub-topic.
+        """
+        return len(msg_queue) > 1 and \
+            all(m.payload.get('parallel') for m in msg_queue)
+
+    def command_priority(self, cmd: str) -> int:
+        """
+        Scheduling priority of a command. Sequences containing it are
+        executed with at least this priority. By default zero.
+
+        Parameters
+        ----------
+        cmd: str
+            Name of the command.
+        """
+        return 0
+
+    def streaming(self, cmd: str) -> bool:
+        """
+        Whether a command publishes its results in chunks, through
+        `stream_treatment`, instead of a single answer. By default False.
+
+        Parameters
+        ----------
+        cmd: str
+            Name of the command.
+        """
+        return False
+
+    async def async_message_treatment(self, message: Message):
+        """
+        Asyncio counterpart of `message_treatment`. By default it offloads
+        `message_treatment` to the default executor of the running loop.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.message_treatment, message)
+
+    def stream_treatment(self, message: Message) -> Iterator[dict]:
+        """
+        Counterpart of `message_treatment` for the `streaming` commands.
+        Every answer yielded is published as soon as it arrives, except the
+        one flagged as `end`, which closes the stream as the answer of the
+        message. Streams finishing without it are closed with an empty one.
+        By default it yields the single answer of `message_treatment`.
+        """
+        yield self.message_treatment(message)
+
+    async def async_stream_treatment(self, message: Message) \
+            -> AsyncIterator[dict]:
+        """
+        Asyncio counterpart of `stream_treatment`.
+        """
+        yield await self.async_message_treatment(message)
+
     @staticmethod
     def validate_message(input_msg: Message):
         """
@@ -105,9 +367,9 @@ class Thing(ABC, Generic[TypeProcessor]):
     """
     _connection: Any
     _metadata: dict
-    _topic_queue: dict
+    _topic_queue: StripedMap
     _handler: Device
-    _id_cache: list[str]
+    _id_cache: StripedSet
     _message_processor: TypeProcessor
 
     @property
@@ -119,7 +381,7 @@ class Thing(ABC, Generic[TypeProcessor]):
 
     @property
     @abstractmethod
-    def topic_queue(self) -> dict:
+    def topic_queue(self) -> StripedMap:
         """
         Getter for topic_queue
         """
@@ -156,6 +418,8 @@ class Processor(ABC, Generic[TypeProcessor]):
     Abstract class with a set of message processor for different device
     implementations.
     """
+    _fanout: Optional[ThreadPoolExecutor] = None
+    _fanout_lock = threading.Lock()
 
     @classmethod
     def device_processor(cls, device_type: int):
@@ -179,12 +443,44 @@ class Processor(ABC, Generic[TypeProcessor]):
         else:
             raise TypeError("The provided device type does not exists!\n")
 
-    def _executor_processor(self, msg_queue: list, handler_device: Device,
+    @classmethod
+    def async_device_processor(cls, device_type: int):
+        """
+        Getter method for the asyncio counterpart of message_processor.
+
+        Parameters
+        ----------
+        device_type: int
+            The device implementation type identifier
+
+        Returns
+        ------
+        Callable
+            The coroutine function for processing messages.
+        """
+        if device_type == 1:
+            return cls._async_executor_processor
+        else:
+            raise TypeError("The provided device type does not support \
+                asyncio processing!\n")
+
+    @staticmethod
+    def _executor_processor(msg_queue: list, handler_device: Device,
                             mqtt_connection: mqtt.Connection,
                             msg_topic: str, global_topic: str) -> list:
         """
         Private method that executes the workflow of a subtopic queue.
         Including the publishing back on the channel for the answers.
+        Sequences that are `parallel_safe` for the handler are executed
+        concurrently, still publishing the answers in sequence order. A
+        timed out message ends the sequence. Messages past their deadline
+        are answered as expired without being executed. Sequences whose
+        `args` reference previous outputs, like `"$0.output_1"`, are
+        executed one step after another, resolving them as they complete.
+        Chunks of `streaming` commands are published as they are yielded,
+        also forcing the steps to run one after another. Entries of the
+        queue that are already answers, like the messages rejected by a
+        relayer, are published as they are.
 
         Parameters
         ---------
@@ -194,24 +490,298 @@ class Processor(ABC, Generic[TypeProcessor]):
             The channel topic to which the `Thing` should publish to.
         """
         output_queue = []
-        for num, ind_msg in enumerate(msg_queue):
-            answer = handler_device.message_treatment(ind_msg)
+        results: list[dict] = []
+
+        def _publish_chunk(chunk: dict) -> None:
+            mqtt_connection.publish(topic=global_topic,
+                                    payload=json.dumps(chunk),
+                                    qos=mqtt.QoS.AT_LEAST_ONCE)
+
+        messages = [m for m in msg_queue if isinstance(m, Message)]
+        if not Processor._sequential(messages, handler_device) and \
+                handler_device.parallel_safe(messages):
+            answers = Processor._fanout_pool().map(
+                partial(Processor._treat, handler_device), msg_queue)
+        else:
+            # Lazily evaluated, so every step sees the previous results
+            answers = map(partial(Processor._treat_step, handler_device,
+                                  results, _publish_chunk), msg_queue)
+        for num, answer in enumerate(answers):
+            results.append(answer)
             output = json.dumps(answer)
             print(f'###########################\n \
                     Publishign result for message in sequence #{num}: {answer}\
                     \n###########################')
-            if answer == {'msg_id': msg_topic}:
-                output_queue.extend(
-                    [Message(message_id=msg_topic, payload={})])
-            else:
-                output_queue.extend(
-                    [Message(message_id=msg_topic, payload=answer)])
+            output_queue.append(Processor._answer_message(answer, msg_topic))
             mqtt_connection.publish(topic=global_topic, payload=output,
                                     qos=mqtt.QoS.AT_LEAST_ONCE,
                                     retain=True)
+            if answer.get('error') == TIMEOUT_ERROR:
+                break
+        return output_queue
+
+    @staticmethod
+    async def _async_executor_processor(msg_queue: list,
+                                        handler_device: Device,
+                                        mqtt_connection: mqtt.Connection,
+                                        msg_topic: str,
+                                        global_topic: str) -> list:
+        """
+        Asyncio counterpart of `_executor_processor`. Each answer is awaited
+        until its publishing is acknowledged before moving to the next one.
+        A timed out message ends the sequence. Messages past their deadline
+        are answered as expired without being executed. References to
+        previous outputs are resolved, chunks of `streaming` commands
+        published and answered entries kept as in `_executor_processor`.
+
+        Parameters
+        ---------
+        msg_topic: str
+            Sub-topic for this specific queue of message(s).
+        global_topic: str
+            The channel topic to which the `Thing` should publish to.
+        """
+        output_queue = []
+        results: list[dict] = []
+
+        async def _publish_chunk(chunk: dict) -> None:
+            publish_future, _ = mqtt_connection.publish(
+                topic=global_topic, payload=json.dumps(chunk),
+                qos=mqtt.QoS.AT_LEAST_ONCE)
+            await asyncio.wrap_future(publish_future)
+
+        messages = [m for m in msg_queue if isinstance(m, Message)]
+        tasks = [asyncio.ensure_future(
+                    Processor._async_treat(handler_device, m))
+                 for m in msg_queue] \
+            if not Processor._sequential(messages, handler_device) and \
+            handler_device.parallel_safe(messages) else []
+        for num, ind_msg in enumerate(msg_queue):
+            answer = await (tasks[num] if tasks else
+                            Processor._async_treat_step(
+                                handler_device, results, _publish_chunk,
+                                ind_msg))
+            results.append(answer)
+            output = json.dumps(answer)
+            print(f'###########################\n \
+                    Publishign result for message in sequence #{num}: {answer}\
+                    \n###########################')
+            output_queue.append(Processor._answer_message(answer, msg_topic))
+            publish_future, _ = mqtt_connection.publish(
+                topic=global_topic, payload=output,
+                qos=mqtt.QoS.AT_LEAST_ONCE, retain=True)
+            await asyncio.wrap_future(publish_future)
+            if answer.get('error') == TIMEOUT_ERROR:
+                for task in tasks[num + 1:]:
+                    task.cancel()
+                break
         return output_queue
 
-    def _relayer_processor(self) -> list:
+    @staticmethod
+    def _treat(handler_device: Device,
+               message: Union[Message, dict]) -> dict:
+        """
+        Private helper that executes a message unless its deadline passed,
+        in which case it is answered as expired, or it is already answered.
+        """
+        if isinstance(message, dict):
+            return message
+        if message.expired:
+            return Processor._expired_answer(message)
+        return handler_device.message_treatment(message)
+
+    @staticmethod
+    async def _async_treat(handler_device: Device,
+                           message: Union[Message, dict]) -> dict:
+        """
+        Asyncio counterpart of `_treat`.
         """
+        if isinstance(message, dict):
+            return message
+        if message.expired:
+            return Processor._expired_answer(message)
+        return await handler_device.async_message_treatment(message)
+
+    @staticmethod
+    def _treat_step(handler_device: Device, results: list[dict],
+                    publish_chunk: Callable[[dict], None],
+                    message: Union[Message, dict]) -> dict:
+        """
+        Private helper that executes a step of a sequence once its
+        references to the previous results are resolved. Every chunk of a
+        stream is published right away, but the `end` one, which is
+        returned as the answer of the step unless the stream raises.
+        """
+        resolved = Processor._resolve_step(message, results)
+        if isinstance(resolved, dict):
+            return resolved
+        if resolved.expired or \
+                not handler_device.streaming(resolved.payload.get('cmd', '')):
+            return Processor._treat(handler_device, resolved)
+        answer: dict = {}
+        num = 0
+        try:
+            for chunk in handler_device.stream_treatment(resolved):
+                if chunk.get('end'):
+                    answer = chunk
+                else:
+                    publish_chunk(chunk)
+                    num += 1
+        except Exception:
+            if answer:
+                publish_chunk(answer)
+            raise
+        return answer or Processor._stream_end(resolved, num)
+
+    @staticmethod
+    async def _async_treat_step(handler_device: Device, results: list[dict],
+                                publish_chunk: Callable,
+                                message: Union[Message, dict]) -> dict:
         """
-        return []
+        Asyncio counterpart of `_treat_step`.
+        """
+        resolved = Processor._resolve_step(message, results)
+        if isinstance(resolved, dict):
+            return resolved
+        if resolved.expired or \
+                not handler_device.streaming(resolved.payload.get('cmd', '')):
+            return await Processor._async_treat(handler_device, resolved)
+        answer: dict = {}
+        num = 0
+        try:
+            async for chunk in handler_device.async_stream_treatment(
+                    resolved):
+                if chunk.get('end'):
+                    answer = chunk
+                else:
+                    await publish_chunk(chunk)
+                    num += 1
+        except Exception:
+            if answer:
+                await publish_chunk(answer)
+            raise
+        return answer or Processor._stream_end(resolved, num)
+
+    @staticmethod
+    def _resolve_step(message: Union[Message, dict], results: list[dict]) \
+            -> Union[Message, dict]:
+        """
+        Private helper with a copy of a message whose references are
+        resolved, or the answer of the message if they can't be or it is
+        already answered.
+        """
+        if isinstance(message, dict):
+            return message
+        if not isinstance(message.payload, dict) or \
+                not find_references(message.payload.get('args')):
+            return message
+        try:
+            args = resolve_references(message.payload['args'], results)
+        except LookupError as err:
+            return error_answer(message.message_id, UNRESOLVED_ERROR,
+                                str(err.args[0]))
+        return replace(message, payload={**message.payload, 'args': args})
+
+    @staticmethod
+    def _sequential(msg_queue: list, handler_device: Device) -> bool:
+        """
+        Private helper to know if the messages of a sequence must run one
+        after another, because any of them references the results of the
+        previous ones or streams its results.
+        """
+        return any(isinstance(m.payload, dict) and (
+                   find_references(m.payload.get('args')) or
+                   (isinstance(m.payload.get('cmd'), str) and
+                    handler_device.streaming(m.payload['cmd'])))
+                   for m in msg_queue)
+
+    @staticmethod
+    def _stream_end(message: Message, num: int) -> dict:
+        """
+        Private helper with the answer closing a stream after `num` chunks,
+        for the streams finishing without one.
+        """
+        return {'message_id': message.message_id, 'chunk': num, 'end': True}
+
+    @staticmethod
+    def _expired_answer(message: Message) -> dict:
+        """
+        Private helper with the answer of a message past its deadline.
+        """
+        print(f"Skipping expired message: {message.message_id}")
+        return error_answer(message.message_id, EXPIRED_ERROR,
+                            'Deadline passed before the execution.')
+
+    @classmethod
+    def _fanout_pool(cls) -> ThreadPoolExecutor:
+        """
+        Private helper with the thread pool shared by the sequences whose
+        messages are executed concurrently.
+        """
+        with cls._fanout_lock:
+            if Processor._fanout is None:
+                Processor._fanout = ThreadPoolExecutor(
+                    max_workers=FANOUT_WORKERS,
+                    thread_name_prefix='aylluiot-fanout')
+            return Processor._fanout
+
+    @staticmethod
+    def _answer_message(answer: dict, msg_topic: str) -> Message:
+        """
+        Private helper that stores an answer as a Message of its sub-topic.
+
+        Parameters
+        ---------
+        answer: dict
+            Answer given by the handler device.
+        msg_topic: str
+            Sub-topic for this specific queue of message(s).
+        """
+        if answer == {'msg_id': msg_topic}:
+            return Message(message_id=msg_topic, payload={})
+        return Message(message_id=msg_topic, payload=answer)
+
+    @staticmethod
+    def _relayer_processor(msg_queue: list, handler_device: Device,
+                           mqtt_connection: mqtt.Connection,
+                           msg_topic: str, global_topic: str) -> list:
+        """
+        Private method that validates the messages of a subtopic queue and
+        relays the valid ones to the executor of the handler, at once. Each
+        message is answered on the channel as `relayed` or with its
+        validation error. When the executor runs in the same process, the
+        sequence is executed by it as in `_executor_processor` instead, with
+        the invalid messages answered in place.
+
+        Parameters
+        ---------
+        msg_topic: str
+            Sub-topic for this specific queue of message(s).
+        global_topic: str
+            The channel topic to which the `Thing` should publish to.
+        """
+        def _publish(topic: str, payload: str) -> None:
+            mqtt_connection.publish(topic=topic, payload=payload,
+                                    qos=mqtt.QoS.AT_LEAST_ONCE)
+
+        answers = [handler_device.message_treatment(m) for m in msg_queue]
+        if handler_device.executor is not None:
+            return Processor._executor_processor(
+                [a if 'error' in a else replace(
+                    m, payload={**m.payload, **a['relay']})
+                 for m, a in zip(msg_queue, answers)],
+                handler_device.executor, mqtt_connection, msg_topic,
+                global_topic)
+        relayed = iter(handler_device.relay(
+            [replace(m, payload={**m.payload, **a['relay']})
+             for m, a in zip(msg_queue, answers) if 'error' not in a],
+            _publish))
+        output_queue = []
+        for answer in answers:
+            if 'error' not in answer:
+                answer = next(relayed)
+            output_queue.append(Processor._answer_message(answer, msg_topic))
+            mqtt_connection.publish(topic=global_topic,
+                                    payload=json.dumps(answer),
+                                    qos=mqtt.QoS.AT_LEAST_ONCE, retain=True)
+        return output_queue
@@ -3,16 +3,43 @@ Set of implementations for Device
 """
 
 # General Imports
+import asyncio
+import inspect
 import json
-from typing import Union, Generic, TypeVar
-from pydantic import BaseModel
+import logging
+import threading
+import time
+import typing
+from concurrent.futures import Future, ProcessPoolExecutor, \
+    TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from functools import partial
+from types import MethodType
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Container, \
+    Generator, Iterable, Iterator, Literal, Optional, Union, Generic, \
+    TypeVar, cast
+from pydantic import BaseModel, ValidationError
 # Module Imports
-from aylluiot.core import Device, Message
+from aylluiot.batching import MicroBatcher
+from aylluiot.binding import ArgumentBinder, invoke
+from aylluiot.cache import MISSING, ResultCache, SingleFlight, cache_key
+from aylluiot.core import Device, Message, BUSY_ERROR, EXPIRED_ERROR, \
+    FAILED_ERROR, INVALID_ERROR, TIMEOUT_ERROR, UNAVAILABLE_ERROR, \
+    error_answer, find_references
+from aylluiot.execution import EXPIRED, ProcessExecution, Watchdog
+from aylluiot.lazy import LazyExecutor
+from aylluiot.resilience import Bulkhead, CircuitBreaker
+from aylluiot.resources import ResourceRegistry
 from aylluiot.utils.data import load_configs
-from aylluiot.utils.devices import extract_functions
+from aylluiot.utils.devices import COMMAND_OPTIONS, CURRENT_DEADLINE, \
+    command_options, extract_functions, get_command_options
 
 
 TypeDevice = TypeVar('TypeDevice', bound=Device)
+LIMIT_DETAIL = "is at its limit of concurrent executions. Try again later."
+BREAKER_DETAIL = "is failing and temporarily unavailable. Try again later."
+WATCHDOG_DETAIL = "can not start while too many calls that exceeded their \
+budget are still running. Try again later."
 
 
 class DeviceExecutors(Device, Generic[TypeDevice]):
@@ -29,13 +56,71 @@ class DeviceExecutors(Device, Generic[TypeDevice]):
     _functions_enums: list
         List of functions to be accessed during operations.
         Should contain only Enums such as in `scr.iot.commands`
+    process_pool: Optional[ProcessExecution]
+        Worker processes for the commands declared with the `process`
+        option. Created with default settings on first use if not given.
+    default_timeout: Optional[float]
+        Execution budget in seconds for the commands that don't declare
+        their own `timeout` option. None for no budget.
+    watchdog: Watchdog
+        Enforces the execution budget of the commands.
+    bulkheads: dict[str, Bulkhead]
+        Concurrency limits by command, as `Class.method`, declared with the
+        `limit` option.
+    executor_bulkheads: dict[str, Bulkhead]
+        Concurrency limits by executor class name, declared with the
+        `executor_limit` option.
+    breakers: dict[str, CircuitBreaker]
+        Circuit breakers by command, as `Class.method`, declared with the
+        `breaker` option.
+    commands: list[str]
+        Names accepted as `cmd`, in lowercase. With `namespaced` commands
+        every method is also reachable as `executor.method`, using the
+        lowercase class name of its executor.
+    binders: dict[MethodType, ArgumentBinder]
+        Argument binders of the commands declared with the `bind` option,
+        compiled once from their signatures.
+    caches: dict[str, ResultCache]
+        Memoized answers by command, as `Class.method`, declared with the
+        `cache` option.
+    flights: SingleFlight
+        Executions in flight of the commands declared with the `coalesce`
+        option, which identical concurrent requests attach to.
+    batchers: dict[str, MicroBatcher]
+        Micro-batchers by command, as `Class.method`, declared with the
+        `batch` option.
+    resources: ResourceRegistry
+        Pools of backend resources declared by the executors with the
+        `resources` option, shared by every executor declaring the same
+        name and closed with the device.
+    init_times: dict[str, float]
+        Seconds the construction of each lazy executor took, by class name,
+        once built.
     """
 
     _device_id: str
     _metadata: dict
     _executors: dict
+    _commands: dict[str, MethodType]
+    _pending: dict[str, tuple[LazyExecutor, str]]
+    _namespaced: bool
+    _process_pool: Optional[ProcessExecution]
+    _default_timeout: Optional[float]
+    _watchdog: Watchdog
+    _bulkheads: dict[str, Bulkhead]
+    _executor_bulkheads: dict[str, Bulkhead]
+    _breakers: dict[str, CircuitBreaker]
+    _binders: dict[MethodType, ArgumentBinder]
+    _caches: dict[str, ResultCache]
+    _flights: SingleFlight
+    _batchers: dict[str, MicroBatcher]
+    _resources: ResourceRegistry
 
-    def __init__(self, self_id: str, executors_list: list) -> None:
+    def __init__(self, self_id: str, executors_list: list,
+                 process_pool: Optional[ProcessExecution] = None,
+                 default_timeout: Optional[float] = None,
+                 namespaced: bool = False,
+                 resources: Optional[ResourceRegistry] = None) -> None:
         """
         Constructor for DeviceCardano class.
 
@@ -44,12 +129,43 @@ class DeviceExecutors(Device, Generic[TypeDevice]):
         self_id: str
             Unique identifier for the device.
         executors_list: list
-            Instance of classes to be utilized as executors
+            Instance of classes to be utilized as executors. Classes and
+            `LazyExecutor` placeholders are built on the first call of any
+            of their commands, or on `warm_up` if flagged for it.
+        process_pool: Optional[ProcessExecution], default = None
+            Worker processes for CPU-bound commands.
+        default_timeout: Optional[float], default = None
+            Execution budget in seconds for every command.
+        namespaced: bool, default = False
+            Register the commands as `executor.method` too, which allows
+            executors sharing method names.
+        resources: Optional[ResourceRegistry], default = None
+            Registry of resource pools, which can be shared with other
+            devices. A new one is created if not given.
         """
         self._device_id = self_id
         self._metadata = {}
         self._device_type = 1
-        self._executors = self._initialize_classes(executors_list)
+        self._namespaced = namespaced
+        self._dispatch_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._executors, self._commands, self._pending = \
+            self._initialize_classes(executors_list)
+        self._check_invalidates(self._executors, self.commands)
+        self._process_pool = process_pool
+        self._default_timeout = default_timeout
+        self._watchdog = Watchdog()
+        self._bulkheads, self._executor_bulkheads = \
+            self._initialize_bulkheads(self._executors)
+        self._breakers = self._initialize_breakers(self._executors)
+        self._binders = self._initialize_binders(self._commands.values())
+        self._caches = self._initialize_caches(self._executors)
+        self._flights = SingleFlight()
+        self._batchers = self._initialize_batchers(self._executors)
+        self._resources = resources if resources is not None \
+            else ResourceRegistry()
+        self._initialize_resources(self._executors)
+        self._attach_controls(self._executors)
         super().__init__()
         print(f"Device Created: {self.device_id}")
 
@@ -88,6 +204,445 @@ class DeviceExecutors(Device, Generic[TypeDevice]):
         """
         return self._device_type
 
+    @property
+    def commands(self) -> list[str]:
+        """
+        Get the names of the available commands.
+        """
+        return sorted(set(self._commands).union(self._pending))
+
+    @property
+    def process_pool(self) -> Optional[ProcessExecution]:
+        """
+        Get the worker processes for CPU-bound commands, if any.
+        """
+        return self._process_pool
+
+    @property
+    def default_timeout(self) -> Optional[float]:
+        """
+        Get the default execution budget of the commands.
+        """
+        return self._default_timeout
+
+    @default_timeout.setter
+    def default_timeout(self, timeout: Optional[float]) -> None:
+        """
+        Set the default execution budget of the commands.
+
+        Parameters
+        ---------
+        timeout: Optional[float]
+            Budget in seconds. None for no budget.
+        """
+        self._default_timeout = timeout
+
+    @property
+    def watchdog(self) -> Watchdog:
+        """
+        Get the watchdog enforcing the execution budget of the commands.
+        """
+        return self._watchdog
+
+    @property
+    def bulkheads(self) -> dict[str, Bulkhead]:
+        """
+        Get the concurrency limits of the commands.
+        """
+        return self._bulkheads
+
+    @property
+    def executor_bulkheads(self) -> dict[str, Bulkhead]:
+        """
+        Get the concurrency limits of the executors.
+        """
+        return self._executor_bulkheads
+
+    @property
+    def breakers(self) -> dict[str, CircuitBreaker]:
+        """
+        Get the circuit breakers of the commands.
+        """
+        return self._breakers
+
+    @property
+    def binders(self) -> dict[MethodType, ArgumentBinder]:
+        """
+        Get the argument binders of the commands.
+        """
+        return self._binders
+
+    @property
+    def caches(self) -> dict[str, ResultCache]:
+        """
+        Get the result caches of the commands.
+        """
+        return self._caches
+
+    @property
+    def flights(self) -> SingleFlight:
+        """
+        Get the registry of coalesced executions in flight.
+        """
+        return self._flights
+
+    @property
+    def batchers(self) -> dict[str, MicroBatcher]:
+        """
+        Get the micro-batchers of the batch commands.
+        """
+        return self._batchers
+
+    @property
+    def init_times(self) -> dict[str, float]:
+        """
+        Get the construction time of the lazy executors already built.
+        """
+        return {obj.executor_class.__name__: obj.init_time
+                for obj in self._executors
+                if isinstance(obj, LazyExecutor) and obj.init_time is not None}
+
+    @property
+    def resources(self) -> ResourceRegistry:
+        """
+        Get the registry of resource pools of the executors.
+        """
+        return self._resources
+
+    def check_resources(self) -> dict[str, int]:
+        """
+        Health check the idle resources of every pool, discarding the broken
+        ones so they are recreated on their next use.
+
+        Returns
+        -------
+        dict[str, int]
+            Number of resources discarded by pool name.
+        """
+        return self._resources.check_health()
+
+    def warm_up(self) -> dict[str, float]:
+        """
+        Build the lazy executors flagged for warm-up that were not built yet.
+        Failures are logged and left to be retried on their first call.
+
+        Returns
+        -------
+        dict[str, float]
+            Seconds the construction of each executor built took, by class
+            name.
+        """
+        times: dict[str, float] = {}
+        for obj in self._executors:
+            if not isinstance(obj, LazyExecutor) or not obj.warm_up or \
+                    obj.built:
+                continue
+            try:
+                self._build(obj)
+            except Exception:
+                logging.exception(f"Failed warming up executor \
+{obj.executor_class.__name__}")
+                continue
+            times[obj.executor_class.__name__] = cast(float, obj.init_time)
+        return times
+
+    def swap_executors(self, executors: list,
+                       remove: Optional[list[str]] = None) -> list[str]:
+        """
+        Replace or add executors at runtime. Each executor replaces the one
+        of the same class name, if any, and the commands, limits, breakers,
+        caches and batchers are rebuilt for them before switching to the new
+        version at once. The state of the rest of executors is kept. Calls
+        in flight finish on the old version and worker processes are
+        replaced if running, starting the new ones before the switch.
+
+        Parameters
+        ----------
+        executors: list
+            Executor instances, classes or `LazyExecutor` placeholders.
+        remove: Optional[list[str]], default = None
+            Class names of executors to be removed.
+
+        Returns
+        -------
+        list[str]
+            Class names of the executors replaced or removed.
+        """
+        fresh = [LazyExecutor(ins) if isinstance(ins, type) else ins
+                 for ins in executors]
+        gone = set(remove or []).union(
+            self._class_of(ins).__name__ for ins in fresh)
+        with self._swap_lock:
+            retired = [obj for obj in self._executors
+                       if self._class_of(obj).__name__ in gone]
+            kept = {obj: f_list for obj, f_list in self._executors.items()
+                    if obj not in retired}
+            pool = self._process_pool
+            prepared = None if pool is None else \
+                pool.prepare(list(kept) + fresh)
+            try:
+                added = self._switch_executors(fresh, retired, kept, prepared)
+            except BaseException:
+                if prepared is not None:
+                    prepared.shutdown(wait=False)
+                raise
+        replaced = sorted(self._class_of(obj).__name__ for obj in retired)
+        logging.info(f"Swapped executors of {self.device_id}: {replaced} \
+replaced, {len(added)} loaded")
+        print(f"Executors Swapped: {replaced}")
+        return replaced
+
+    def _switch_executors(self, fresh: list, retired: list, kept: dict,
+                          prepared: Optional[ProcessPoolExecutor]) -> dict:
+        """
+        Internal helper of `swap_executors` that rebuilds the tables for the
+        kept and new executors and switches to them at once, along with the
+        worker processes prepared for them.
+
+        Returns
+        -------
+        dict
+            The new executors with their commands.
+        """
+        with self._dispatch_lock:
+            all_executors, commands, pending = self._initialize_classes(
+                list(kept) + fresh)
+            added = {obj: f_list for obj, f_list in all_executors.items()
+                     if obj not in kept}
+            self._check_invalidates(all_executors, sorted(
+                set(commands).union(pending)))
+            names = {key for obj in kept for key in [
+                self._class_of(obj).__name__,
+                *(self._command_key(self._class_of(obj), f)
+                  for f in kept[obj])]}
+            self._initialize_resources(added)
+            self._attach_controls(added)
+            self._binders = {
+                **{f: b for f, b in self._binders.items()
+                   if any(f.__self__ is self._instance_of(obj)
+                          for obj in retired if not
+                          isinstance(obj, LazyExecutor) or obj.built)},
+                **self._initialize_binders(commands.values())}
+            bulkheads, executor_bulkheads = self._initialize_bulkheads(added)
+            self._bulkheads = self._merge(self._bulkheads, names, bulkheads)
+            self._executor_bulkheads = self._merge(
+                self._executor_bulkheads, names, executor_bulkheads)
+            self._breakers = self._merge(self._breakers, names,
+                                         self._initialize_breakers(added))
+            self._caches = self._merge(self._caches, names,
+                                       self._initialize_caches(added))
+            self._batchers = self._merge(self._batchers, names,
+                                         self._initialize_batchers(added))
+            self._pending, self._commands = pending, commands
+            self._executors = all_executors
+            if self._process_pool is not None:
+                self._process_pool.restart(list(all_executors), prepared)
+        return added
+
+    @staticmethod
+    def _merge(current: dict, kept: set, fresh: dict) -> dict:
+        """
+        Internal helper that keeps the entries of a table belonging to the
+        kept executors and adds the entries of the new ones.
+        """
+        return {**{k: v for k, v in current.items() if k in kept}, **fresh}
+
+    def invalidate_cache(self, cmd: Optional[str] = None,
+                         args: Any = MISSING) -> int:
+        """
+        Remove memoized answers, for instance after the data behind a
+        cached command changed.
+
+        Parameters
+        ----------
+        cmd: Optional[str], default = None
+            Name of the command. None for every cached command.
+        args: Any, default = MISSING
+            Only remove the answer for these `args`. Every answer of the
+            command is removed if not given.
+
+        Returns
+        -------
+        int
+            Number of answers removed.
+        """
+        if cmd is None:
+            return sum(c.invalidate() for c in self._caches.values())
+        cache = self._caches.get(self._command_key(*self._lookup(cmd)))
+        if cache is None:
+            return 0
+        if args is MISSING:
+            return cache.invalidate()
+        key = cache_key(args or None)
+        return 0 if key is None else cache.invalidate(key)
+
+    def close(self) -> None:
+        """
+        Stop the worker processes and threads, if any, and close the resource
+        pools.
+        """
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+        self._watchdog.shutdown()
+        self._resources.close()
+
+    def parallel_safe(self, msg_queue: list[Message]) -> bool:
+        """
+        Whether the messages of a sequence can be executed concurrently.
+        Either because the request was flagged as `parallel` or because all
+        of its commands were declared with the `parallel` option.
+
+        Parameters
+        ----------
+        msg_queue: list[Message]
+            Sequence of messages of a sub-topic.
+        """
+        if super().parallel_safe(msg_queue):
+            return True
+        try:
+            return len(msg_queue) > 1 and all(
+                get_command_options(*self._lookup(m.payload['cmd']))
+                .get('parallel') for m in msg_queue)
+        except (ValueError, TypeError, AttributeError, KeyError):
+            return False
+
+    def command_priority(self, cmd: str) -> int:
+        """
+        Scheduling priority of a command, declared with the `priority`
+        option.
+
+        Parameters
+        ----------
+        cmd: str
+            Name of the command.
+        """
+        try:
+            cls, name = self._lookup(cmd)
+        except (ValueError, AttributeError):
+            return 0
+        return get_command_options(cls, name).get('priority', 0)
+
+    def streaming(self, cmd: str) -> bool:
+        """
+        Whether a command is a generator, or async generator, method whose
+        chunks are published as they are yielded.
+
+        Parameters
+        ----------
+        cmd: str
+            Name of the command.
+        """
+        try:
+            func = getattr(*self._lookup(cmd))
+        except (ValueError, AttributeError):
+            return False
+        return inspect.isgeneratorfunction(func) or \
+            inspect.isasyncgenfunction(func)
+
+    def stream_treatment(self, message: Message) -> Iterator[dict]:
+        """
+        Execute a `streaming` command yielding an answer for every chunk,
+        with its `chunk` number, as soon as it is produced. The stream is
+        closed by an answer with `end` set to True, which carries an error
+        if the command failed or its deadline passed midway. The command
+        runs within its bulkheads and circuit breaker.
+
+        Parameters
+        -----
+        message: core.Message
+            Message object containing the necessary information for
+            its processing.
+
+        Returns
+        -------
+        Iterator[dict]
+            The answers of the chunks and the end of the stream.
+        """
+        main, func, args = self._prepare_call(message)
+        if message.expired:
+            yield self._stream_end(main, 0, self._expired_answer(main, func))
+            return
+        bulkheads = self._enter_bulkheads(func)
+        if bulkheads is None:
+            yield error_answer(main['message_id'], BUSY_ERROR,
+                               f"`{func.__name__}` {LIMIT_DETAIL}")
+            return
+        try:
+            if not self._allow(func):
+                yield error_answer(main['message_id'], UNAVAILABLE_ERROR,
+                                   f"`{func.__name__}` {BREAKER_DETAIL}")
+                return
+            started, answer, count = time.monotonic(), None, 0
+            chunks = self._iterate(func, args)
+            try:
+                for chunk in chunks:
+                    if message.expired:
+                        answer = self._stream_end(
+                            main, count, self._expired_answer(main, func))
+                        break
+                    yield self._stream_chunk(main, count, chunk)
+                    count += 1
+                else:
+                    answer = self._stream_end(main, count)
+            except Exception as err:
+                answer = self._stream_end(main, count, error_answer(
+                    main['message_id'], FAILED_ERROR,
+                    f"`{func.__name__}`: {err}"))
+                yield answer
+                raise
+            finally:
+                chunks.close()
+                self._record(func, started, answer)
+            yield answer
+        finally:
+            self._exit_bulkheads(bulkheads)
+
+    async def async_stream_treatment(self, message: Message) \
+            -> AsyncIterator[dict]:
+        """
+        Asyncio counterpart of `stream_treatment`. Chunks of regular
+        generators are produced on the default executor of the running
+        loop.
+        """
+        main, func, args = self._prepare_call(message)
+        if message.expired:
+            yield self._stream_end(main, 0, self._expired_answer(main, func))
+            return
+        bulkheads = await self._async_enter_bulkheads(func)
+        if bulkheads is None:
+            yield error_answer(main['message_id'], BUSY_ERROR,
+                               f"`{func.__name__}` {LIMIT_DETAIL}")
+            return
+        try:
+            if not self._allow(func):
+                yield error_answer(main['message_id'], UNAVAILABLE_ERROR,
+                                   f"`{func.__name__}` {BREAKER_DETAIL}")
+                return
+            started, answer, count = time.monotonic(), None, 0
+            chunks = self._async_iterate(func, args)
+            try:
+                async for chunk in chunks:
+                    if message.expired:
+                        answer = self._stream_end(
+                            main, count, self._expired_answer(main, func))
+                        break
+                    yield self._stream_chunk(main, count, chunk)
+                    count += 1
+                else:
+                    answer = self._stream_end(main, count)
+            except Exception as err:
+                answer = self._stream_end(main, count, error_answer(
+                    main['message_id'], FAILED_ERROR,
+                    f"`{func.__name__}`: {err}"))
+                yield answer
+                raise
+            finally:
+                await chunks.aclose()
+                self._record(func, started, answer)
+            yield answer
+        finally:
+            self._exit_bulkheads(bulkheads)
+
     def message_treatment(self, message: Message) -> dict:
         """
         Main function to handle double way traffic of IoT Service.
@@ -104,28 +659,810 @@ class DeviceExecutors(Device, Generic[TypeDevice]):
             Information containing the results of the command
             passed down through the message.
         """
+        main, func, args = self._prepare_call(message)
+        cached = self._cached(func, message)
+        if cached is not None:
+            return cached
+        key = self._flight_key(func, message)
+        if key is None:
+            return self._treat(main, func, args, message)
+        future, leader = self._flights.join(key)
+        if not leader:
+            answer = self._follow(main, func, future, message.deadline)
+            if answer is None:
+                return self._treat(main, func, args, message)
+            return answer
+        try:
+            answer = self._treat(main, func, args, message)
+        except BaseException as err:
+            self._flights.fail(key, err)
+            raise
+        self._flights.finish(key, self._shared_output(answer))
+        return answer
+
+    def _treat(self, main: dict, func: MethodType, args: Any,
+               message: Message) -> dict:
+        """
+        Internal helper that executes a command within its bulkheads and
+        circuit breaker, memoizing the answer if it is cached.
+
+        Parameters
+        ----------
+        main: dict
+            Answer template containing the `message_id`.
+        func: MethodType
+            The command to be called.
+        args: Any
+            Arguments for the command. Omitted when None.
+        message: core.Message
+            The message being answered.
+
+        Returns
+        -------
+        dict
+            The answer with the results of the command.
+        """
+        if message.expired:
+            return self._expired_answer(main, func)
+        bulkheads = self._enter_bulkheads(func)
+        if bulkheads is None:
+            return error_answer(main['message_id'], BUSY_ERROR,
+                                f"`{func.__name__}` {LIMIT_DETAIL}")
+        try:
+            if not self._allow(func):
+                return error_answer(main['message_id'], UNAVAILABLE_ERROR,
+                                    f"`{func.__name__}` {BREAKER_DETAIL}")
+            started, answer = time.monotonic(), None
+            try:
+                answer = self._run_call(main, func, args, message.deadline,
+                                        bulkheads)
+            finally:
+                self._record(func, started, answer)
+            self._remember(func, message, answer)
+            return answer
+        finally:
+            self._exit_bulkheads(bulkheads)
+
+    async def async_message_treatment(self, message: Message) -> dict:
+        """
+        Asyncio counterpart of `message_treatment`. Coroutine commands are
+        awaited on the running loop while regular ones are offloaded to its
+        default executor. Commands exceeding their budget are cancelled.
+
+        Parameters
+        -----
+        message: core.Message
+            Message object containing the necessary information for
+            its processing.
+
+        Returns
+        -------
+        main: dict
+            Information containing the results of the command
+            passed down through the message.
+        """
+        main, func, args = self._prepare_call(message)
+        cached = self._cached(func, message)
+        if cached is not None:
+            return cached
+        key = self._flight_key(func, message)
+        if key is None:
+            return await self._async_treat(main, func, args, message)
+        future, leader = self._flights.join(key)
+        if not leader:
+            answer = await self._async_follow(main, func, future,
+                                              message.deadline)
+            if answer is None:
+                return await self._async_treat(main, func, args, message)
+            return answer
+        try:
+            answer = await self._async_treat(main, func, args, message)
+        except BaseException as err:
+            self._flights.fail(key, err)
+            raise
+        self._flights.finish(key, self._shared_output(answer))
+        return answer
+
+    async def _async_treat(self, main: dict, func: MethodType, args: Any,
+                           message: Message) -> dict:
+        """
+        Asyncio counterpart of `_treat`.
+        """
+        if message.expired:
+            return self._expired_answer(main, func)
+        bulkheads = await self._async_enter_bulkheads(func)
+        if bulkheads is None:
+            return error_answer(main['message_id'], BUSY_ERROR,
+                                f"`{func.__name__}` {LIMIT_DETAIL}")
+        try:
+            if not self._allow(func):
+                return error_answer(main['message_id'], UNAVAILABLE_ERROR,
+                                    f"`{func.__name__}` {BREAKER_DETAIL}")
+            started, answer = time.monotonic(), None
+            try:
+                answer = await self._async_run_call(main, func, args,
+                                                    message.deadline,
+                                                    bulkheads)
+            finally:
+                self._record(func, started, answer)
+            self._remember(func, message, answer)
+            return answer
+        finally:
+            self._exit_bulkheads(bulkheads)
+
+    def _flight_key(self, func: MethodType, message: Message)\
+            -> Optional[tuple]:
+        """
+        Internal helper with the identity of the execution of a message, if
+        its command is declared with the `coalesce` option and its `args`
+        can be represented as JSON.
+        """
+        if not get_command_options(func.__self__, func.__name__)\
+                .get('coalesce'):
+            return None
+        key = cache_key(message.payload.get('args') or None)
+        return None if key is None else (func, key)
+
+    @staticmethod
+    def _shared_output(answer: dict) -> Optional[dict]:
+        """
+        Internal helper with the part of an answer shared by every message
+        attached to the same execution. Error answers depend on the deadline
+        and limits of the leading message, so they are not shared.
+        """
+        if answer.get('error') is not None:
+            return None
+        return {k: v for k, v in answer.items() if k != 'message_id'}
+
+    def _follow(self, main: dict, func: MethodType, future: Future,
+                deadline: Optional[float] = None) -> Optional[dict]:
+        """
+        Internal helper that waits for the execution a message attached to,
+        within the budget of its command, and answers with its results.
+        Nothing is returned when the execution did not share an answer, so
+        the message has to be executed on its own.
+
+        Parameters
+        ----------
+        main: dict
+            Answer template containing the `message_id`.
+        func: MethodType
+            The command being executed.
+        future: Future
+            Future of the execution in flight.
+        deadline: Optional[float], default = None
+            Unix time of the deadline of the message.
+
+        Returns
+        -------
+        Optional[dict]
+            The answer with the shared results, if any.
+        """
+        timeout = self._timeout(func, deadline)
+        if timeout is not None and timeout <= 0:
+            return self._expired_answer(main, func)
+        try:
+            shared = future.result(timeout)
+        except FuturesTimeout:
+            if future.done():
+                raise
+            return error_answer(main['message_id'], TIMEOUT_ERROR,
+                                f"`{func.__name__}`: Execution exceeded \
+{timeout} seconds")
+        return None if shared is None else {**main, **shared}
+
+    async def _async_follow(self, main: dict, func: MethodType,
+                            future: Future,
+                            deadline: Optional[float] = None)\
+            -> Optional[dict]:
+        """
+        Asyncio counterpart of `_follow`. Giving up on the wait does not
+        cancel the execution, which other messages may be attached to.
+        """
+        timeout = self._timeout(func, deadline)
+        if timeout is not None and timeout <= 0:
+            return self._expired_answer(main, func)
+        flight = asyncio.wrap_future(future)
+        done, _ = await asyncio.wait({flight}, timeout=timeout)
+        if not done:
+            return error_answer(main['message_id'], TIMEOUT_ERROR,
+                                f"`{func.__name__}`: Execution exceeded \
+{timeout} seconds")
+        shared = flight.result()
+        return None if shared is None else {**main, **shared}
+
+    def _run_call(self, main: dict, func: MethodType, args: Any,
+                  deadline: Optional[float] = None,
+                  bulkheads: Optional[list[Bulkhead]] = None) -> dict:
+        """
+        Internal helper that executes a command within its budget. The budget
+        is shortened to the deadline of the message, if any. Only exceeding
+        the budget is answered as a timeout, errors raised by the command
+        itself are raised as they are. Calls abandoned while running keep
+        their bulkhead slots until they actually finish.
+
+        Parameters
+        ----------
+        main: dict
+            Answer template containing the `message_id`.
+        func: MethodType
+            The command to be called.
+        args: Any
+            Arguments for the command. Omitted when None.
+        deadline: Optional[float], default = None
+            Unix time of the deadline of the message.
+        bulkheads: Optional[list[Bulkhead]], default = None
+            Bulkhead slots taken for the call. Emptied when they are handed
+            over to an abandoned call.
+
+        Returns
+        -------
+        dict
+            The answer with the results of the command.
+        """
+        timeout = self._timeout(func, deadline)
+        if timeout is not None and timeout <= 0:
+            return self._expired_answer(main, func)
+        future: Optional[Future] = None
+        if self._in_process(func) and \
+                self._key_of(func) not in self._batchers:
+            future = self._submit_process(func, args, deadline)
+            params = self.watchdog.wait(future, timeout, self._abandon)
+        elif timeout is not None:
+            future = self.watchdog.submit(self._invoke, func, args, deadline)
+            if future is None:
+                return error_answer(main['message_id'], BUSY_ERROR,
+                                    f"`{func.__name__}` {WATCHDOG_DETAIL}")
+            params = self.watchdog.wait(future, timeout)
+        else:
+            params = self._invoke(func, args, deadline)
+        if params is EXPIRED:
+            self._hold_bulkheads(cast(Future, future), bulkheads)
+            return self._exceeded_answer(main, func, timeout, deadline)
+        return self._format_output(main, params)
+
+    async def _async_run_call(self, main: dict, func: MethodType,
+                              args: Any, deadline: Optional[float] = None,
+                              bulkheads: Optional[list[Bulkhead]] = None)\
+            -> dict:
+        """
+        Asyncio counterpart of `_run_call`.
+
+        Parameters
+        ----------
+        main: dict
+            Answer template containing the `message_id`.
+        func: MethodType
+            The command to be called.
+        args: Any
+            Arguments for the command. Omitted when None.
+        deadline: Optional[float], default = None
+            Unix time of the deadline of the message.
+        bulkheads: Optional[list[Bulkhead]], default = None
+            Bulkhead slots taken for the call. Emptied when they are handed
+            over to an abandoned call.
+
+        Returns
+        -------
+        dict
+            The answer with the results of the command.
+        """
+        timeout = self._timeout(func, deadline)
+        if timeout is not None and timeout <= 0:
+            return self._expired_answer(main, func)
+        future: Optional[Future] = None
+        if self._in_process(func) and \
+                self._key_of(func) not in self._batchers:
+            future = self._submit_process(func, args, deadline)
+        elif timeout is not None and \
+                not inspect.iscoroutinefunction(func):
+            future = self.watchdog.submit(self._invoke, func, args, deadline)
+            if future is None:
+                return error_answer(main['message_id'], BUSY_ERROR,
+                                    f"`{func.__name__}` {WATCHDOG_DETAIL}")
+        token = CURRENT_DEADLINE.set(deadline)
+        try:
+            if future is not None:
+                call = asyncio.wrap_future(future)
+            elif inspect.iscoroutinefunction(func):
+                call = asyncio.ensure_future(self._execute(func, args))
+            else:
+                call = asyncio.get_running_loop().run_in_executor(
+                    None, self._invoke, func, args, deadline)
+        finally:
+            CURRENT_DEADLINE.reset(token)
+        done, _ = await asyncio.wait({call}, timeout=timeout)
+        if not done:
+            if future is None:
+                call.cancel()
+                await asyncio.wait({call})
+            self.watchdog.expire(future, self._abandon
+                                 if self._in_process(func) else None)
+            if future is not None:
+                self._hold_bulkheads(future, bulkheads)
+            return self._exceeded_answer(main, func, timeout, deadline)
+        return self._format_output(main, call.result())
+
+    def _prepare_call(self, message: Message)\
+            -> tuple[dict, MethodType, Any]:
+        """
+        Internal helper that validates a message and finds the command to be
+        executed for it. The arguments of commands declared with the `bind`
+        option are bound to their parameters.
+
+        Parameters
+        -----
+        message: core.Message
+            Message object to be executed.
+
+        Returns
+        -------
+        tuple[dict, MethodType, Any]
+            The answer template, the command and its arguments, if any.
+        """
         super().validate_message(message)
         super().validate_inputs(message.payload)
         main = {'message_id': message.message_id}
-        cmd = message.payload['cmd'].lower()
-        _func = [getattr(obj, f) for obj, f_list in self._executors.items()
-                 for f in f_list if f == cmd]
-        if not _func:
+        func = self._find_command(message.payload['cmd'])
+        args = message.payload.get('args') or None
+        binder = self._binders.get(func)
+        return main, func, args if binder is None else binder.bind(args)
+
+    def _find_command(self, cmd: str) -> MethodType:
+        """
+        Internal helper that finds the method of a command by its name.
+
+        Parameters
+        -----
+        cmd: str
+            Name of the command, case insensitive.
+
+        Returns
+        -------
+        MethodType
+            The command to be called.
+        """
+        name = cmd.lower()
+        func = self._commands.get(name)
+        if func is None:
+            pending = self._pending.get(name)
+            if pending is not None:
+                self._build(pending[0])
+            func = self._commands.get(name)
+        if func is None:
+            raise ValueError("The specified command does not exists")
+        return func
+
+    def _lookup(self, cmd: str) -> tuple[type, str]:
+        """
+        Internal helper that finds the executor class and method name of a
+        command without building lazy executors.
+
+        Parameters
+        -----
+        cmd: str
+            Name of the command, case insensitive.
+
+        Returns
+        -------
+        tuple[type, str]
+            The executor class and the method name.
+        """
+        name = cmd.lower()
+        func = self._commands.get(name)
+        if func is not None:
+            return type(func.__self__), func.__name__
+        pending = self._pending.get(name)
+        if pending is None:
             raise ValueError("The specified command does not exists")
+        return pending[0].executor_class, pending[1]
+
+    def _build(self, lazy: LazyExecutor) -> None:
+        """
+        Internal helper that builds a lazy executor and moves its commands
+        to the command table, compiling their argument binders.
+        """
+        instance = lazy.build()
+        with self._dispatch_lock:
+            funcs = {n: getattr(instance, f) for n, (obj, f)
+                     in self._pending.items() if obj is lazy}
+            self._binders.update(self._initialize_binders(funcs.values()))
+            self._commands.update(funcs)
+            for name in funcs:
+                del self._pending[name]
+
+    @staticmethod
+    def _in_process(func: MethodType) -> bool:
+        """
+        Internal helper to know if a command was declared to be executed on
+        the worker processes.
+        """
+        return bool(get_command_options(func.__self__, func.__name__)
+                    .get('process'))
+
+    def _submit_process(self, func: MethodType, args: Any,
+                        deadline: Optional[float] = None) -> Future:
+        """
+        Internal helper that schedules a command on the worker processes,
+        starting them if needed.
+
+        Parameters
+        ----------
+        func: MethodType
+            The command to be called.
+        args: Any
+            Arguments for the command. Omitted when None.
+        deadline: Optional[float], default = None
+            Unix time of the deadline of the message.
+
+        Returns
+        -------
+        Future
+            Future with the raw result of the command.
+        """
+        with self._dispatch_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessExecution()
+            self._process_pool.start(list(self._executors))
+            index = next(num for num, obj in enumerate(self._executors)
+                         if self._holds(obj, func.__self__))
+            print(f"Executing function on worker process: {func}")
+            return self._process_pool.submit(index, func.__name__, args,
+                                             deadline)
+
+    def _abandon(self, future: Future) -> bool:
+        """
+        Internal helper that gives up on a call of the worker processes that
+        exceeded its budget, replacing the worker stuck on it.
+
+        Returns
+        -------
+        bool
+            True if the call was cancelled before it started.
+        """
+        pool = self._process_pool
+        return future.cancel() if pool is None else pool.abandon(future)
+
+    def _enter_bulkheads(self, func: MethodType) -> Optional[list[Bulkhead]]:
+        """
+        Internal helper that takes a slot on every bulkhead of a command,
+        waiting up to its `limit_wait` option for them.
+
+        Returns
+        -------
+        Optional[list[Bulkhead]]
+            The bulkheads taken, or None if any of them is full.
+        """
+        taken: list[Bulkhead] = []
+        bulkheads, wait = self._bulkheads_for(func)
+        for bulkhead in bulkheads:
+            if not bulkhead.acquire(wait):
+                self._exit_bulkheads(taken)
+                return None
+            taken.append(bulkhead)
+        return taken
+
+    async def _async_enter_bulkheads(self, func: MethodType)\
+            -> Optional[list[Bulkhead]]:
+        """
+        Asyncio counterpart of `_enter_bulkheads`. Waiting for a free slot
+        is offloaded to the default executor of the running loop.
+        """
+        taken: list[Bulkhead] = []
+        bulkheads, wait = self._bulkheads_for(func)
+        for bulkhead in bulkheads:
+            if not bulkhead.acquire(0) and not (
+                    wait != 0 and await asyncio.get_running_loop()
+                    .run_in_executor(None, bulkhead.acquire, wait)):
+                self._exit_bulkheads(taken)
+                return None
+            taken.append(bulkhead)
+        return taken
+
+    @staticmethod
+    def _exit_bulkheads(bulkheads: list[Bulkhead]) -> None:
+        """
+        Internal helper that gives back the slots taken on some bulkheads.
+        """
+        for bulkhead in reversed(bulkheads):
+            bulkhead.release()
+
+    def _hold_bulkheads(self, future: Future,
+                        bulkheads: Optional[list[Bulkhead]]) -> None:
+        """
+        Internal helper that keeps the bulkhead slots of an abandoned call
+        until it actually finishes, so the limits bound the calls that are
+        still running. The list is emptied for its owner not to give them
+        back.
+        """
+        if not bulkheads or future.done():
+            return
+        held = list(bulkheads)
+        bulkheads.clear()
+        future.add_done_callback(lambda _: self._exit_bulkheads(held))
+
+    def _bulkheads_for(self, func: MethodType)\
+            -> tuple[list[Bulkhead], Optional[float]]:
+        """
+        Internal helper with the bulkheads of a command, command first and
+        executor second, and how long to wait for them.
+        """
+        options = get_command_options(func.__self__, func.__name__)
+        found = [self._bulkheads.get(self._key_of(func)),
+                 self._executor_bulkheads.get(type(func.__self__).__name__)]
+        return [b for b in found if b is not None], \
+            options.get('limit_wait', 0)
+
+    def _allow(self, func: MethodType) -> bool:
+        """
+        Internal helper to know if the circuit breaker of a command, if any,
+        lets the call go through.
+        """
+        breaker = self._breakers.get(self._key_of(func))
+        return breaker is None or breaker.allow()
+
+    def _record(self, func: MethodType, started: float,
+                answer: Optional[dict]) -> None:
+        """
+        Internal helper that reports the result of a call to the circuit
+        breaker of its command, if any. Calls that raised or answered with an
+        error, timeouts included, count as failures. Calls whose deadline
+        passed before they could run or midway through a stream are not
+        reported, and give back their probe slot instead.
+
+        Parameters
+        ----------
+        func: MethodType
+            The command that was called.
+        started: float
+            Monotonic time at which the call started.
+        answer: Optional[dict]
+            The answer of the call. None if it raised.
+        """
+        breaker = self._breakers.get(self._key_of(func))
+        if breaker is None:
+            return
+        if answer is not None and answer.get('error') == EXPIRED_ERROR:
+            breaker.release()
         else:
-            func = _func[0]
+            breaker.record(answer is not None and 'error' not in answer,
+                           time.monotonic() - started)
+
+    def _cached(self, func: MethodType, message: Message) -> Optional[dict]:
+        """
+        Internal helper with the memoized answer of a message, if its command
+        is cached and it was already answered for the same `args`.
+        """
+        cache = self._caches.get(self._key_of(func))
+        if cache is None:
+            return None
+        key = cache_key(message.payload.get('args') or None)
+        if key is None:
+            return None
+        output = cache.get(key)
+        if output is MISSING:
+            return None
+        return {'message_id': message.message_id, **output}
+
+    def _remember(self, func: MethodType, message: Message,
+                  answer: dict) -> None:
+        """
+        Internal helper that memoizes a successful answer of a cached
+        command and invalidates the caches listed in its `invalidates`
+        option. Names of methods of the same executor refer to them even
+        when the commands are namespaced.
+
+        Parameters
+        ----------
+        func: MethodType
+            The command that was called.
+        message: core.Message
+            The message that was answered.
+        answer: dict
+            The answer of the call.
+        """
+        if 'error' in answer:
+            return
+        cache = self._caches.get(self._key_of(func))
+        key = cache_key(message.payload.get('args') or None)
+        if cache is not None and key is not None:
+            cache.put(key, {k: v for k, v in answer.items()
+                            if k != 'message_id'})
+        for cmd in get_command_options(func.__self__, func.__name__)\
+                .get('invalidates', []):
+            self.invalidate_cache(self._invalidated(type(func.__self__),
+                                                    cmd))
+
+    def _timeout(self, func: MethodType,
+                 deadline: Optional[float] = None) -> Optional[float]:
+        """
+        Internal helper with the execution budget of a command, shortened to
+        the time left until the deadline, if any.
+        """
+        timeout = get_command_options(func.__self__, func.__name__)\
+            .get('timeout', self._default_timeout)
+        if deadline is None:
+            return timeout
+        remaining = deadline - time.time()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    @staticmethod
+    def _expired_answer(main: dict, func: MethodType) -> dict:
+        """
+        Internal helper with the answer of a command whose deadline passed
+        before it could start.
+        """
+        return error_answer(main['message_id'], EXPIRED_ERROR,
+                            f"`{func.__name__}`: Deadline passed before the \
+execution.")
+
+    @staticmethod
+    def _exceeded_answer(main: dict, func: MethodType,
+                         timeout: Optional[float],
+                         deadline: Optional[float]) -> dict:
+        """
+        Internal helper with the answer of a command that exceeded its
+        budget. Running past the deadline of the message is answered as
+        expired, since it is the budget of the client and not a failure of
+        the command, and running past the `timeout` of the command as a
+        timeout.
+        """
+        if deadline is not None and time.time() >= deadline:
+            return error_answer(main['message_id'], EXPIRED_ERROR,
+                                f"`{func.__name__}`: Deadline passed during \
+the execution.")
+        return error_answer(main['message_id'], TIMEOUT_ERROR,
+                            f"`{func.__name__}`: Execution exceeded \
+{timeout} seconds")
+
+    def _invoke(self, func: MethodType, args: Any,
+                deadline: Optional[float] = None) -> Any:
+        """
+        Internal helper that executes a command on the current thread, as
+        part of a micro-batch if it is a batch command.
+        """
+        batcher = self._batchers.get(self._key_of(func))
+        if batcher is not None:
+            return batcher.submit(args)
+        return self._call(func, args, deadline)
+
+    @classmethod
+    def _call(cls, func: Callable, args: Any,
+              deadline: Optional[float] = None) -> Any:
+        """
+        Internal helper that executes a command on the current thread,
+        running it until completion if it is a coroutine. The deadline is
+        exposed to the command through `remaining_budget`.
+        """
+        token = CURRENT_DEADLINE.set(deadline)
         try:
-            has_args = True if message.payload['args'] else None
-        except KeyError:
-            has_args = False
-        if has_args:
+            params = cls._execute(func, args)
+            if inspect.iscoroutine(params):
+                params = asyncio.run(params)
+            elif inspect.isgenerator(params):
+                params = list(params)
+            elif inspect.isasyncgen(params):
+                params = asyncio.run(cls._collect(params))
+        finally:
+            CURRENT_DEADLINE.reset(token)
+        return params
+
+    @staticmethod
+    async def _collect(chunks: AsyncIterator) -> list:
+        """
+        Internal helper that gathers every chunk of an async generator.
+        """
+        return [chunk async for chunk in chunks]
+
+    @staticmethod
+    def _execute(func: Callable, args: Any) -> Any:
+        """
+        Internal helper that calls a command with its arguments, if any.
+
+        Parameters
+        ----------
+        func: Callable
+            The command to be called.
+        args: Any
+            Arguments for the command. Omitted when None and applied as
+            parameters when already bound.
+
+        Returns
+        -------
+        Any
+            Raw result of the command.
+        """
+        if args is not None:
             print(
                 f"Executing function: {func} \nWith parameters: \
-                    {message.payload['args']}")
-            params = func(message.payload['args'])
+                    {args}")
         else:
             print(f"Executing function: {func}")
-            params = func()
+        return invoke(func, args)
+
+    @classmethod
+    def _iterate(cls, func: Callable, args: Any) -> Generator:
+        """
+        Internal helper with the chunks of a generator command, driving it
+        on a private event loop if it is an async generator.
+        """
+        print(f"Streaming function: {func}")
+        chunks = invoke(func, args)
+        if not inspect.isasyncgen(chunks):
+            yield from chunks
+            return
+        loop = asyncio.new_event_loop()
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(chunks.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(chunks.aclose())
+            loop.close()
+
+    @staticmethod
+    async def _async_iterate(func: Callable, args: Any) -> AsyncGenerator:
+        """
+        Asyncio counterpart of `_iterate`. Chunks of regular generators are
+        produced on the default executor of the running loop.
+        """
+        print(f"Streaming function: {func}")
+        chunks = invoke(func, args)
+        if inspect.isasyncgen(chunks):
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            finally:
+                await chunks.aclose()
+            return
+        loop, done = asyncio.get_running_loop(), object()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, next, chunks, done)
+                if chunk is done:
+                    break
+                yield chunk
+        finally:
+            chunks.close()
+
+    def _stream_chunk(self, main: dict, num: int, chunk: Any) -> dict:
+        """
+        Internal helper with the answer of a chunk of a stream.
+        """
+        return self._format_output({'message_id': main['message_id'],
+                                    'chunk': num}, chunk)
+
+    @staticmethod
+    def _stream_end(main: dict, num: int,
+                    error: Optional[dict] = None) -> dict:
+        """
+        Internal helper with the answer closing a stream after `num` chunks,
+        with the error that stopped it, if any.
+        """
+        return {'message_id': main['message_id'], 'chunk': num, 'end': True,
+                **{k: v for k, v in (error or {}).items()
+                   if k != 'message_id'}}
+
+    @staticmethod
+    def _format_output(main: dict, params: Any) -> dict:
+        """
+        Internal helper that normalizes the result of a command onto the
+        answer dictionary.
+
+        Parameters
+        ----------
+        main: dict
+            Answer template containing the `message_id`.
+        params: Any
+            Raw result of the command.
+
+        Returns
+        -------
+        main: dict
+            The answer with the results of the command.
+        """
         if isinstance(params, list) or isinstance(params, tuple):
             p = {f"output_{v}": params[v] for v in range(len(params))}
             main.update(p)
@@ -141,14 +1478,314 @@ class DeviceExecutors(Device, Generic[TypeDevice]):
             main.update({'output': params})
         return main
 
-    def _initialize_classes(self, instances: list) -> dict:
+    def _initialize_bulkheads(self, executors: dict)\
+            -> tuple[dict[str, Bulkhead], dict[str, Bulkhead]]:
+        """
+        Create the bulkheads declared by the `limit` and `executor_limit`
+        options of the executors, by command and by executor class name.
+        """
+        bulkheads: dict[str, Bulkhead] = {}
+        executor_bulkheads: dict[str, Bulkhead] = {}
+        for obj, f_list in executors.items():
+            cls = self._class_of(obj)
+            for f in f_list:
+                options = get_command_options(cls, f)
+                if 'limit' in options:
+                    key = self._command_key(cls, f)
+                    bulkheads[key] = Bulkhead(key, options['limit'])
+            options = getattr(cls, COMMAND_OPTIONS, {})
+            if 'executor_limit' in options:
+                name = cls.__name__
+                executor_bulkheads[name] = Bulkhead(
+                    name, options['executor_limit'])
+        return bulkheads, executor_bulkheads
+
+    def _initialize_breakers(self, executors: dict)\
+            -> dict[str, CircuitBreaker]:
+        """
+        Create the circuit breakers declared by the `breaker` option of the
+        commands.
+        """
+        breakers: dict[str, CircuitBreaker] = {}
+        for obj, f_list in executors.items():
+            for f in f_list:
+                settings = get_command_options(self._class_of(obj), f)\
+                    .get('breaker')
+                if settings:
+                    key = self._command_key(self._class_of(obj), f)
+                    breakers[key] = CircuitBreaker(
+                        key, **(settings if isinstance(settings, dict)
+                                else {}))
+        return breakers
+
+    def _initialize_caches(self, executors: dict) -> dict[str, ResultCache]:
+        """
+        Create the result caches declared by the `cache` option of the
+        commands.
+        """
+        caches: dict[str, ResultCache] = {}
+        for obj, f_list in executors.items():
+            for f in f_list:
+                options = get_command_options(self._class_of(obj), f)
+                if options.get('cache'):
+                    key = self._command_key(self._class_of(obj), f)
+                    caches[key] = ResultCache(
+                        key, **(options['cache'] if isinstance(
+                            options['cache'], dict) else {}))
+        return caches
+
+    def _initialize_batchers(self, executors: dict)\
+            -> dict[str, MicroBatcher]:
+        """
+        Create the micro-batchers declared by the `batch` option of the
+        commands. Batches of `process` commands run on the worker processes.
+        """
+        batchers: dict[str, MicroBatcher] = {}
+        for obj, f_list in executors.items():
+            for f in f_list:
+                settings = get_command_options(self._class_of(obj), f)\
+                    .get('batch')
+                if not settings:
+                    continue
+                key = self._command_key(self._class_of(obj), f)
+                batchers[key] = MicroBatcher(
+                    key, partial(self._run_batch, obj, f),
+                    **(settings if isinstance(settings, dict) else {}))
+        return batchers
+
+    def _run_batch(self, obj: Any, name: str, items: list) -> Any:
+        """
+        Internal helper that executes a batch, on the worker processes for
+        `process` commands.
+        """
+        func = getattr(self._instance_of(obj), name)
+        if self._in_process(func):
+            return self._submit_process(func, items).result()
+        return self._call(func, items)
+
+    def _initialize_binders(self, funcs: Iterable[MethodType])\
+            -> dict[MethodType, ArgumentBinder]:
+        """
+        Compile the argument binders of the commands declared with the
+        `bind` option, inspecting their signatures only once.
+        """
+        binders: dict[MethodType, ArgumentBinder] = {}
+        for func in funcs:
+            options = get_command_options(func.__self__, func.__name__)
+            if options.get('bind') and not options.get('batch') and \
+                    func not in binders:
+                binders[func] = ArgumentBinder(func,
+                                               options.get('coerce', True))
+        return binders
+
+    def _initialize_resources(self, executors: dict) -> None:
+        """
+        Register the resource pools declared by the `resources` option of the
+        executor classes and hand them the registry as their `resources`
+        attribute.
+        """
+        for obj in executors:
+            cls = self._class_of(obj)
+            declared = getattr(cls, COMMAND_OPTIONS, {}).get('resources')
+            if not declared:
+                continue
+            for name, settings in declared.items():
+                if 'factory' not in settings:
+                    raise TypeError(f"Resource `{name}` of {cls.__name__} \
+has no `factory`")
+                self._resources.register(name, **settings)
+            obj.resources = self._resources
+
+    def _attach_controls(self, executors: dict) -> None:
+        """
+        Hand the device to the `ExecutorControl` executors.
+        """
+        for obj in executors:
+            if issubclass(self._class_of(obj), ExecutorControl):
+                obj.device = self
+
+    def _check_invalidates(self, executors: dict, commands: list[str]) \
+            -> None:
+        """
+        Check that the commands listed in the `invalidates` option of the
+        executors exist.
+        """
+        for obj, f_list in executors.items():
+            cls = self._class_of(obj)
+            for f in f_list:
+                for cmd in get_command_options(cls, f)\
+                        .get('invalidates', []):
+                    if self._invalidated(cls, cmd, commands) not in commands:
+                        raise ValueError(f"The command `{cmd}` invalidated \
+by `{f}` does not exists")
+
+    def _invalidated(self, cls: type, cmd: str,
+                     commands: Optional[Container[str]] = None) -> str:
+        """
+        Internal helper with the name of a command listed in the
+        `invalidates` option of a method of an executor class. It refers to
+        the method of the same executor if it has one, and to the command
+        with that name otherwise.
+        """
+        own = self._command_key(cls, cmd).lower()
+        known = own in commands if commands is not None else \
+            own in self._commands or own in self._pending
+        return own if known else cmd.lower()
+
+    def _initialize_classes(self, instances: list)\
+            -> tuple[dict, dict[str, MethodType],
+                     dict[str, tuple[LazyExecutor, str]]]:
         """
         Load necessary objects for runtime executions on data threatment,
+        resolving once the command table from lowercase names to methods.
+        Names shared by several executors are rejected unless the commands
+        are `namespaced`, in which case they are only reachable with their
+        executor prefix. The commands of lazy executors are kept apart, by
+        method name, until they are built.
         """
-        if instances:
-            return {ins: extract_functions(ins) for ins in instances}
-        else:
+        if not instances:
             raise TypeError('The given list is empty.')
+        instances = [LazyExecutor(ins) if isinstance(ins, type) else ins
+                     for ins in instances]
+        executors = {ins: extract_functions(self._class_of(ins))
+                     if isinstance(ins, LazyExecutor)
+                     else extract_functions(ins) for ins in instances}
+        entries: dict[str, tuple[Any, str]] = {}
+        owners: dict[str, list[tuple[Any, str]]] = {}
+        for ins, f_list in executors.items():
+            for f in f_list or []:
+                owners.setdefault(f.lower(), []).append((ins, f))
+                if self._namespaced:
+                    name = f"{self._class_of(ins).__name__}.{f}".lower()
+                    if name in entries:
+                        raise ValueError(f"Duplicated command: `{name}`")
+                    entries[name] = (ins, f)
+        duplicates = sorted(n for n, found in owners.items()
+                            if len(found) > 1)
+        if duplicates and not self._namespaced:
+            raise ValueError(f"Commands defined by more than one executor: \
+{duplicates}. Rename them or use namespaced commands.")
+        entries.update({n: found[0] for n, found in owners.items()
+                        if len(found) == 1})
+        commands = {n: getattr(self._instance_of(ins), f)
+                    for n, (ins, f) in entries.items()
+                    if not isinstance(ins, LazyExecutor) or ins.built}
+        pending = {n: (ins, f) for n, (ins, f) in entries.items()
+                   if n not in commands}
+        return executors, commands, pending
+
+    @staticmethod
+    def _command_key(cls: type, name: str) -> str:
+        """
+        Internal helper with the key of a command on the tables of limits,
+        breakers, caches and batchers, made of its executor class and method
+        names so commands of different executors never share them.
+        """
+        return f"{cls.__name__}.{name}"
+
+    @classmethod
+    def _key_of(cls, func: MethodType) -> str:
+        """
+        Internal helper with the table key of a resolved command.
+        """
+        return cls._command_key(type(func.__self__), func.__name__)
+
+    @staticmethod
+    def _class_of(obj: Any) -> type:
+        """
+        Internal helper with the class of an executor, lazy or not.
+        """
+        return obj.executor_class if isinstance(obj, LazyExecutor) \
+            else type(obj)
+
+    @staticmethod
+    def _instance_of(obj: Any) -> Any:
+        """
+        Internal helper with the instance of an executor, building it if it
+        is lazy.
+        """
+        return obj.build() if isinstance(obj, LazyExecutor) else obj
+
+    @staticmethod
+    def _holds(obj: Any, instance: Any) -> bool:
+        """
+        Internal helper that checks whether an executor is or wraps an
+        instance, without building the lazy executors that are not.
+        """
+        if isinstance(obj, LazyExecutor):
+            return obj.built and obj.build() is instance
+        return obj is instance
+
+
+class ExecutorControl:
+    """
+    Executor exposing the hot swap of the executors of its device as the
+    `swap_executors` command, so new versions can be rolled out through
+    messages. Only the executors of its catalog can be loaded, by name.
+
+    Attributes
+    ----------
+    catalog: dict[str, Any]
+        Executors that can be loaded, by name. Classes are loaded lazily
+        and any other callable is called to build the executor.
+    device: Optional[DeviceExecutors]
+        The device it controls, set when it is added to it.
+    """
+
+    def __init__(self, catalog: dict[str, Any]) -> None:
+        """
+        Constructor method for ExecutorControl.
+
+        Parameters
+        ----------
+        catalog: dict[str, Any]
+            Executors that can be loaded, by name.
+        """
+        self.catalog = catalog
+        self.device: Optional[DeviceExecutors] = None
+
+    @command_options(bind=True)
+    def swap_executors(self, load: Optional[list] = None,
+                       remove: Optional[list] = None) -> dict:
+        """
+        Load executors of the catalog, replacing the ones of the same class,
+        and remove others.
+
+        Parameters
+        ----------
+        load: Optional[list], default = None
+            Names in the catalog of the executors to be loaded.
+        remove: Optional[list], default = None
+            Class names of the executors to be removed.
+
+        Returns
+        -------
+        dict
+            Class names of the executors replaced or removed and the
+            commands available afterwards.
+        """
+        if self.device is None:
+            raise RuntimeError('The control is not attached to a device.')
+        unknown = [n for n in load or [] if n not in self.catalog]
+        if unknown:
+            raise ValueError(f"Executors not in the catalog: {unknown}")
+        executors = [self.catalog[n] if isinstance(self.catalog[n], type)
+                     else self.catalog[n]() for n in load or []]
+        replaced = self.device.swap_executors(executors, remove)
+        return {'replaced': replaced, 'commands': self.device.commands}
+
+
+@dataclass()
+class RelayStats:
+    """
+    Snapshot of the counters of a relayer.
+    """
+    validated: int
+    rejected: int
+    relayed: int
+    batches: int
+    parse_time: float
+    mean_parse: float
 
 
 class DeviceRelayer(Device, Generic[TypeDevice]):
@@ -157,16 +1794,50 @@ class DeviceRelayer(Device, Generic[TypeDevice]):
     and formatting messages gotten from other instances to be processed by
     another topic `DeviceExecutor` instance.
 
+    Each message is validated with the pydantic model of its `cmd`, found
+    through an index built once from the `Literal` values of the `cmd`
+    field of the models. Valid messages are reformatted as dumped by their
+    model and republished to the executor in batches. Independent messages
+    of the same sender share parallel sequences, while the sequences whose
+    messages depend on each other are kept as they are. When the executor
+    runs in the same process, it can be given instead, so the sequences are
+    handed straight to it and executed as on an executor Thing, only
+    publishing its answers. Validation runs wherever the Thing processes
+    its messages, so give it `workers` to keep it off the MQTT callback
+    thread.
+
     Attributes
     ----------
     _device_id: str
+        Unique identifier for the device.
+    models: dict[str, type[BaseModel]]
+        Validation model by command name.
+    target_topic: Optional[str]
+        Topic of the executor the messages are relayed to.
+    target_client: Optional[str]
+        `client_id` expected by the executor.
+    executor: Optional[Device]
+        Executor device in the same process the messages are handed to.
+    batcher: MicroBatcher
+        Groups the relayed messages into executor sequences.
+    stats: RelayStats
+        Counters of the validated, rejected and relayed messages.
     """
 
     _device_id: str
     _metadata: dict
     _validators: list
+    _models: dict[str, type[BaseModel]]
+    _target_topic: Optional[str]
+    _target_client: Optional[str]
+    _executor: Optional[Device]
+    _batcher: MicroBatcher
 
-    def __init__(self, self_id: str, validators_list: list) -> None:
+    def __init__(self, self_id: str, validators_list: list,
+                 target_topic: Optional[str] = None,
+                 target_client: Optional[str] = None,
+                 batch: Optional[dict] = None,
+                 executor: Optional[Device] = None) -> None:
         """
         Constructor for DeviceRelayer class.
 
@@ -174,16 +1845,43 @@ class DeviceRelayer(Device, Generic[TypeDevice]):
         ----------
         self_id: str
             Unique identifier for the device
+        validators_list: list
+            Pydantic models of the messages, with a `Literal` `cmd` field.
+        target_topic: Optional[str], default = None
+            Topic of the executor the messages are relayed to.
+        target_client: Optional[str], default = None
+            `client_id` expected by the executor.
+        batch: Optional[dict], default = None
+            Keyword arguments of `MicroBatcher`, such as `window` and
+            `max_size`, for the relayed sequences.
+        executor: Optional[Device], default = None
+            Executor device in the same process. Replaces the target topic
+            and client.
         """
+        if executor is None and (target_topic is None or
+                                 target_client is None):
+            raise TypeError('Give either the target topic and client or a \
+co-located executor.')
         self._device_id = self_id
         self._metadata = {}
         self._device_type = 2
         self._validators = self._initialize_validators(validators_list)
+        self._models = self._initialize_index(self._validators)
+        self._target_topic = target_topic
+        self._target_client = target_client
+        self._executor = executor
+        self._batcher = MicroBatcher(f"{self_id}-relay", self._publish_batch,
+                                     **(batch or {}))
+        self._validated = 0
+        self._rejected = 0
+        self._relayed = 0
+        self._parse_time = 0.0
+        self._lock = threading.Lock()
         super().__init__()
         print(f"Device Created: {self.device_id}")
 
     @property
-    def devide_id(self) -> str:
+    def device_id(self) -> str:
         """
         Get the current id from the device.
         """
@@ -217,7 +1915,73 @@ class DeviceRelayer(Device, Generic[TypeDevice]):
         """
         return self._device_type
 
-    def message_treatment(self, message: Message) -> None:
+    @property
+    def models(self) -> dict[str, type[BaseModel]]:
+        """
+        Get the validation models by command name.
+        """
+        return self._models
+
+    @property
+    def target_topic(self) -> Optional[str]:
+        """
+        Get the topic of the executor.
+        """
+        return self._target_topic
+
+    @property
+    def target_client(self) -> Optional[str]:
+        """
+        Get the `client_id` expected by the executor.
+        """
+        return self._target_client
+
+    @property
+    def executor(self) -> Optional[Device]:
+        """
+        Get the co-located executor device, if any.
+        """
+        return self._executor
+
+    def close(self) -> None:
+        """
+        Close the co-located executor, if any.
+        """
+        if self._executor is not None:
+            self._executor.close()
+
+    def warm_up(self) -> dict[str, float]:
+        """
+        Warm up the co-located executor, if any.
+        """
+        return {} if self._executor is None else self._executor.warm_up()
+
+    def check_resources(self) -> dict[str, int]:
+        """
+        Health check the resources of the co-located executor, if any.
+        """
+        return {} if self._executor is None \
+            else self._executor.check_resources()
+
+    @property
+    def batcher(self) -> MicroBatcher:
+        """
+        Get the micro-batcher of the relayed sequences.
+        """
+        return self._batcher
+
+    @property
+    def stats(self) -> RelayStats:
+        """
+        Get a snapshot of the relay counters.
+        """
+        with self._lock:
+            parsed = self._validated + self._rejected
+            return RelayStats(self._validated, self._rejected, self._relayed,
+                              self._batcher.stats.batches, self._parse_time,
+                              self._parse_time / parsed if parsed else 0.0)
+
+    def message_treatment(self, message: Message) -> dict:
         """
         Main function to handle double way traffic of IoT Service.
 
@@ -230,12 +1994,110 @@ class DeviceRelayer(Device, Generic[TypeDevice]):
         Returns
         -------
         main: dict
-            Information containing the results of the command
-            passed down through the message.
+            The message reformatted by its model under `relay`, or an
+            `invalid` error answer.
         """
         super().validate_message(message)
         super().validate_inputs(message.payload)
-        _ = {'message_id': message.message_id}
+        cmd = message.payload['cmd']
+        model = self._models.get(cmd) if isinstance(cmd, str) else None
+        if model is None:
+            with self._lock:
+                self._rejected += 1
+            return error_answer(message.message_id, INVALID_ERROR,
+                                f"There is no model for `{cmd}`")
+        started = time.perf_counter()
+        try:
+            relay = model.model_validate(
+                {'cmd': cmd, 'args': message.payload.get('args')})\
+                .model_dump(mode='json')
+        except ValidationError as err:
+            fields = ['.'.join(str(p) for p in e['loc'])
+                      for e in err.errors()]
+            answer = error_answer(message.message_id, INVALID_ERROR,
+                                  f"`{cmd}` has invalid fields: {fields}")
+        else:
+            answer = {'message_id': message.message_id, 'relay': relay}
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._parse_time += elapsed
+            if 'error' in answer:
+                self._rejected += 1
+            else:
+                self._validated += 1
+        return answer
+
+    def relay(self, messages: list[Message],
+              publish: Callable[[str, str], Any]) -> list[dict]:
+        """
+        Republish reformatted messages to the executor, batched with the
+        ones relayed concurrently, blocking until their batches are
+        published. Messages of a sequence that depend on each other keep
+        it as their own. Messages for a co-located executor are executed by
+        the processor of the Thing instead.
+
+        Parameters
+        ----------
+        messages: list[Message]
+            The messages with the `relay` given by `message_treatment` as
+            payload.
+        publish: Callable[[str, str], Any]
+            Publishes a payload on a topic.
+
+        Returns
+        -------
+        list[dict]
+            The `relayed` answer of each message.
+        """
+        if self._executor is not None:
+            raise TypeError("Messages for a co-located executor are not \
+relayed")
+        sequence = None if self._independent(messages) else object()
+        self._batcher.submit_many([(publish, sequence, m.payload)
+                                   for m in messages])
+        return [{'message_id': m.message_id, 'relayed': True}
+                for m in messages]
+
+    @staticmethod
+    def _independent(messages: list[Message]) -> bool:
+        """
+        Internal helper to know if the messages of a sequence can be
+        executed in any order along with the ones of other sequences,
+        because it has a single message or was flagged as `parallel`, and
+        none of them references the outputs of another.
+        """
+        return (len(messages) == 1 or
+                all(m.payload.get('parallel') for m in messages)) and \
+            not any(find_references(m.payload.get('args'))
+                    for m in messages)
+
+    def _publish_batch(self, items: list) -> list:
+        """
+        Internal helper that publishes a batch of relayed messages as
+        sequences for the executor. The independent messages of the same
+        sender share a parallel sequence, while each dependent sequence is
+        published as it was received. The `sender` of the client is kept.
+        """
+        publish = items[0][0]
+        sequences: dict[tuple, list[dict]] = {}
+        for _, sequence, payload in items:
+            sender = payload.get('sender')
+            sequences.setdefault(
+                (None if sender is None else str(sender), sequence),
+                []).append(payload)
+        for (sender, sequence), payloads in sequences.items():
+            envelope = {'client_id': self._target_client,
+                        'seq': len(payloads),
+                        'cmd': [p['cmd'] for p in payloads],
+                        'args': [p.get('args') for p in payloads]}
+            if sequence is None and len(payloads) > 1:
+                envelope['parallel'] = True
+            if sender is not None:
+                envelope['sender'] = sender
+            publish(self._target_topic, json.dumps(envelope))
+        with self._lock:
+            self._relayed += len(items)
+        return [len(items)] * len(items)
 
     def _initialize_validators(self, instances: list) -> list:
         """
@@ -245,8 +2107,29 @@ class DeviceRelayer(Device, Generic[TypeDevice]):
         output: list = []
 
         for i in instances:
-            if issubclass(i, BaseModel):
+            if isinstance(i, type) and issubclass(i, BaseModel):
                 output.append(i)
             else:
                 raise TypeError("The given object is not a Pydantic Model!")
         return output
+
+    @staticmethod
+    def _initialize_index(models: list) -> dict[str, type[BaseModel]]:
+        """
+        Index the models by the `Literal` values of their `cmd` field, so
+        each message is validated by a single model.
+        """
+        index: dict[str, type[BaseModel]] = {}
+        for model in models:
+            field = model.model_fields.get('cmd')
+            values = typing.get_args(field.annotation) if field is not None \
+                and typing.get_origin(field.annotation) is Literal else ()
+            if not values:
+                raise TypeError(f"{model.__name__} needs a `cmd` field with \
+the Literal names of its commands")
+            for value in values:
+                if value in index:
+                    raise ValueError(f"Command `{value}` is validated by \
+{index[value].__name__} and {model.__name__}")
+                index[value] = model
+        return index
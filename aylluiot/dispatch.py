@@ -0,0 +1,656 @@
+"""
+Dispatching layer that decouples message reception from its execution.
+"""
+
+# General imports
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Optional
+
+
+class QueuePolicy(Enum):
+    """
+    Behaviour of the dispatcher when its ingress queue is full.
+    """
+    BLOCK = 'block'
+    DROP_OLDEST = 'drop_oldest'
+    REJECT = 'reject'
+
+
+@dataclass()
+class DispatcherStats:
+    """
+    Snapshot of the dispatcher counters to size its pool and queue.
+    """
+    depth: int
+    max_depth: int
+    workers: int
+    busy: int
+    submitted: int
+    completed: int
+    dropped: int
+    rejected: int
+    avg_wait: float
+    max_wait: float
+    limit: int
+
+
+@dataclass()
+class LimitDecision:
+    """
+    Change of an adaptive concurrency limit and the sample that caused it.
+    """
+    timestamp: float
+    previous: int
+    limit: int
+    name: str
+    latency: float
+    reason: str
+
+
+@dataclass()
+class LimitStats:
+    """
+    Snapshot of an adaptive concurrency limit.
+    """
+    limit: int
+    in_flight: int
+    samples: int
+    increases: int
+    decreases: int
+    error_rate: float
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit adjusted with an additive-increase,
+    multiplicative-decrease (AIMD) algorithm. Healthy samples taken while
+    the limit is in use raise it by about `increase` every `limit` samples.
+    Samples slower than `tolerance` times the baseline latency of their name,
+    or than `latency_target`, or an error rate over `max_error_rate`, cut it
+    by `backoff`.
+
+    Attributes
+    ----------
+    limit: int
+        Current concurrency limit.
+    min_limit: int
+        Lowest value the limit can take.
+    max_limit: int
+        Highest value the limit can take.
+    decisions: list[LimitDecision]
+        Most recent changes of the limit.
+    """
+
+    _min_limit: int
+    _max_limit: int
+
+    def __init__(self, initial: int = 4, min_limit: int = 1,
+                 max_limit: int = 64, increase: float = 1.0,
+                 backoff: float = 0.5, tolerance: float = 2.0,
+                 latency_target: Optional[float] = None,
+                 max_error_rate: float = 0.1, window: int = 50,
+                 history: int = 100) -> None:
+        """
+        Constructor method for AdaptiveLimit.
+
+        Parameters
+        ----------
+        initial: int, default = 4
+            Starting limit.
+        min_limit: int, default = 1
+            Lowest limit.
+        max_limit: int, default = 64
+            Highest limit.
+        increase: float, default = 1.0
+            Additive increase per `limit` healthy samples.
+        backoff: float, default = 0.5
+            Multiplicative decrease on overload.
+        tolerance: float, default = 2.0
+            Ratio over the baseline latency considered as overload.
+        latency_target: Optional[float], default = None
+            Absolute latency in seconds considered as overload.
+        max_error_rate: float, default = 0.1
+            Rate of failed samples considered as overload.
+        window: int, default = 50
+            Number of recent samples used for the error rate.
+        history: int, default = 100
+            Number of decisions kept.
+        """
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("Limits must hold 1 <= min <= initial <= max")
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._increase = increase
+        self._backoff = backoff
+        self._tolerance = tolerance
+        self._latency_target = latency_target
+        self._max_error_rate = max_error_rate
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._baselines: dict[str, float] = {}
+        self._outcomes: deque = deque(maxlen=window)
+        self._decisions: deque = deque(maxlen=history)
+        self._samples = 0
+        self._since_decrease = 0
+        self._increases = 0
+        self._decreases = 0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """
+        Getter method for limit attribute.
+        """
+        return int(self._limit)
+
+    @property
+    def min_limit(self) -> int:
+        """
+        Getter method for min_limit attribute.
+        """
+        return self._min_limit
+
+    @property
+    def max_limit(self) -> int:
+        """
+        Getter method for max_limit attribute.
+        """
+        return self._max_limit
+
+    @property
+    def decisions(self) -> list[LimitDecision]:
+        """
+        Getter method for the most recent changes of the limit.
+        """
+        with self._lock:
+            return list(self._decisions)
+
+    @property
+    def stats(self) -> LimitStats:
+        """
+        Getter method for a snapshot of the limit.
+
+        Returns
+        -------
+        LimitStats
+            Current values of the counters.
+        """
+        with self._lock:
+            return LimitStats(int(self._limit), self._in_flight,
+                              self._samples, self._increases,
+                              self._decreases, self._error_rate())
+
+    def acquire(self) -> bool:
+        """
+        Take a slot if the limit allows it.
+
+        Returns
+        -------
+        bool
+            True if a slot was taken, False otherwise.
+        """
+        with self._lock:
+            if self._in_flight >= int(self._limit):
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        """
+        Give back a slot.
+        """
+        with self._lock:
+            self._in_flight -= 1
+
+    def record(self, name: str, latency: float, failed: bool = False) \
+            -> None:
+        """
+        Feed a measured execution to the algorithm.
+
+        Parameters
+        ----------
+        name: str
+            What was executed, such as a command name. Latencies are only
+            compared with the ones of the same name.
+        latency: float
+            Duration of the execution in seconds.
+        failed: bool, default = False
+            Whether the execution ended with an error.
+        """
+        with self._lock:
+            self._samples += 1
+            self._since_decrease += 1
+            self._outcomes.append(failed)
+            baseline = self._baselines.get(name, latency)
+            # The baseline follows improvements right away and degradations
+            # slowly, so it tracks the latency without load.
+            self._baselines[name] = latency if latency < baseline \
+                else baseline * 0.99 + latency * 0.01
+            reason = self._overload(latency, baseline)
+            previous = int(self._limit)
+            if reason:
+                # One decrease per round of in flight samples, as the ones
+                # started before the decrease would count it twice.
+                if self._since_decrease < previous:
+                    return
+                self._limit = max(self._min_limit,
+                                  self._limit * self._backoff)
+                self._since_decrease = 0
+            elif self._in_flight * 2 >= previous:
+                self._limit = min(self._max_limit,
+                                  self._limit + self._increase / self._limit)
+                reason = 'healthy'
+            if int(self._limit) != previous:
+                if reason == 'healthy':
+                    self._increases += 1
+                else:
+                    self._decreases += 1
+                self._decisions.append(LimitDecision(
+                    time.time(), previous, int(self._limit), name, latency,
+                    reason))
+                logging.info(f"Concurrency limit changed from {previous} \
+to {int(self._limit)} ({reason})")
+
+    def _overload(self, latency: float, baseline: float) -> str:
+        """
+        Internal helper with the reason to consider a sample as overload,
+        empty if it is healthy. Lock must be held.
+        """
+        if self._error_rate() > self._max_error_rate:
+            return 'errors'
+        elif self._latency_target is not None and \
+                latency > self._latency_target:
+            return 'latency_target'
+        elif latency > baseline * self._tolerance:
+            return 'latency_gradient'
+        return ''
+
+    def _error_rate(self) -> float:
+        """
+        Internal helper with the rate of failed recent samples. Lock must be
+        held.
+        """
+        return sum(self._outcomes) / len(self._outcomes) \
+            if self._outcomes else 0.0
+
+
+class MessageDispatcher:
+    """
+    Bounded ingress queue drained by a pool of worker threads. Items sharing
+    the same key are executed one after another in arrival order while
+    different keys are executed in parallel. Waiting entries are served by
+    priority, which grows with the time they have been waiting so low
+    priority entries are not starved. With a `prepare` function `submit`
+    only appends each entry to an inbox, and the workers turn it into the
+    item given to the handler, with its priority, outside of the lock.
+
+    Attributes
+    ----------
+    handler: Callable[[str, Any], None]
+        Function called by the workers with the key and item of each entry.
+    workers: int
+        Number of worker threads draining the queue.
+    max_size: int
+        Maximum number of entries waiting to be executed.
+    policy: QueuePolicy
+        What to do with new entries when the queue is full.
+    on_reject: Optional[Callable[[str, Any], None]]
+        Called with the key and item of every entry rejected by the
+        `REJECT` policy.
+    on_drop: Optional[Callable[[str, Any], None]]
+        Called with the key and item of every entry discarded by the
+        `DROP_OLDEST` policy.
+    aging: float
+        Priority gained by an entry for each second it waits.
+    limiter: Optional[AdaptiveLimit]
+        Adaptive limit of the entries executed at once, up to `workers`.
+        Its samples are fed by the handler.
+    prepare: Optional[Callable[[str, Any], tuple[Any, float]]]
+        Turns the item of an entry into the one given to the handler, with
+        its priority, on the worker threads. Entries prepared as None are
+        skipped. Overrides the priority given to `submit`.
+    """
+
+    _handler: Callable[[str, Any], None]
+    _workers: int
+    _max_size: int
+    _policy: QueuePolicy
+    _on_reject: Optional[Callable[[str, Any], None]]
+    _on_drop: Optional[Callable[[str, Any], None]]
+    _aging: float
+    _limiter: Optional[AdaptiveLimit]
+    _prepare: Optional[Callable[[str, Any], tuple[Any, float]]]
+
+    def __init__(self, handler: Callable[[str, Any], None], workers: int = 4,
+                 max_size: int = 100,
+                 policy: QueuePolicy = QueuePolicy.BLOCK,
+                 on_reject: Optional[Callable[[str, Any], None]] = None,
+                 on_drop: Optional[Callable[[str, Any], None]] = None,
+                 aging: float = 1.0,
+                 limiter: Optional[AdaptiveLimit] = None,
+                 prepare: Optional[Callable[[str, Any],
+                                            tuple[Any, float]]] = None)\
+            -> None:
+        """
+        Constructor method for MessageDispatcher.
+
+        Parameters
+        ----------
+        handler: Callable[[str, Any], None]
+            Function to execute for every entry.
+        workers: int, default = 4
+            Number of worker threads.
+        max_size: int, default = 100
+            Capacity of the ingress queue.
+        policy: QueuePolicy, default = QueuePolicy.BLOCK
+            Overflow policy applied when the queue is full.
+        on_reject: Optional[Callable[[str, Any], None]], default = None
+            Callback for entries rejected by the policy.
+        on_drop: Optional[Callable[[str, Any], None]], default = None
+            Callback for entries discarded by the policy.
+        aging: float, default = 1.0
+            Priority gained per second of waiting. Zero for strict priority.
+        limiter: Optional[AdaptiveLimit], default = None
+            Adaptive concurrency limit. All workers are used when None.
+        prepare: Optional[Callable], default = None
+            Function preparing each entry on the workers, returning the item
+            for the handler, or None to skip it, and its priority.
+        """
+        if workers < 1 or max_size < 1:
+            raise ValueError("Both `workers` and `max_size` must be positive")
+        self._handler = handler
+        self._workers = workers
+        self._max_size = max_size
+        self._policy = QueuePolicy(policy)
+        self._on_reject = on_reject
+        self._on_drop = on_drop
+        self._aging = aging
+        self._limiter = limiter
+        self._prepare = prepare
+        self._queue: list = []
+        self._inbox: deque = deque()
+        self._sequence = itertools.count()
+        self._lanes: dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._threads: list[threading.Thread] = []
+        self._running = False
+        self._busy = 0
+        self._held = 0
+        self._preparing = 0
+        self._max_depth = 0
+        self._submitted = 0
+        self._completed = 0
+        self._dropped = 0
+        self._rejected = 0
+        self._started = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def policy(self) -> QueuePolicy:
+        """
+        Getter method for policy attribute.
+
+        Returns
+        -------
+        QueuePolicy
+            Overflow policy in use.
+        """
+        return self._policy
+
+    @property
+    def limiter(self) -> Optional[AdaptiveLimit]:
+        """
+        Getter method for limiter attribute.
+
+        Returns
+        -------
+        Optional[AdaptiveLimit]
+            Adaptive concurrency limit in use, if any.
+        """
+        return self._limiter
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of entries waiting to be executed, including the ones held
+        back to preserve the ordering of their key.
+
+        Returns
+        -------
+        int
+            Current depth of the queue.
+        """
+        with self._lock:
+            return self._depth()
+
+    @property
+    def stats(self) -> DispatcherStats:
+        """
+        Getter method for a snapshot of the dispatcher counters.
+
+        Returns
+        -------
+        DispatcherStats
+            Current values of the counters.
+        """
+        with self._lock:
+            return DispatcherStats(
+                depth=self._depth(), max_depth=self._max_depth,
+                workers=self._workers, busy=self._busy,
+                submitted=self._submitted, completed=self._completed,
+                dropped=self._dropped, rejected=self._rejected,
+                avg_wait=(self._total_wait / self._started
+                          if self._started else 0.0),
+                max_wait=self._max_wait,
+                limit=min(self._workers, self._limiter.limit)
+                if self._limiter is not None else self._workers)
+
+    def start(self) -> None:
+        """
+        Launch the worker threads.
+        """
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True,
+                             name=f"aylluiot-worker-{num}")
+            for num in range(self._workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        """
+        Stop the worker threads once the queue has been drained.
+
+        Parameters
+        ----------
+        wait: bool, default = True
+            Either to wait or not for the workers to finish.
+        """
+        with self._lock:
+            self._running = False
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def submit(self, key: str, item: Any, priority: float = 0) -> bool:
+        """
+        Add a new entry to the queue applying the overflow policy if needed.
+
+        Parameters
+        ----------
+        key: str
+            Ordering key of the entry.
+        item: Any
+            Value passed down to the handler.
+        priority: float, default = 0
+            Entries with higher priority are executed first. Ignored when
+            the dispatcher has a `prepare` function.
+
+        Returns
+        -------
+        bool
+            True if the entry was queued, False if it was rejected.
+        """
+        dropped = None
+        rejected = False
+        with self._lock:
+            if self._depth() >= self._max_size:
+                if self._policy == QueuePolicy.BLOCK:
+                    while self._running and \
+                            self._depth() >= self._max_size:
+                        self._not_full.wait()
+                elif self._policy == QueuePolicy.DROP_OLDEST and \
+                        (self._queue or self._inbox):
+                    dropped = self._pop_oldest()[2:4]
+                    self._dropped += 1
+                else:
+                    self._rejected += 1
+                    rejected = True
+            if not rejected:
+                # Aging raises every waiting entry at the same pace, so the
+                # ranking only depends on the arrival time and the priority.
+                now = time.monotonic()
+                if self._prepare is not None:
+                    self._inbox.append((next(self._sequence), key, item,
+                                        now))
+                else:
+                    heapq.heappush(self._queue, (
+                        self._aging * now - priority, next(self._sequence),
+                        key, item, now))
+                self._submitted += 1
+                self._max_depth = max(self._max_depth, self._depth())
+                self._not_empty.notify()
+        if dropped is not None:
+            logging.warning(f"Queue is full. Dropped entry: {dropped[0]}")
+            if self._on_drop is not None:
+                self._on_drop(*dropped)
+        if rejected and self._on_reject is not None:
+            self._on_reject(key, item)
+        return not rejected
+
+    def _depth(self) -> int:
+        """
+        Internal helper to count the waiting entries. Lock must be held.
+        """
+        return len(self._queue) + len(self._inbox) + self._held + \
+            self._preparing
+
+    def _pop_oldest(self) -> tuple:
+        """
+        Internal helper that removes the entry waiting for longer. Lock
+        must be held.
+        """
+        if not self._queue:
+            return (None,) + self._inbox.popleft()
+        index = min(range(len(self._queue)), key=lambda i: self._queue[i][1])
+        if self._inbox and self._inbox[0][0] < self._queue[index][1]:
+            return (None,) + self._inbox.popleft()
+        entry = self._queue.pop(index)
+        heapq.heapify(self._queue)
+        return entry
+
+    def _intake(self) -> None:
+        """
+        Internal helper that moves the entries of the inbox to the queue
+        once `prepare` has been run on them. Lock must be held, and it is
+        released while preparing each entry. Entries that are skipped or
+        fail to be prepared, which is logged, are counted as completed.
+        """
+        while self._inbox and self._prepare is not None:
+            sequence, key, item, queued_at = self._inbox.popleft()
+            self._preparing += 1
+            self._lock.release()
+            try:
+                item, priority = self._prepare(key, item)
+            except Exception:
+                logging.exception(f"Failed preparing entry: {key}")
+                item, priority = None, 0
+            finally:
+                self._lock.acquire()
+                self._preparing -= 1
+            if item is None:
+                self._completed += 1
+                self._not_full.notify()
+                continue
+            heapq.heappush(self._queue, (
+                self._aging * queued_at - priority, sequence, key, item,
+                queued_at))
+            self._not_empty.notify()
+
+    def _next(self) -> Optional[tuple]:
+        """
+        Internal helper that waits for the next entry whose key is not being
+        executed by another worker, and for a slot of the `limiter`.
+
+        Returns
+        -------
+        Optional[tuple]
+            The entry to be executed or None if the dispatcher stopped.
+        """
+        with self._lock:
+            while True:
+                self._intake()
+                while self._queue:
+                    if self._queue[0][2] in self._lanes:
+                        entry = heapq.heappop(self._queue)[2:]
+                        self._lanes[entry[0]].append(entry)
+                        self._held += 1
+                        continue
+                    if self._limiter is not None and \
+                            not self._limiter.acquire():
+                        break
+                    entry = heapq.heappop(self._queue)[2:]
+                    self._lanes[entry[0]] = deque()
+                    self._busy += 1
+                    return entry
+                if not self._running and not self._queue and \
+                        not self._inbox:
+                    return None
+                self._not_empty.wait()
+
+    def _work(self) -> None:
+        """
+        Internal loop run by each worker thread.
+        """
+        entry = self._next()
+        while entry is not None:
+            key, item, queued_at = entry
+            waited = time.monotonic() - queued_at
+            with self._lock:
+                self._started += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+                self._not_full.notify()
+            try:
+                self._handler(key, item)
+            except Exception:
+                logging.exception(f"Failed processing entry: {key}")
+            with self._lock:
+                self._completed += 1
+                lane = self._lanes[key]
+                if lane:
+                    entry = lane.popleft()
+                    self._held -= 1
+                    continue
+                del self._lanes[key]
+                self._busy -= 1
+                if self._limiter is not None:
+                    self._limiter.release()
+                    self._not_empty.notify_all()
+            entry = self._next()
@@ -0,0 +1,745 @@
+"""
+Execution strategies for the commands of executor devices.
+"""
+
+# General imports
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, \
+    TimeoutError as FuturesTimeout
+from dataclasses import dataclass
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Optional, cast
+# Module imports
+from aylluiot.binding import BoundArgs, invoke
+from aylluiot.utils.devices import CURRENT_DEADLINE
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore
+
+_WORKER_EXECUTORS: list = []
+EXPIRED = object()
+
+
+@dataclass(frozen=True)
+class SharedBuffer:
+    """
+    Reference to a binary buffer stored on shared memory. It is consumed,
+    and its memory released, by the process that unpacks it.
+    """
+    name: str
+    size: int
+
+    @classmethod
+    def pack(cls, data: Any) -> 'SharedBuffer':
+        """
+        Copy a bytes-like object onto a new shared memory block.
+
+        Parameters
+        ----------
+        data: Any
+            The bytes-like object to be shared.
+
+        Returns
+        -------
+        SharedBuffer
+            Reference to the new block.
+        """
+        view = memoryview(data).cast('B')
+        block = SharedMemory(create=True, size=max(view.nbytes, 1))
+        cast(memoryview, block.buf)[:view.nbytes] = view
+        block.close()
+        return cls(block.name, view.nbytes)
+
+    def unpack(self) -> bytes:
+        """
+        Read the content of the block and release its memory.
+
+        Returns
+        -------
+        bytes
+            Copy of the shared data.
+        """
+        block = SharedMemory(name=self.name)
+        try:
+            return bytes(cast(memoryview, block.buf)[:self.size])
+        finally:
+            block.close()
+            block.unlink()
+
+
+def share_buffers(value: Any, threshold: int) -> Any:
+    """
+    Replace bytes-like objects bigger than `threshold` with SharedBuffer
+    references, including the ones nested in lists, tuples, dicts and bound
+    arguments.
+
+    Parameters
+    ----------
+    value: Any
+        The value to be shipped to another process.
+    threshold: int
+        Minimum size in bytes to use shared memory.
+
+    Returns
+    -------
+    Any
+        The same structure with shared references.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return SharedBuffer.pack(value) \
+            if memoryview(value).nbytes >= threshold else value
+    elif isinstance(value, (list, tuple)):
+        return type(value)(share_buffers(v, threshold) for v in value)
+    elif isinstance(value, dict):
+        return {k: share_buffers(v, threshold) for k, v in value.items()}
+    elif isinstance(value, BoundArgs):
+        return BoundArgs(share_buffers(value.args, threshold),
+                         share_buffers(value.kwargs, threshold))
+    return value
+
+
+def collect_buffers(value: Any) -> Any:
+    """
+    Counterpart of `share_buffers` that turns back SharedBuffer references
+    into bytes.
+
+    Parameters
+    ----------
+    value: Any
+        The value received from another process.
+
+    Returns
+    -------
+    Any
+        The same structure with the shared data.
+    """
+    if isinstance(value, SharedBuffer):
+        return value.unpack()
+    elif isinstance(value, (list, tuple)):
+        return type(value)(collect_buffers(v) for v in value)
+    elif isinstance(value, dict):
+        return {k: collect_buffers(v) for k, v in value.items()}
+    elif isinstance(value, BoundArgs):
+        return BoundArgs(collect_buffers(value.args),
+                         collect_buffers(value.kwargs))
+    return value
+
+
+def _initialize_worker(executors: list, memory_limit: int) -> None:
+    """
+    Initializer of every worker process. It keeps its own copy of the
+    executors and applies the resource limits.
+    """
+    global _WORKER_EXECUTORS
+    _WORKER_EXECUTORS = executors
+    if memory_limit and resource is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def _run_in_worker(index: int, name: str, args: Any, threshold: int,
+                   deadline: Optional[float]) -> Any:
+    """
+    Execute a command of the worker copy of an executor.
+    """
+    func = getattr(_WORKER_EXECUTORS[index], name)
+    args = collect_buffers(args)
+    token = CURRENT_DEADLINE.set(deadline)
+    try:
+        params = invoke(func, args)
+    finally:
+        CURRENT_DEADLINE.reset(token)
+    return share_buffers(params, threshold)
+
+
+class ProcessExecution:
+    """
+    Pool of pre-started worker processes to execute CPU-bound commands outside
+    of the GIL. Every worker holds its own copy of the executors and large
+    binary buffers travel through shared memory instead of being pickled.
+    Workers stuck on an abandoned call are replaced and terminated.
+
+    Attributes
+    ----------
+    workers: int
+        Number of worker processes.
+    recycle_after: int
+        Number of calls after which the worker processes are replaced by new
+        ones. Zero disables recycling.
+    memory_limit: int
+        Maximum address space in bytes of each worker. Zero for no limit.
+    shm_threshold: int
+        Minimum size in bytes of a buffer to be sent trough shared memory.
+    """
+
+    _workers: int
+    _recycle_after: int
+    _memory_limit: int
+    _shm_threshold: int
+    _pool: Optional[ProcessPoolExecutor]
+
+    def __init__(self, workers: Optional[int] = None, recycle_after: int = 0,
+                 memory_limit: int = 0, shm_threshold: int = 1 << 16,
+                 start_method: Optional[str] = None) -> None:
+        """
+        Constructor method for ProcessExecution.
+
+        Parameters
+        ----------
+        workers: Optional[int], default = None
+            Number of worker processes. Defaults to the number of CPUs.
+        recycle_after: int, default = 0
+            Calls served before replacing the worker processes.
+        memory_limit: int, default = 0
+            Maximum address space in bytes of each worker.
+        shm_threshold: int, default = 65536
+            Minimum size in bytes to use shared memory.
+        start_method: Optional[str], default = None
+            Multiprocessing start method. Defaults to `forkserver` where
+            available and `spawn` otherwise, since forking a process with
+            running threads may copy locks held by them.
+        """
+        self._workers = workers or os.cpu_count() or 1
+        self._recycle_after = recycle_after
+        self._memory_limit = memory_limit
+        self._shm_threshold = shm_threshold
+        if start_method is None:
+            start_method = 'forkserver' if 'forkserver' in \
+                multiprocessing.get_all_start_methods() else 'spawn'
+        self._context = multiprocessing.get_context(start_method)
+        self._executors: list = []
+        self._pool = None
+        self._calls = 0
+        self._recycled = 0
+        self._inflight: dict[Future, tuple[ProcessPoolExecutor, Future]] = {}
+        self._stuck: dict[ProcessPoolExecutor, set[Future]] = {}
+        self._replacing: set[ProcessPoolExecutor] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self) -> int:
+        """
+        Getter method for workers attribute.
+
+        Returns
+        -------
+        int
+            Number of worker processes.
+        """
+        return self._workers
+
+    @property
+    def recycled(self) -> int:
+        """
+        Number of times the worker processes have been replaced.
+
+        Returns
+        -------
+        int
+            Recycling counter.
+        """
+        return self._recycled
+
+    @property
+    def stuck(self) -> int:
+        """
+        Number of abandoned calls whose worker has not been terminated yet.
+
+        Returns
+        -------
+        int
+            Calls still holding a retired worker.
+        """
+        with self._lock:
+            return sum(len(calls) for calls in self._stuck.values())
+
+    def start(self, executors: list) -> None:
+        """
+        Start the worker processes with a copy of the given executors. It
+        does nothing if they are already running.
+
+        Parameters
+        ----------
+        executors: list
+            Executor instances in the same order used by `submit`.
+        """
+        with self._lock:
+            if self._pool is not None:
+                return
+            self._executors = executors
+        fresh = self._new_pool(executors)
+        with self._lock:
+            if self._pool is None:
+                self._pool = fresh
+                return
+        fresh.shutdown(wait=False)
+
+    def prepare(self, executors: list) -> Optional[ProcessPoolExecutor]:
+        """
+        Start worker processes with a copy of the given executors, to be
+        swapped in later by `restart`. The current workers keep serving in
+        the meantime. Nothing is started if the pool is not running.
+
+        Parameters
+        ----------
+        executors: list
+            Executor instances in the same order used by `submit`.
+
+        Returns
+        -------
+        Optional[ProcessPoolExecutor]
+            The prepared workers, if the pool is running.
+        """
+        with self._lock:
+            if self._pool is None:
+                return None
+        return self._new_pool(executors)
+
+    def restart(self, executors: list,
+                prepared: Optional[ProcessPoolExecutor] = None) -> None:
+        """
+        Replace the executors of the worker processes, starting new ones if
+        they are running. Calls already scheduled finish on the old workers.
+
+        Parameters
+        ----------
+        executors: list
+            Executor instances in the same order used by `submit`.
+        prepared: Optional[ProcessPoolExecutor], default = None
+            Workers returned by `prepare` for the same executors. They are
+            started here if not given.
+        """
+        with self._lock:
+            self._executors = executors
+            running = self._pool is not None
+        if not running:
+            if prepared is not None:
+                prepared.shutdown(wait=False)
+            return
+        fresh = prepared or self._new_pool(executors)
+        with self._lock:
+            retired = self._pool
+            if retired is not None:
+                self._pool, self._calls = fresh, 0
+        (fresh if retired is None else retired).shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker processes.
+
+        Parameters
+        ----------
+        wait: bool, default = True
+            Either to wait or not for the pending calls.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def submit(self, index: int, name: str, args: Any,
+               deadline: Optional[float] = None) -> Future:
+        """
+        Schedule a command on the worker processes.
+
+        Parameters
+        ----------
+        index: int
+            Position of the executor in the list given to `start`.
+        name: str
+            Method name of the command.
+        args: Any
+            Arguments for the command. Omitted when None.
+        deadline: Optional[float], default = None
+            Unix time of the deadline of the message being executed.
+
+        Returns
+        -------
+        Future
+            Future with the result of the command.
+        """
+        with self._lock:
+            if self._pool is None:
+                raise RuntimeError("The process pool has not been started")
+            pool = self._pool
+            self._calls += 1
+            recycle = bool(self._recycle_after) and \
+                self._calls >= self._recycle_after
+        inner = pool.submit(_run_in_worker, index, name,
+                            share_buffers(args, self._shm_threshold),
+                            self._shm_threshold, deadline)
+        outer: Future = Future()
+        with self._lock:
+            self._inflight[outer] = (pool, inner)
+        inner.add_done_callback(lambda f: self._transfer(f, outer))
+        if recycle and self._replace(pool):
+            pool.shutdown(wait=False)
+        return outer
+
+    def abandon(self, future: Future) -> bool:
+        """
+        Give up on a call that exceeded its budget. Calls that did not reach
+        a worker yet are cancelled. Otherwise new workers replace the current
+        ones, so the pool keeps its capacity, and the retired workers are
+        terminated once their other calls are finished.
+
+        Parameters
+        ----------
+        future: Future
+            Future returned by `submit`.
+
+        Returns
+        -------
+        bool
+            True if the call was cancelled, False if it was abandoned while
+            running.
+        """
+        with self._lock:
+            entry = self._inflight.get(future)
+        if entry is None:
+            return future.cancel()
+        pool, inner = entry
+        if inner.cancel():
+            return True
+        with self._lock:
+            if future.done() or future.running():
+                return False
+            future.set_running_or_notify_cancel()
+            self._stuck.setdefault(pool, set()).add(inner)
+        logging.warning("Abandoned a call running on worker processes, \
+replacing them")
+        self._replace(pool)
+        self._reap(pool)
+        return False
+
+    def call(self, index: int, name: str, args: Any) -> Any:
+        """
+        Execute a command on the worker processes waiting for its result.
+
+        Parameters
+        ----------
+        index: int
+            Position of the executor in the list given to `start`.
+        name: str
+            Method name of the command.
+        args: Any
+            Arguments for the command. Omitted when None.
+
+        Returns
+        -------
+        Any
+            Result of the command.
+        """
+        return self.submit(index, name, args).result()
+
+    def _new_pool(self, executors: list) -> ProcessPoolExecutor:
+        """
+        Internal helper that starts a new set of worker processes and waits
+        for them to boot, so it must not be called holding the lock. They
+        share the resource tracker of this process to keep track of the
+        shared memory blocks.
+        """
+        resource_tracker.ensure_running()
+        pool = ProcessPoolExecutor(
+            max_workers=self._workers, mp_context=self._context,
+            initializer=_initialize_worker,
+            initargs=(executors, self._memory_limit))
+        for f in [pool.submit(os.getpid) for _ in range(self._workers)]:
+            f.result()
+        logging.info(f"Started {self._workers} worker processes")
+        return pool
+
+    def _replace(self, pool: ProcessPoolExecutor) -> bool:
+        """
+        Internal helper that swaps new workers in for the given pool, unless
+        it was already replaced. Calls keep reaching the current workers
+        while the new ones boot.
+
+        Returns
+        -------
+        bool
+            True if the given pool was retired by this call.
+        """
+        with self._lock:
+            if pool is not self._pool or pool in self._replacing:
+                return False
+            self._replacing.add(pool)
+            executors = self._executors
+        try:
+            fresh = self._new_pool(executors)
+        except BaseException:
+            with self._lock:
+                self._replacing.discard(pool)
+            raise
+        with self._lock:
+            self._replacing.discard(pool)
+            replaced = pool is self._pool
+            if replaced:
+                self._pool, self._calls = fresh, 0
+                self._recycled += 1
+        if not replaced:
+            fresh.shutdown(wait=False)
+        return replaced
+
+    def _reap(self, pool: ProcessPoolExecutor) -> None:
+        """
+        Internal helper that terminates the workers of a retired pool once
+        the only calls left on it are abandoned ones.
+        """
+        with self._lock:
+            stuck = self._stuck.get(pool)
+            if not stuck or pool is self._pool or any(
+                    p is pool and i not in stuck
+                    for p, i in self._inflight.values()):
+                return
+            del self._stuck[pool]
+        # There is no public way to stop the workers of a running call.
+        for process in list(getattr(pool, '_processes', {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        logging.info(f"Terminated workers stuck on {len(stuck)} calls")
+
+    def _transfer(self, inner: Future, outer: Future) -> None:
+        """
+        Internal helper that moves the result of a worker call onto the
+        future given to the caller.
+        """
+        failed = inner.cancelled() or inner.exception() is not None
+        result = None if failed else collect_buffers(inner.result())
+        with self._lock:
+            pool = self._inflight.pop(outer)[0]
+            if inner.cancelled():
+                outer.cancel()
+            elif outer.running() or outer.set_running_or_notify_cancel():
+                if failed:
+                    outer.set_exception(inner.exception())
+                else:
+                    outer.set_result(result)
+            stuck = self._stuck.get(pool)
+            if stuck is not None:
+                stuck.discard(inner)
+                if not stuck:
+                    del self._stuck[pool]
+        self._reap(pool)
+
+
+@dataclass()
+class WatchdogStats:
+    """
+    Snapshot of the commands that exceeded their execution budget.
+    """
+    timeouts: int
+    cancelled: int
+    abandoned: int
+    abandoned_running: int
+    refused: int
+
+
+class Watchdog:
+    """
+    Enforces the execution budget of commands. Calls that exceed it are
+    cancelled when they have not started yet or abandoned, and counted,
+    when they are already running on a thread or worker process.
+
+    Calls with a budget run on watchdog threads that are started on demand
+    and reused while idle, so abandoned calls never hold back new ones. Once
+    `max_abandoned` abandoned calls are still running on them, new calls are
+    refused until some finish.
+
+    Attributes
+    ----------
+    max_abandoned: int
+        Number of abandoned calls that can keep running on the watchdog
+        threads.
+    """
+
+    _max_abandoned: int
+    _idle_for: float
+
+    def __init__(self, max_abandoned: int = 32,
+                 idle_for: float = 60.0) -> None:
+        """
+        Constructor method for Watchdog.
+
+        Parameters
+        ----------
+        max_abandoned: int, default = 32
+            Number of abandoned calls that can keep running on the watchdog
+            threads before new calls are refused.
+        idle_for: float, default = 60.0
+            Seconds an idle watchdog thread waits for a call before exiting.
+        """
+        self._max_abandoned = max_abandoned
+        self._idle_for = idle_for
+        self._jobs: queue.SimpleQueue = queue.SimpleQueue()
+        self._owned: set[Future] = set()
+        self._lock = threading.Lock()
+        self._idle = 0
+        self._stuck = 0
+        self._timeouts = 0
+        self._cancelled = 0
+        self._abandoned = 0
+        self._running = 0
+        self._refused = 0
+
+    @property
+    def max_abandoned(self) -> int:
+        """
+        Getter method for max_abandoned attribute.
+        """
+        return self._max_abandoned
+
+    @property
+    def stats(self) -> WatchdogStats:
+        """
+        Getter method for a snapshot of the watchdog counters.
+
+        Returns
+        -------
+        WatchdogStats
+            Current values of the counters.
+        """
+        with self._lock:
+            return WatchdogStats(self._timeouts, self._cancelled,
+                                 self._abandoned, self._running,
+                                 self._refused)
+
+    def submit(self, func: Callable, *args) -> Optional[Future]:
+        """
+        Run a call on a watchdog thread so its caller can stop waiting for
+        it.
+
+        Parameters
+        ----------
+        func: Callable
+            The function to be called.
+        *args
+            Arguments for the function.
+
+        Returns
+        -------
+        Optional[Future]
+            Future with the result of the call, or None if it was refused
+            because too many abandoned calls are still running.
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._stuck >= self._max_abandoned:
+                self._refused += 1
+                return None
+            self._owned.add(future)
+            self._jobs.put((future, func, args))
+            if self._idle > 0:
+                self._idle -= 1
+                return future
+        threading.Thread(target=self._work, name='aylluiot-watchdog',
+                         daemon=True).start()
+        return future
+
+    def wait(self, future: Future, timeout: Optional[float],
+             cancel: Optional[Callable[[Future], bool]] = None) -> Any:
+        """
+        Wait for the result of a call within its budget. Exceptions raised
+        by the call, `TimeoutError` included, are raised as they are.
+
+        Parameters
+        ----------
+        future: Future
+            Future of the call.
+        timeout: Optional[float]
+            Budget in seconds. None to wait indefinitely.
+        cancel: Optional[Callable[[Future], bool]], default = None
+            Stops the call, telling whether it was cancelled before it
+            started. `Future.cancel` when None.
+
+        Returns
+        -------
+        Any
+            Result of the call, or EXPIRED if it exceeded its budget.
+        """
+        try:
+            return future.result(timeout)
+        except FuturesTimeout:
+            if future.done():
+                raise
+            self.expire(future, cancel)
+            return EXPIRED
+
+    def expire(self, future: Optional[Future] = None,
+               cancel: Optional[Callable[[Future], bool]] = None) -> None:
+        """
+        Record a call that exceeded its budget, cancelling it if possible.
+
+        Parameters
+        ----------
+        future: Optional[Future], default = None
+            Future of the call. None when it was already cancelled.
+        cancel: Optional[Callable[[Future], bool]], default = None
+            Stops the call, telling whether it was cancelled before it
+            started. `Future.cancel` when None.
+        """
+        cancelled = future is None or (cancel or Future.cancel)(future)
+        with self._lock:
+            self._timeouts += 1
+            if cancelled:
+                self._cancelled += 1
+                return
+            self._abandoned += 1
+            self._running += 1
+            owned = future in self._owned
+            if owned:
+                self._stuck += 1
+        cast(Future, future).add_done_callback(
+            lambda _: self._release(owned))
+
+    def shutdown(self) -> None:
+        """
+        Stop the idle watchdog threads without waiting for abandoned calls.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, 0
+        for _ in range(idle):
+            self._jobs.put(None)
+
+    def _work(self) -> None:
+        """
+        Internal loop of a watchdog thread. It runs calls until it has been
+        idle for `idle_for` seconds or the watchdog is shut down.
+        """
+        while True:
+            try:
+                job = self._jobs.get(timeout=self._idle_for)
+            except queue.Empty:
+                with self._lock:
+                    if self._jobs.empty() and self._idle > 0:
+                        self._idle -= 1
+                        return
+                continue
+            if job is None:
+                return
+            future, func, args = job
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = func(*args)
+                except BaseException as err:
+                    future.set_exception(err)
+                else:
+                    future.set_result(result)
+            with self._lock:
+                self._owned.discard(future)
+                self._idle += 1
+
+    def _release(self, owned: bool) -> None:
+        """
+        Internal callback for abandoned calls that eventually finished.
+        """
+        with self._lock:
+            self._running -= 1
+            if owned:
+                self._stuck -= 1
@@ -0,0 +1,148 @@
+"""
+Deferred construction of executors whose initialization is expensive.
+"""
+
+# General imports
+import logging
+import threading
+import time
+from typing import Any, Optional
+
+
+class LazyExecutor:
+    """
+    Placeholder of an executor that is built on its first use. Its commands
+    are known from its class, so they can be registered up front, and any
+    other attribute is looked up on the built instance. Public attributes
+    set on the placeholder are set on the instance too. Pickling it only
+    keeps how to build it, so every worker process builds its own.
+
+    Attributes
+    ----------
+    executor_class: type
+        Class of the executor.
+    warm_up: bool
+        Build it during the warm-up of its device instead of on its first
+        call.
+    built: bool
+        Whether the instance was already built.
+    init_time: Optional[float]
+        Seconds the construction of the instance took, if built.
+    """
+
+    _executor_class: type
+    _warm_up: bool
+
+    def __init__(self, executor_class: type, args: tuple = (),
+                 kwargs: Optional[dict] = None,
+                 warm_up: bool = False) -> None:
+        """
+        Constructor method for LazyExecutor.
+
+        Parameters
+        ----------
+        executor_class: type
+            Class of the executor.
+        args: tuple, default = ()
+            Positional arguments for the class.
+        kwargs: Optional[dict], default = None
+            Keyword arguments for the class.
+        warm_up: bool, default = False
+            Build it during the warm-up of its device.
+        """
+        if not isinstance(executor_class, type):
+            raise TypeError('Lazy executors must be given their class.')
+        self._executor_class = executor_class
+        self._args = args
+        self._kwargs = kwargs or {}
+        self._warm_up = warm_up
+        self._attributes: dict[str, Any] = {}
+        self._setup()
+
+    def _setup(self) -> None:
+        """
+        Internal helper that initializes the runtime state of the
+        placeholder.
+        """
+        self._instance: Any = None
+        self._init_time: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {k: self.__dict__[k] for k in [
+            '_executor_class', '_args', '_kwargs', '_warm_up',
+            '_attributes']}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._setup()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.build(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+            return
+        self._attributes[name] = value
+        if self._instance is not None:
+            setattr(self._instance, name, value)
+
+    def __repr__(self) -> str:
+        return f"LazyExecutor({self._executor_class.__name__})"
+
+    @property
+    def executor_class(self) -> type:
+        """
+        Getter method for executor_class attribute.
+        """
+        return self._executor_class
+
+    @property
+    def warm_up(self) -> bool:
+        """
+        Getter method for warm_up attribute.
+        """
+        return self._warm_up
+
+    @property
+    def built(self) -> bool:
+        """
+        Getter method for built attribute.
+        """
+        return self._instance is not None
+
+    @property
+    def init_time(self) -> Optional[float]:
+        """
+        Getter method for init_time attribute.
+        """
+        return self._init_time
+
+    def build(self) -> Any:
+        """
+        Build the instance, or get it if it was already built. Concurrent
+        callers wait for a single construction.
+
+        Returns
+        -------
+        Any
+            The executor instance.
+        """
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is None:
+                name = self._executor_class.__name__
+                started = time.perf_counter()
+                instance = self._executor_class(*self._args, **self._kwargs)
+                for attr, value in self._attributes.items():
+                    setattr(instance, attr, value)
+                self._init_time = time.perf_counter() - started
+                self._instance = instance
+                logging.info(f"Executor {name} built in \
+{self._init_time:.3f} seconds")
+                print(f"Executor Built: {name} ({self._init_time:.3f}s)")
+        return self._instance
@@ -0,0 +1,383 @@
+"""
+Isolation and protection mechanisms for the commands of executor devices.
+"""
+
+# General imports
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Optional
+
+
+@dataclass()
+class BulkheadStats:
+    """
+    Snapshot of the occupancy of a bulkhead.
+    """
+    name: str
+    limit: int
+    active: int
+    waiting: int
+    rejected: int
+
+
+class Bulkhead:
+    """
+    Concurrency limit shared by a set of calls, so an expensive family of
+    commands cannot take every worker available.
+
+    Attributes
+    ----------
+    name: str
+        Identifier of the bulkhead.
+    limit: int
+        Maximum number of concurrent calls.
+    """
+
+    _name: str
+    _limit: int
+
+    def __init__(self, name: str, limit: int) -> None:
+        """
+        Constructor method for Bulkhead.
+
+        Parameters
+        ----------
+        name: str
+            Identifier of the bulkhead.
+        limit: int
+            Maximum number of concurrent calls.
+        """
+        if limit < 1:
+            raise ValueError("The limit of a bulkhead must be positive")
+        self._name = name
+        self._limit = limit
+        self._active = 0
+        self._waiting = 0
+        self._rejected = 0
+        self._cond = threading.Condition()
+
+    @property
+    def name(self) -> str:
+        """
+        Getter method for name attribute.
+        """
+        return self._name
+
+    @property
+    def limit(self) -> int:
+        """
+        Getter method for limit attribute.
+        """
+        return self._limit
+
+    @limit.setter
+    def limit(self, new_limit: int) -> None:
+        """
+        Setter method for limit attribute. Calls already running are not
+        affected when the limit is lowered.
+
+        Parameters
+        ----------
+        new_limit: int
+            New maximum number of concurrent calls.
+        """
+        if new_limit < 1:
+            raise ValueError("The limit of a bulkhead must be positive")
+        with self._cond:
+            self._limit = new_limit
+            self._cond.notify_all()
+
+    @property
+    def stats(self) -> BulkheadStats:
+        """
+        Getter method for a snapshot of the bulkhead occupancy.
+
+        Returns
+        -------
+        BulkheadStats
+            Current values of the counters.
+        """
+        with self._cond:
+            return BulkheadStats(self._name, self._limit, self._active,
+                                 self._waiting, self._rejected)
+
+    def acquire(self, timeout: Optional[float] = 0) -> bool:
+        """
+        Take a slot of the bulkhead.
+
+        Parameters
+        ----------
+        timeout: Optional[float], default = 0
+            Seconds to wait for a free slot. Zero to not wait at all and
+            None to wait indefinitely.
+
+        Returns
+        -------
+        bool
+            True if a slot was taken, False otherwise.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while self._active >= self._limit:
+                    remaining = None if deadline is None \
+                        else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._rejected += 1
+                        return False
+                    self._cond.wait(remaining)
+                self._active += 1
+                return True
+            finally:
+                self._waiting -= 1
+
+    def release(self) -> None:
+        """
+        Give back a slot of the bulkhead.
+        """
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+
+class BreakerState(Enum):
+    """
+    States of a circuit breaker.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+@dataclass()
+class BreakerStats:
+    """
+    Snapshot of the state of a circuit breaker.
+    """
+    name: str
+    state: BreakerState
+    calls: int
+    failure_rate: float
+    short_circuited: int
+    transitions: int
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing command for a while, answering right away
+    instead of paying for its failure latency. After `open_for` seconds a
+    few probe calls decide whether to close it again.
+
+    Attributes
+    ----------
+    name: str
+        Identifier of the breaker.
+    failure_rate: float
+        Rate of failed calls over the window that opens the breaker.
+    slow_call: Optional[float]
+        Calls lasting at least these seconds count as failures.
+    window: int
+        Number of most recent calls used to compute the failure rate.
+    min_calls: int
+        Minimum number of calls in the window before opening the breaker.
+    open_for: float
+        Seconds to wait while open before allowing probe calls.
+    probes: int
+        Number of successful probe calls needed to close the breaker.
+    """
+
+    _name: str
+    _state: BreakerState
+
+    def __init__(self, name: str, failure_rate: float = 0.5,
+                 slow_call: Optional[float] = None, window: int = 20,
+                 min_calls: int = 5, open_for: float = 30.0,
+                 probes: int = 1) -> None:
+        """
+        Constructor method for CircuitBreaker.
+
+        Parameters
+        ----------
+        name: str
+            Identifier of the breaker.
+        failure_rate: float, default = 0.5
+            Rate of failed calls that opens the breaker.
+        slow_call: Optional[float], default = None
+            Latency in seconds that counts as a failure. None to ignore it.
+        window: int, default = 20
+            Number of most recent calls taken into account.
+        min_calls: int, default = 5
+            Minimum number of calls before opening the breaker.
+        open_for: float, default = 30.0
+            Seconds to stay open before probing again.
+        probes: int, default = 1
+            Successful probes needed to close the breaker.
+        """
+        self._name = name
+        self._failure_rate = failure_rate
+        self._slow_call = slow_call
+        self._min_calls = min_calls
+        self._open_for = open_for
+        self._probes = probes
+        self._state = BreakerState.CLOSED
+        self._results: deque = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = 0
+        self._succeeded = 0
+        self._short_circuited = 0
+        self._transitions = 0
+        self._listeners: list[Callable] = []
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        """
+        Getter method for name attribute.
+        """
+        return self._name
+
+    @property
+    def state(self) -> BreakerState:
+        """
+        Getter method for state attribute.
+        """
+        return self._state
+
+    @property
+    def stats(self) -> BreakerStats:
+        """
+        Getter method for a snapshot of the breaker state.
+
+        Returns
+        -------
+        BreakerStats
+            Current values of the counters.
+        """
+        with self._lock:
+            return BreakerStats(self._name, self._state, len(self._results),
+                                self._rate(), self._short_circuited,
+                                self._transitions)
+
+    def add_listener(self, listener: Callable[[str, BreakerState,
+                                               BreakerState], None]) -> None:
+        """
+        Register a function to be called on every change of state with the
+        breaker name, the previous state and the new one.
+
+        Parameters
+        ----------
+        listener: Callable[[str, BreakerState, BreakerState], None]
+            Function to be called.
+        """
+        self._listeners.append(listener)
+
+    def allow(self) -> bool:
+        """
+        Check whether a call can go through. Every allowed call must be
+        followed by a `record` of its result or by a `release`.
+
+        Returns
+        -------
+        bool
+            True if the call can be executed, False if it must be answered
+            right away.
+        """
+        with self._lock:
+            change = None
+            if self._state == BreakerState.OPEN and \
+                    time.monotonic() - self._opened_at >= self._open_for:
+                change = self._switch(BreakerState.HALF_OPEN)
+            if self._state == BreakerState.CLOSED:
+                allowed = True
+            elif self._state == BreakerState.HALF_OPEN and \
+                    self._probing < self._probes:
+                self._probing += 1
+                allowed = True
+            else:
+                self._short_circuited += 1
+                allowed = False
+        self._notify(change)
+        return allowed
+
+    def record(self, success: bool, latency: float = 0.0) -> None:
+        """
+        Record the result of an allowed call.
+
+        Parameters
+        ----------
+        success: bool
+            Whether the call finished without errors.
+        latency: float, default = 0.0
+            Duration of the call in seconds.
+        """
+        failed = not success or (self._slow_call is not None and
+                                 latency >= self._slow_call)
+        with self._lock:
+            change = None
+            if self._state == BreakerState.HALF_OPEN:
+                self._probing -= 1
+                if failed:
+                    change = self._switch(BreakerState.OPEN)
+                else:
+                    self._succeeded += 1
+                    if self._succeeded >= self._probes:
+                        change = self._switch(BreakerState.CLOSED)
+            elif self._state == BreakerState.CLOSED:
+                self._results.append(failed)
+                if len(self._results) >= self._min_calls and \
+                        self._rate() >= self._failure_rate:
+                    change = self._switch(BreakerState.OPEN)
+        self._notify(change)
+
+    def release(self) -> None:
+        """
+        Give back the probe slot of an allowed call without recording a
+        result, for calls that ended for reasons that do not tell anything
+        about the health of the command, like their deadline passing.
+        """
+        with self._lock:
+            if self._state == BreakerState.HALF_OPEN and self._probing > 0:
+                self._probing -= 1
+
+    def _rate(self) -> float:
+        """
+        Internal helper with the failure rate of the window. Lock must be
+        held.
+        """
+        return sum(self._results) / len(self._results) \
+            if self._results else 0.0
+
+    def _switch(self, new_state: BreakerState) -> tuple:
+        """
+        Internal helper that changes the state. Lock must be held.
+
+        Returns
+        -------
+        tuple
+            Previous and new state, to notify the listeners.
+        """
+        previous, self._state = self._state, new_state
+        self._transitions += 1
+        self._probing = 0
+        self._succeeded = 0
+        if new_state == BreakerState.OPEN:
+            self._opened_at = time.monotonic()
+        elif new_state == BreakerState.CLOSED:
+            self._results.clear()
+        return previous, new_state
+
+    def _notify(self, change: Optional[tuple]) -> None:
+        """
+        Internal helper that reports a change of state.
+        """
+        if change is None:
+            return
+        logging.warning(f"Circuit breaker `{self._name}` changed from \
+{change[0].value} to {change[1].value}")
+        for listener in self._listeners:
+            listener(self._name, *change)
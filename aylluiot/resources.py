@@ -0,0 +1,391 @@
+"""
+Pools of backend resources, such as sessions or connections, shared by the
+executors of a device.
+"""
+
+# General imports
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, ContextManager, Iterator, Optional
+
+
+@dataclass()
+class PoolStats:
+    """
+    Snapshot of the occupancy of a resource pool.
+    """
+    name: str
+    size: int
+    idle: int
+    in_use: int
+    waiting: int
+    created: int
+    discarded: int
+
+
+class ResourcePool:
+    """
+    Bounded pool of reusable resources created on demand by a factory.
+    Idle resources are health checked before being handed out and broken
+    ones are discarded. Pickling a pool only keeps its settings, so every
+    worker process builds its own resources.
+
+    Attributes
+    ----------
+    name: str
+        Identifier of the pool.
+    size: int
+        Maximum number of resources, idle or in use.
+    closed: bool
+        Whether the pool was closed.
+    """
+
+    _name: str
+    _size: int
+
+    def __init__(self, name: str, factory: Callable[[], Any], size: int = 4,
+                 check: Optional[Callable[[Any], bool]] = None,
+                 close: Optional[Callable[[Any], None]] = None) -> None:
+        """
+        Constructor method for ResourcePool.
+
+        Parameters
+        ----------
+        name: str
+            Identifier of the pool.
+        factory: Callable[[], Any]
+            Creates a new resource.
+        size: int, default = 4
+            Maximum number of resources.
+        check: Optional[Callable[[Any], bool]], default = None
+            Tells whether a resource is still healthy. None to trust them.
+        close: Optional[Callable[[Any], None]], default = None
+            Releases a resource. By default its `close` method, if any.
+        """
+        if size < 1:
+            raise ValueError("The size of a pool must be positive")
+        self._name = name
+        self._factory = factory
+        self._size = size
+        self._check = check
+        self._close = close
+        self._setup()
+
+    def _setup(self) -> None:
+        """
+        Internal helper that initializes the runtime state of the pool.
+        """
+        self._idle: list = []
+        self._in_use = 0
+        self._waiting = 0
+        self._created = 0
+        self._discarded = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def __getstate__(self) -> dict:
+        return {k: v for k, v in self.__dict__.items()
+                if k in ['_name', '_factory', '_size', '_check', '_close']}
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._setup()
+
+    @property
+    def name(self) -> str:
+        """
+        Getter method for name attribute.
+        """
+        return self._name
+
+    @property
+    def size(self) -> int:
+        """
+        Getter method for size attribute.
+        """
+        return self._size
+
+    @property
+    def closed(self) -> bool:
+        """
+        Getter method for closed attribute.
+        """
+        return self._closed
+
+    @property
+    def stats(self) -> PoolStats:
+        """
+        Getter method for a snapshot of the pool occupancy.
+
+        Returns
+        -------
+        PoolStats
+            Current values of the counters.
+        """
+        with self._cond:
+            return PoolStats(self._name, self._size, len(self._idle),
+                             self._in_use, self._waiting, self._created,
+                             self._discarded)
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """
+        Take a resource, reusing a healthy idle one or creating a new one
+        if the pool is not full.
+
+        Parameters
+        ----------
+        timeout: Optional[float], default = None
+            Seconds to wait for a free resource. None to wait indefinitely.
+
+        Returns
+        -------
+        Any
+            The resource, which must be given back with `release`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    if self._closed:
+                        raise RuntimeError(f"Pool `{self._name}` is closed")
+                    if self._idle:
+                        resource = self._idle.pop()
+                        self._in_use += 1
+                        break
+                    if self._in_use < self._size:
+                        self._in_use += 1
+                        resource = None
+                        break
+                    remaining = None if deadline is None \
+                        else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No resource of pool \
+`{self._name}` available after {timeout} seconds")
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+        try:
+            if resource is not None and not self._healthy(resource):
+                self._dispose(resource)
+                resource = None
+            if resource is None:
+                resource = self._factory()
+                with self._cond:
+                    self._created += 1
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return resource
+
+    def release(self, resource: Any, broken: bool = False) -> None:
+        """
+        Give back a resource taken with `acquire`.
+
+        Parameters
+        ----------
+        resource: Any
+            The resource.
+        broken: bool, default = False
+            Discard the resource instead of reusing it.
+        """
+        with self._cond:
+            self._in_use -= 1
+            keep = not broken and not self._closed
+            if keep:
+                self._idle.append(resource)
+            self._cond.notify()
+        if not keep:
+            self._dispose(resource)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Context manager that takes a resource and gives it back on exit.
+        The resource is discarded if the block raises.
+
+        Parameters
+        ----------
+        timeout: Optional[float], default = None
+            Seconds to wait for a free resource.
+        """
+        resource = self.acquire(timeout)
+        try:
+            yield resource
+        except BaseException:
+            self.release(resource, broken=True)
+            raise
+        self.release(resource)
+
+    def check_health(self) -> int:
+        """
+        Check every idle resource, discarding the broken ones.
+
+        Returns
+        -------
+        int
+            Number of resources discarded.
+        """
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._in_use += len(idle)
+        broken = 0
+        for resource in idle:
+            healthy = self._healthy(resource)
+            broken += not healthy
+            self.release(resource, broken=not healthy)
+        return broken
+
+    def close(self) -> None:
+        """
+        Close the pool and its idle resources. Resources in use are closed
+        when they are given back.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for resource in idle:
+            self._dispose(resource)
+
+    def _healthy(self, resource: Any) -> bool:
+        """
+        Internal helper that runs the health check on a resource.
+        """
+        if self._check is None:
+            return True
+        try:
+            return bool(self._check(resource))
+        except Exception:
+            return False
+
+    def _dispose(self, resource: Any) -> None:
+        """
+        Internal helper that closes a resource, logging any error.
+        """
+        with self._cond:
+            self._discarded += 1
+        try:
+            if self._close is not None:
+                self._close(resource)
+            elif callable(getattr(resource, 'close', None)):
+                resource.close()
+        except Exception:
+            logging.warning(f"Failed closing a resource of pool \
+`{self._name}`", exc_info=True)
+
+
+class ResourceRegistry:
+    """
+    Named resource pools of a device. Executors declaring a pool with the
+    same name share it.
+
+    Attributes
+    ----------
+    names: list[str]
+        Names of the registered pools.
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor method for ResourceRegistry.
+        """
+        self._pools: dict[str, ResourcePool] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        return {'_pools': self._pools}
+
+    def __setstate__(self, state: dict) -> None:
+        self._pools = state['_pools']
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._pools
+
+    @property
+    def names(self) -> list[str]:
+        """
+        Getter method for names attribute.
+        """
+        return list(self._pools)
+
+    def register(self, name: str, factory: Callable[[], Any],
+                 **settings) -> ResourcePool:
+        """
+        Register a pool, or get the one already registered with its name.
+
+        Parameters
+        ----------
+        name: str
+            Identifier of the pool.
+        factory: Callable[[], Any]
+            Creates a new resource.
+        settings
+            Keyword arguments of `ResourcePool`, such as `size` and `check`.
+
+        Returns
+        -------
+        ResourcePool
+            The pool registered with the name.
+        """
+        with self._lock:
+            if name not in self._pools:
+                self._pools[name] = ResourcePool(name, factory, **settings)
+            return self._pools[name]
+
+    def get(self, name: str) -> ResourcePool:
+        """
+        Get a registered pool.
+
+        Parameters
+        ----------
+        name: str
+            Identifier of the pool.
+
+        Returns
+        -------
+        ResourcePool
+            The pool registered with the name.
+        """
+        pool = self._pools.get(name)
+        if pool is None:
+            raise KeyError(f"There is no resource pool named `{name}`")
+        return pool
+
+    def lease(self, name: str, timeout: Optional[float] = None) \
+            -> ContextManager[Any]:
+        """
+        Shortcut for the `lease` of a registered pool.
+
+        Parameters
+        ----------
+        name: str
+            Identifier of the pool.
+        timeout: Optional[float], default = None
+            Seconds to wait for a free resource.
+        """
+        return self.get(name).lease(timeout)
+
+    def check_health(self) -> dict[str, int]:
+        """
+        Check the idle resources of every pool.
+
+        Returns
+        -------
+        dict[str, int]
+            Number of resources discarded by pool name.
+        """
+        return {n: p.check_health() for n, p in list(self._pools.items())}
+
+    def close(self) -> None:
+        """
+        Close every pool, latest registered first.
+        """
+        for pool in reversed(list(self._pools.values())):
+            pool.close()
@@ -0,0 +1,446 @@
+"""
+Concurrent containers for the runtime state shared between the MQTT callback,
+the workers and the housekeeping timers of a Thing.
+"""
+
+# General imports
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Iterable, Iterator, Optional
+
+STRIPES = 16
+
+
+class StripedMap(MutableMapping):
+    """
+    Dictionary split in stripes, each one guarded by its own lock, so threads
+    touching different keys do not contend. Single key operations are O(1)
+    and iterating works over a snapshot, so the map can be modified while
+    it is being iterated.
+
+    Attributes
+    ----------
+    stripes: int
+        Number of independent stripes.
+    """
+
+    _stripes: list[tuple[threading.Lock, dict]]
+
+    def __init__(self, initial: Optional[dict] = None,
+                 stripes: int = STRIPES) -> None:
+        """
+        Constructor method for StripedMap.
+
+        Parameters
+        ----------
+        initial: Optional[dict], default = None
+            Items to start with.
+        stripes: int, default = 16
+            Number of independent stripes.
+        """
+        if stripes < 1:
+            raise ValueError("The number of stripes must be positive")
+        self._stripes = [(threading.Lock(), {}) for _ in range(stripes)]
+        if initial:
+            self.update(initial)
+
+    @property
+    def stripes(self) -> int:
+        """
+        Getter method for stripes attribute.
+        """
+        return len(self._stripes)
+
+    def __getitem__(self, key: Any) -> Any:
+        lock, data = self._stripe(key)
+        with lock:
+            return data[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        lock, data = self._stripe(key)
+        with lock:
+            data[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        lock, data = self._stripe(key)
+        with lock:
+            del data[key]
+
+    def __contains__(self, key: Any) -> bool:
+        lock, data = self._stripe(key)
+        with lock:
+            return key in data
+
+    def __len__(self) -> int:
+        return sum(len(data) for _, data in self._stripes)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.keys())
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        lock, data = self._stripe(key)
+        with lock:
+            return data.get(key, default)
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        lock, data = self._stripe(key)
+        with lock:
+            return data.pop(key, *default)
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        lock, data = self._stripe(key)
+        with lock:
+            return data.setdefault(key, default)
+
+    def clear(self) -> None:
+        for lock, data in self._stripes:
+            with lock:
+                data.clear()
+
+    def keys(self) -> list:  # type: ignore[override]
+        """
+        Snapshot of the keys.
+        """
+        return [k for k, _ in self.items()]
+
+    def values(self) -> list:  # type: ignore[override]
+        """
+        Snapshot of the values.
+        """
+        return [v for _, v in self.items()]
+
+    def items(self) -> list:  # type: ignore[override]
+        """
+        Snapshot of the items. Each stripe is copied atomically, so every
+        item returned was present at some point during the call.
+        """
+        output: list = []
+        for lock, data in self._stripes:
+            with lock:
+                output.extend(data.items())
+        return output
+
+    def snapshot(self) -> dict:
+        """
+        Copy of the map as a regular dictionary.
+
+        Returns
+        -------
+        dict
+            The copied items.
+        """
+        return dict(self.items())
+
+    def _stripe(self, key: Any) -> tuple[threading.Lock, dict]:
+        """
+        Internal helper with the stripe in charge of a key.
+        """
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.snapshot()})"
+
+
+class StripedSet:
+    """
+    Set of keys remembering when each one was added, split in stripes like
+    `StripedMap`. It is meant for caches of recent identifiers that are
+    periodically expired.
+
+    Attributes
+    ----------
+    stripes: int
+        Number of independent stripes.
+    """
+
+    _stripes: list[tuple[threading.Lock, dict]]
+
+    def __init__(self, initial: Optional[Iterable] = None,
+                 stripes: int = STRIPES) -> None:
+        """
+        Constructor method for StripedSet.
+
+        Parameters
+        ----------
+        initial: Optional[Iterable], default = None
+            Keys to start with.
+        stripes: int, default = 16
+            Number of independent stripes.
+        """
+        if stripes < 1:
+            raise ValueError("The number of stripes must be positive")
+        self._stripes = [(threading.Lock(), {}) for _ in range(stripes)]
+        if initial:
+            self.extend(initial)
+
+    @property
+    def stripes(self) -> int:
+        """
+        Getter method for stripes attribute.
+        """
+        return len(self._stripes)
+
+    def __contains__(self, key: Any) -> bool:
+        lock, data = self._stripe(key)
+        with lock:
+            return key in data
+
+    def __len__(self) -> int:
+        return sum(len(data) for _, data in self._stripes)
+
+    def __iter__(self) -> Iterator:
+        return iter(self.snapshot())
+
+    def add(self, key: Any) -> None:
+        """
+        Add a key, refreshing its time if it was already present.
+
+        Parameters
+        ----------
+        key: Any
+            The key to be added.
+        """
+        lock, data = self._stripe(key)
+        with lock:
+            data.pop(key, None)
+            data[key] = time.monotonic()
+
+    def extend(self, keys: Iterable) -> None:
+        """
+        Add several keys.
+
+        Parameters
+        ----------
+        keys: Iterable
+            The keys to be added.
+        """
+        for key in keys:
+            self.add(key)
+
+    def discard(self, key: Any) -> None:
+        """
+        Remove a key if present.
+
+        Parameters
+        ----------
+        key: Any
+            The key to be removed.
+        """
+        lock, data = self._stripe(key)
+        with lock:
+            data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Remove every key.
+        """
+        for lock, data in self._stripes:
+            with lock:
+                data.clear()
+
+    def expire(self, max_age: float) -> int:
+        """
+        Remove the keys added more than `max_age` seconds ago. Stripes keep
+        their keys by age, so only the expired ones are visited.
+
+        Parameters
+        ----------
+        max_age: float
+            Age in seconds from which keys are removed.
+
+        Returns
+        -------
+        int
+            Number of keys removed.
+        """
+        limit = time.monotonic() - max_age
+        removed = 0
+        for lock, data in self._stripes:
+            with lock:
+                while data:
+                    key = next(iter(data))
+                    if data[key] > limit:
+                        break
+                    del data[key]
+                    removed += 1
+        return removed
+
+    def trim(self, num: int) -> None:
+        """
+        Remove the `num` oldest keys.
+
+        Parameters
+        ----------
+        num: int
+            Number of keys to remove.
+        """
+        oldest = sorted(self._timed(), key=lambda item: item[1])[:num]
+        for key, _ in oldest:
+            self.discard(key)
+
+    def snapshot(self) -> list:
+        """
+        Copy of the keys from oldest to newest.
+
+        Returns
+        -------
+        list
+            The copied keys.
+        """
+        return [k for k, _ in sorted(self._timed(), key=lambda i: i[1])]
+
+    def _timed(self) -> list[tuple[Any, float]]:
+        """
+        Internal helper with a copy of the keys and their times.
+        """
+        output: list = []
+        for lock, data in self._stripes:
+            with lock:
+                output.extend(data.items())
+        return output
+
+    def _stripe(self, key: Any) -> tuple[threading.Lock, dict]:
+        """
+        Internal helper with the stripe in charge of a key.
+        """
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.snapshot()})"
+
+
+class IdempotencyStore:
+    """
+    Recent idempotency keys with the answers published for them, so requests
+    delivered more than once are only executed once. Keys are forgotten once
+    they are older than `window` seconds or when more than `max_keys` are
+    stored, oldest first. Every operation is O(1) amortized.
+
+    Attributes
+    ----------
+    max_keys: int
+        Maximum number of keys stored.
+    window: float
+        Seconds a key is remembered for.
+    duplicates: int
+        Number of duplicated requests detected.
+    """
+
+    _max_keys: int
+    _window: float
+
+    def __init__(self, max_keys: int = 1024, window: float = 300.0) -> None:
+        """
+        Constructor method for IdempotencyStore.
+
+        Parameters
+        ----------
+        max_keys: int, default = 1024
+            Maximum number of keys stored.
+        window: float, default = 300.0
+            Seconds a key is remembered for.
+        """
+        if max_keys < 1 or window <= 0:
+            raise ValueError("The size and window of the store must be \
+positive")
+        self._max_keys = max_keys
+        self._window = window
+        self._entries: OrderedDict = OrderedDict()
+        self._duplicates = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_keys(self) -> int:
+        """
+        Getter method for max_keys attribute.
+        """
+        return self._max_keys
+
+    @property
+    def window(self) -> float:
+        """
+        Getter method for window attribute.
+        """
+        return self._window
+
+    @property
+    def duplicates(self) -> int:
+        """
+        Getter method for duplicates attribute.
+        """
+        return self._duplicates
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def claim(self, key: Any) -> tuple[bool, Optional[list]]:
+        """
+        Claim the execution of a request by its key. A claimed key must be
+        either completed or released afterwards.
+
+        Parameters
+        ----------
+        key: Any
+            The idempotency key of the request.
+
+        Returns
+        -------
+        tuple[bool, Optional[list]]
+            Whether the key was claimed and, for known keys, the answers
+            stored for them, None while they are still being executed.
+        """
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._duplicates += 1
+                return False, entry[1]
+            self._entries[key] = (time.monotonic(), None)
+            while len(self._entries) > self._max_keys:
+                self._entries.popitem(last=False)
+            return True, None
+
+    def complete(self, key: Any, answers: list) -> None:
+        """
+        Store the answers of a claimed key to replay them for its duplicates.
+
+        Parameters
+        ----------
+        key: Any
+            The idempotency key of the request.
+        answers: list
+            The answers published for the request.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], list(answers))
+
+    def release(self, key: Any) -> None:
+        """
+        Forget a claimed key that was not completed, so the request can be
+        executed again.
+
+        Parameters
+        ----------
+        key: Any
+            The idempotency key of the request.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] is None:
+                del self._entries[key]
+
+    def _expire(self) -> None:
+        """
+        Internal helper that forgets the keys out of the window. Lock must be
+        held.
+        """
+        limit = time.monotonic() - self._window
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[0] > limit:
+                break
+            del self._entries[key]
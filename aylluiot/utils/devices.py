@@ -3,13 +3,23 @@ Utils submodule for helpers functions use inside devices definitions.
 """
 
 # General imports
-from typing import Any, Optional
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+COMMAND_OPTIONS = '_aylluiot_options'
+BUILT_INS = [str, int, float, list, dict, tuple, set]
+_CLASS_FUNCTIONS: dict[type, tuple[str, ...]] = {}
+CURRENT_DEADLINE: ContextVar[Optional[float]] = ContextVar(
+    'aylluiot_deadline', default=None)
 
 
 def extract_functions(input_class: Any, built_ins: bool = False)\
         -> Optional[list[str]]:
     """
-    Get functions list from a given class object
+    Get functions list from a given class object. The scan of the methods of
+    a class is cached, so only the callables set on the instance itself are
+    looked up on every call.
 
     Parameters
     ---------
@@ -25,11 +35,16 @@ def extract_functions(input_class: Any, built_ins: bool = False)\
     """
     raw_methods: Optional[list[str]]
 
+    if type(input_class) not in BUILT_INS and not isinstance(input_class,
+                                                             type):
+        own = [k for k, v in getattr(input_class, '__dict__', {}).items()
+               if callable(v) and not k.startswith('_')]
+        return sorted(set(_class_functions(type(input_class))).union(own))
     if built_ins:
         raw_methods = dir(input_class)
     else:
         raw_methods = dir(input_class) if type(input_class) not in \
-            [str, int, float, list, dict, tuple, set] else None
+            BUILT_INS else None
     if raw_methods:
         out = [func for func in raw_methods
                if callable(getattr(input_class, func))
@@ -38,3 +53,122 @@ def extract_functions(input_class: Any, built_ins: bool = False)\
         raise TypeError('The given class is a built-in type. Either change the\
             function call to accept built_ins or provide other input class.')
     return out
+
+
+def _class_functions(cls: type) -> tuple[str, ...]:
+    """
+    Internal helper with the public callables of a class, computed once per
+    class.
+    """
+    if cls not in _CLASS_FUNCTIONS:
+        _CLASS_FUNCTIONS[cls] = tuple(
+            func for func in dir(cls)
+            if callable(getattr(cls, func)) and not func.startswith('_'))
+    return _CLASS_FUNCTIONS[cls]
+
+
+def command_options(**options) -> Callable:
+    """
+    Decorator to declare execution options for an executor method or, when
+    applied to an executor class, for every method of it. Method options take
+    precedence over class options.
+
+    Parameters
+    ----------
+    process: bool
+        Execute the command on the pool of worker processes.
+    parallel: bool
+        The command is independent from the rest of its sequence so it can
+        be executed concurrently with them.
+    timeout: Optional[float]
+        Execution budget in seconds. None for no budget.
+    limit: int
+        Maximum number of concurrent executions of the command.
+    executor_limit: int
+        Only for executor classes. Maximum number of concurrent executions
+        shared by all the commands of the executor.
+    limit_wait: float
+        Seconds to wait for a free slot before answering as busy.
+    priority: int
+        Scheduling priority of the sequences containing the command.
+    breaker: Union[bool, dict]
+        Protect the command with a circuit breaker. Either True for the
+        default settings or the keyword arguments of `CircuitBreaker`.
+    bind: bool
+        Bind the `args` of the messages to the parameters of the command,
+        by name when they are a dict and by position otherwise, instead of
+        passing them down as a single argument.
+    coerce: bool
+        Only with `bind`. Convert the arguments to the simple type hints of
+        the parameters. True by default.
+    cache: Union[bool, dict]
+        Memoize the answers of a deterministic command by its `args`. Either
+        True for the default settings or the keyword arguments of
+        `ResultCache`, such as `max_size` and `ttl`.
+    invalidates: list[str]
+        Commands whose memoized answers are discarded every time this one
+        succeeds.
+    coalesce: bool
+        Concurrent requests of the command with the same `args` attach to a
+        single execution and share its results, each under its own
+        `message_id`.
+    batch: Union[bool, dict]
+        The method is the batch form of the command: it receives the list of
+        `args` of several concurrent messages and returns a result for each
+        of them, in order. Either True for the default settings or the
+        keyword arguments of `MicroBatcher`, such as `window` and
+        `max_size`.
+    resources: dict[str, dict]
+        Only for executor classes. Pooled resources used by the executor,
+        such as sessions or connections, by name. Each one takes the keyword
+        arguments of `ResourcePool`: a `factory` creating a resource and,
+        optionally, its `size`, a `check` of its health and how to `close`
+        it. Executors declaring the same name share the pool, which is set
+        on them as the `resources` attribute, a `ResourceRegistry`.
+
+    Returns
+    -------
+    Callable
+        Decorator that sets the options on the given object.
+    """
+    def _wrapper(target: Any) -> Any:
+        setattr(target, COMMAND_OPTIONS,
+                {**getattr(target, COMMAND_OPTIONS, {}), **options})
+        return target
+    return _wrapper
+
+
+def get_command_options(instance: Any, name: str) -> dict:
+    """
+    Get the execution options declared for a method of an executor.
+
+    Parameters
+    ----------
+    instance: Any
+        The executor object or class.
+    name: str
+        The method name.
+
+    Returns
+    -------
+    dict
+        Resulting options after merging class and method options.
+    """
+    cls = instance if isinstance(instance, type) else type(instance)
+    method = getattr(cls, name, None)
+    return {**getattr(cls, COMMAND_OPTIONS, {}),
+            **getattr(method, COMMAND_OPTIONS, {})}
+
+
+def remaining_budget() -> Optional[float]:
+    """
+    Seconds left until the deadline of the message being executed. Meant to
+    be called from executor methods to adapt their work to it.
+
+    Returns
+    -------
+    Optional[float]
+        The remaining budget, or None if the message has no deadline.
+    """
+    deadline = CURRENT_DEADLINE.get()
+    return None if deadline is None else deadline - time.time()
@@ -4,10 +4,15 @@ devices objects.
 """
 
 # General imports
+import asyncio
 import json
-from typing import Optional
+import os
+import time
+from typing import AsyncIterator, Iterator, Literal, Optional
+from pydantic import BaseModel
 # Package imports
 from aylluiot.utils.data import parse_inputs
+from aylluiot.utils.devices import command_options, remaining_budget
 
 
 class TestDEFuncsOne:
@@ -80,3 +85,736 @@ class TestDEFuncsTwo:
             JSON formatted str.
         """
         return json.dumps(input_dict)
+
+
+class TestDEFuncsAsync:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` that contains coroutines.
+        """
+        pass
+
+    async def basic_wait(self, *args) -> dict[str, str]:
+        """
+        Mimic an I/O bound call to a backend.
+
+        Returns
+        -------
+        dict[str, str]
+            Hard-coded dictionary.
+        """
+        await asyncio.sleep(0.01)
+        return {'status': 'awaited'}
+
+    @command_options(timeout=0.05)
+    async def stuck_wait(self, *args) -> dict[str, str]:
+        """
+        Mimic an I/O bound call to a backend that stopped answering.
+
+        Returns
+        -------
+        dict[str, str]
+            Hard-coded dictionary.
+        """
+        await asyncio.sleep(1)
+        return {'status': 'awaited'}
+
+
+@command_options(process=True)
+class TestDEFuncsProcess:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` whose commands run on worker
+        processes.
+        """
+        pass
+
+    def worker_pid(self) -> dict[str, int]:
+        """
+        Identify the process executing the command.
+
+        Returns
+        -------
+        dict[str, int]
+            Process id of the worker.
+        """
+        return {'pid': os.getpid()}
+
+    def reverse_bytes(self, data: bytes) -> bytes:
+        """
+        Mimic a CPU-bound operation over a binary buffer.
+
+        Returns
+        -------
+        bytes
+            The reversed buffer.
+        """
+        return bytes(reversed(data))
+
+    @command_options(coalesce=True)
+    def sample_sensor(self, *args) -> dict[str, int]:
+        """
+        Mimic a slow reading that every caller can share.
+
+        Returns
+        -------
+        dict[str, int]
+            Identifier of the reading.
+        """
+        time.sleep(0.1)
+        return {'reading': time.time_ns()}
+
+    @command_options(timeout=0.2)
+    def hung_worker(self) -> dict[str, int]:
+        """
+        Mimic a CPU-bound computation that never finishes.
+
+        Returns
+        -------
+        dict[str, int]
+            Process id of the worker.
+        """
+        time.sleep(60)
+        return {'pid': os.getpid()}
+
+
+class TestDEFuncsSlow:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` that mimics slow backends.
+        """
+        pass
+
+    @command_options(parallel=True)
+    def slow_read(self, *args) -> dict[str, float]:
+        """
+        Mimic an independent read that takes some time to complete.
+
+        Returns
+        -------
+        dict[str, float]
+            The time at which the read finished.
+        """
+        time.sleep(0.05)
+        return {'finished': time.monotonic()}
+
+    @command_options(timeout=0.05)
+    def stuck_read(self, *args) -> dict[str, float]:
+        """
+        Mimic a read on a backend that stopped answering.
+
+        Returns
+        -------
+        dict[str, float]
+            The time at which the read finished.
+        """
+        time.sleep(0.3)
+        return {'finished': time.monotonic()}
+
+    def slow_write(self, *args) -> dict[str, float]:
+        """
+        Mimic a write that must not run concurrently with others.
+
+        Returns
+        -------
+        dict[str, float]
+            The time at which the write finished.
+        """
+        time.sleep(0.05)
+        return {'finished': time.monotonic()}
+
+    @command_options(timeout=1)
+    def refused_read(self, *args) -> dict[str, float]:
+        """
+        Mimic a read on a backend that answers with its own timeout.
+
+        Returns
+        -------
+        dict[str, float]
+            Never returned.
+        """
+        raise TimeoutError('Backend timed out')
+
+    def budget_read(self, *args) -> dict[str, Optional[float]]:
+        """
+        Mimic a read that adapts its work to the time it has left.
+
+        Returns
+        -------
+        dict[str, Optional[float]]
+            The remaining budget of the message, if any.
+        """
+        return {'budget': remaining_budget()}
+
+
+@command_options(executor_limit=2)
+class TestDEFuncsLimited:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` with concurrency limits.
+        """
+        pass
+
+    @command_options(limit=1, priority=3)
+    def full_query(self, *args) -> dict[str, str]:
+        """
+        Mimic an expensive query that must run one at a time.
+
+        Returns
+        -------
+        dict[str, str]
+            Hard-coded dictionary.
+        """
+        time.sleep(0.1)
+        return {'status': 'queried'}
+
+    def tip_query(self, *args) -> dict[str, str]:
+        """
+        Mimic a cheaper query of the same backend.
+
+        Returns
+        -------
+        dict[str, str]
+            Hard-coded dictionary.
+        """
+        time.sleep(0.1)
+        return {'status': 'queried'}
+
+
+class TestDEFuncsFlaky:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` with a backend that can go down.
+        """
+        self.down = True
+
+    @command_options(breaker={'min_calls': 2, 'window': 2, 'open_for': 0.1})
+    def remote_read(self, *args) -> dict[str, str]:
+        """
+        Mimic a read on a remote backend that fails while it is down.
+
+        Returns
+        -------
+        dict[str, str]
+            Hard-coded dictionary.
+        """
+        if self.down:
+            raise ConnectionError('The backend is down')
+        return {'status': 'read'}
+
+
+@command_options(bind=True)
+class TestDEFuncsBound:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` with regular parameters.
+        """
+        pass
+
+    def scale(self, value: float, factor: int = 2,
+              unit: Optional[str] = None) -> dict:
+        """
+        Multiply a value by a factor.
+
+        Parameters
+        ----------
+        value: float
+            The value to be scaled.
+        factor: int, default = 2
+            The multiplier.
+        unit: Optional[str], default = None
+            Unit of the value.
+
+        Returns
+        -------
+        dict
+            The scaled value and its unit.
+        """
+        return {'value': value * factor, 'unit': unit}
+
+    def tag(self, flags: dict, *names, enabled: bool = True) -> dict:
+        """
+        Collect a set of names under some flags.
+
+        Returns
+        -------
+        dict
+            Every received argument.
+        """
+        return {'flags': flags, 'names': list(names), 'enabled': enabled}
+
+
+class TestDEFuncsCached:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` with memoized lookups.
+        """
+        self.calls = 0
+
+    @command_options(cache={'max_size': 2, 'ttl': 0.2})
+    def protocol_params(self, *args) -> dict:
+        """
+        Mimic an expensive lookup of static parameters.
+
+        Returns
+        -------
+        dict
+            The arguments received and the number of calls so far.
+        """
+        self.calls += 1
+        return {'args': args[0] if args else None, 'calls': self.calls}
+
+    @command_options(invalidates=['protocol_params'])
+    def update_params(self, *args) -> dict[str, str]:
+        """
+        Mimic a change of the static parameters.
+
+        Returns
+        -------
+        dict[str, str]
+            Hard-coded dictionary.
+        """
+        return {'status': 'updated'}
+
+
+@command_options(coalesce=True)
+class TestDEFuncsPolled:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` with a command polled by many
+        clients at once.
+        """
+        self.calls = 0
+
+    def chain_tip(self, *args) -> dict[str, int]:
+        """
+        Mimic a slow query on a shared backend.
+
+        Returns
+        -------
+        dict[str, int]
+            The number of calls so far.
+        """
+        self.calls += 1
+        time.sleep(0.1)
+        return {'calls': self.calls}
+
+    async def async_chain_tip(self, *args) -> dict[str, int]:
+        """
+        Coroutine version of `chain_tip`.
+
+        Returns
+        -------
+        dict[str, int]
+            The number of calls so far.
+        """
+        self.calls += 1
+        await asyncio.sleep(0.1)
+        return {'calls': self.calls}
+
+
+class TestDEFuncsBatch:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` with a vectorized command.
+        """
+        self.sizes: list[int] = []
+
+    @command_options(batch={'window': 0.1, 'max_size': 3})
+    def square(self, items: list) -> list:
+        """
+        Square many numbers at once.
+
+        Parameters
+        ----------
+        items: list
+            The `args` of every message of the batch.
+
+        Returns
+        -------
+        list
+            The square of each number.
+        """
+        self.sizes.append(len(items))
+        if 'boom' in items:
+            raise ArithmeticError('Not a number in the batch')
+        return [n ** 2 for n in items]
+
+
+class TestDEFuncsStream:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` with commands streaming their
+        results.
+        """
+        self.delivered: list = []
+
+    def read_rows(self, *args) -> Iterator[dict[str, int]]:
+        """
+        Mimic a large query read row by row.
+
+        Returns
+        -------
+        Iterator[dict[str, int]]
+            Every row of the result.
+        """
+        for num in range(args[0] if args else 3):
+            yield {'row': num}
+
+    async def async_read_rows(self, *args) -> AsyncIterator[dict[str, int]]:
+        """
+        Coroutine version of `read_rows`.
+
+        Returns
+        -------
+        AsyncIterator[dict[str, int]]
+            Every row of the result.
+        """
+        for num in range(args[0] if args else 3):
+            await asyncio.sleep(0)
+            yield {'row': num}
+
+    def paced_rows(self, *args) -> Iterator[dict[str, int]]:
+        """
+        Mimic a stream whose rows depend on the chunks delivered so far.
+
+        Returns
+        -------
+        Iterator[dict[str, int]]
+            The number of chunks delivered before each row.
+        """
+        for _ in range(2):
+            yield {'row': len(self.delivered)}
+
+    async def async_paced_rows(self, *args) \
+            -> AsyncIterator[dict[str, int]]:
+        """
+        Coroutine version of `paced_rows`.
+
+        Returns
+        -------
+        AsyncIterator[dict[str, int]]
+            The number of chunks delivered before each row.
+        """
+        for _ in range(2):
+            await asyncio.sleep(0)
+            yield {'row': len(self.delivered)}
+
+    def broken_rows(self, *args) -> Iterator[dict[str, int]]:
+        """
+        Mimic a query whose backend fails midway.
+
+        Returns
+        -------
+        Iterator[dict[str, int]]
+            The rows read before failing.
+        """
+        yield {'row': 0}
+        raise ConnectionError('The backend is down')
+
+
+class FakeConnection:
+
+    def __init__(self) -> None:
+        """
+        Mimic a connection to a backend that can be broken or closed.
+        """
+        self.alive = True
+        self.closed = False
+
+    def close(self) -> None:
+        """
+        Close the connection.
+        """
+        self.closed = True
+
+
+@command_options(resources={'ledger': {'factory': FakeConnection, 'size': 2,
+                                       'check': lambda c: c.alive}})
+class TestDEFuncsPooled:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` with a pooled backend connection.
+        """
+        pass
+
+    def ledger_read(self, *args) -> dict[str, int]:
+        """
+        Mimic a read on a connection taken from the pool.
+
+        Returns
+        -------
+        dict[str, int]
+            Identifier of the connection used.
+        """
+        with self.resources.lease('ledger') as conn:
+            time.sleep(0.05)
+            return {'conn': id(conn)}
+
+    def ledger_drop(self, *args) -> dict[str, str]:
+        """
+        Mimic a read that breaks its connection.
+
+        Returns
+        -------
+        dict[str, str]
+            Hard-coded dictionary.
+        """
+        with self.resources.lease('ledger') as conn:
+            conn.alive = False
+        return {'status': 'dropped'}
+
+
+@command_options(resources={'ledger': {'factory': FakeConnection}})
+class TestDEFuncsAudit:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` sharing the pooled connection of
+        another one.
+        """
+        pass
+
+    def audit_read(self, *args) -> dict[str, int]:
+        """
+        Mimic a read on the shared pool.
+
+        Returns
+        -------
+        dict[str, int]
+            Identifier of the connection used.
+        """
+        with self.resources.lease('ledger') as conn:
+            return {'conn': id(conn)}
+
+
+@command_options(priority=2)
+class TestDEFuncsHeavy:
+
+    built = 0
+
+    def __init__(self, model: str = 'default') -> None:
+        """
+        Basic Executor for `DeviceExecutor` that is slow to initialize.
+        """
+        time.sleep(0.05)
+        type(self).built += 1
+        self.model = model
+
+    def predict(self, *args) -> dict[str, str]:
+        """
+        Mimic an inference with the loaded model.
+
+        Returns
+        -------
+        dict[str, str]
+            Name of the model used.
+        """
+        return {'model': self.model}
+
+    def predict_rows(self, *args) -> Iterator[dict[str, str]]:
+        """
+        Mimic a streamed inference with the loaded model.
+
+        Returns
+        -------
+        Iterator[dict[str, str]]
+            Name of the model used.
+        """
+        yield {'model': self.model}
+
+
+class TestDEFuncsVersioned:
+
+    def __init__(self, version: int = 1) -> None:
+        """
+        Basic Executor for `DeviceExecutor` deployed in several versions.
+        """
+        self.version = version
+
+    def slow_version(self, *args) -> dict[str, int]:
+        """
+        Mimic a slow command that reports the version executing it.
+
+        Returns
+        -------
+        dict[str, int]
+            Version of the executor.
+        """
+        time.sleep(0.1)
+        return {'version': self.version}
+
+
+class TestDEFuncsPrices:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` sharing its method names with
+        `TestDEFuncsUsers`.
+        """
+        pass
+
+    @command_options(limit=1, cache=True)
+    def lookup(self, *args) -> dict[str, str]:
+        """
+        Mimic a slow price lookup.
+
+        Returns
+        -------
+        dict[str, str]
+            Executor answering the lookup.
+        """
+        time.sleep(0.05)
+        return {'src': 'prices'}
+
+    @command_options(breaker={'min_calls': 2, 'window': 2})
+    def remote_read(self, *args) -> dict[str, str]:
+        """
+        Mimic a read on a price backend that is down.
+
+        Returns
+        -------
+        dict[str, str]
+            Never returned.
+        """
+        raise ConnectionError('The price backend is down')
+
+    @command_options(invalidates=['lookup'])
+    def refresh(self, *args) -> dict[str, bool]:
+        """
+        Mimic an update of the prices.
+
+        Returns
+        -------
+        dict[str, bool]
+            Hard-coded dictionary.
+        """
+        return {'refreshed': True}
+
+    @command_options(batch={'window': 0.02})
+    def rank(self, items: list) -> list:
+        """
+        Mimic the ranking of many prices at once.
+
+        Returns
+        -------
+        list
+            Executor answering each item.
+        """
+        return [{'src': 'prices'}] * len(items)
+
+
+class TestDEFuncsUsers:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` sharing its method names with
+        `TestDEFuncsPrices`.
+        """
+        pass
+
+    def lookup(self, *args) -> dict[str, str]:
+        """
+        Mimic a slow user lookup.
+
+        Returns
+        -------
+        dict[str, str]
+            Executor answering the lookup.
+        """
+        time.sleep(0.05)
+        return {'src': 'users'}
+
+    @command_options(breaker=True)
+    def remote_read(self, *args) -> dict[str, str]:
+        """
+        Mimic a read on a healthy user backend.
+
+        Returns
+        -------
+        dict[str, str]
+            Executor answering the read.
+        """
+        return {'src': 'users'}
+
+    @command_options(batch={'window': 0.02})
+    def rank(self, items: list) -> list:
+        """
+        Mimic the ranking of many users at once.
+
+        Returns
+        -------
+        list
+            Executor answering each item.
+        """
+        return [{'src': 'users'}] * len(items)
+
+
+class TransferArgs(BaseModel):
+    """
+    Arguments of a transfer relayed to an executor.
+    """
+    address: str
+    amount: int
+
+
+class TransferModel(BaseModel):
+    """
+    Validator for `DeviceRelayer` of the transfer commands.
+    """
+    cmd: Literal['transfer', 'transfer_all']
+    args: TransferArgs
+
+
+class StatusModel(BaseModel):
+    """
+    Validator for `DeviceRelayer` of a command without arguments.
+    """
+    cmd: Literal['status']
+    args: None = None
+
+
+class TestDEFuncsLedger:
+
+    def __init__(self) -> None:
+        """
+        Basic Executor for `DeviceExecutor` with the commands validated by
+        `TransferModel` and `StatusModel`.
+        """
+        self.balance = 0
+
+    def transfer(self, args: dict) -> dict[str, int]:
+        """
+        Mimic a transfer to an address.
+
+        Returns
+        -------
+        dict[str, int]
+            Total transferred so far.
+        """
+        if not args['amount']:
+            raise ValueError('Nothing to transfer')
+        self.balance += args['amount']
+        return {'balance': self.balance}
+
+    def status(self) -> dict[str, int]:
+        """
+        Mimic a status query.
+
+        Returns
+        -------
+        dict[str, int]
+            Total transferred so far.
+        """
+        return {'balance': self.balance}
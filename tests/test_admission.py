@@ -0,0 +1,43 @@
+"""
+Suite of tests for 'admission' sub-module.
+"""
+
+# General imports
+import time
+# Package imports
+from aylluiot.admission import AdmissionControl, TokenBucket
+
+
+def test_token_bucket() -> None:
+    """
+    Tokens are consumed and refilled at the given rate up to the capacity.
+    """
+    bucket = TokenBucket(rate=100, capacity=2)
+    bucket.take()
+    bucket.take()
+    assert bucket.tokens < 1
+    time.sleep(0.05)
+    assert bucket.tokens == 2
+
+
+def test_admission_control() -> None:
+    """
+    Publishers and topics are limited independently, the in-flight cap
+    applies to everyone and the shed messages are counted by reason.
+    """
+    admission = AdmissionControl(client_rate=0.01, client_burst=2,
+                                 topic_rate=0.01, topic_burst=3,
+                                 max_in_flight=2)
+    assert admission.admit('a', 'top') is None
+    assert admission.admit('a', 'top') is None
+    assert admission.admit('b', 'top') == 'in_flight'
+    admission.release()
+    admission.release()
+    assert admission.admit('a', 'top') == 'client_rate'
+    assert admission.admit('b', 'top') is None
+    assert admission.admit('c', 'top') == 'topic_rate'
+    assert admission.admit('c', 'other') is None
+    stats = admission.stats
+    assert (stats.accepted, stats.shed, stats.in_flight) == (4, 3, 2)
+    assert stats.shed_by == {'in_flight': 1, 'client_rate': 1,
+                             'topic_rate': 1}
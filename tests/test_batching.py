@@ -0,0 +1,48 @@
+"""
+Suite of tests for 'batching' sub-module.
+"""
+
+# General imports
+import threading
+import time
+# Package imports
+from aylluiot.batching import MicroBatcher
+
+
+def test_micro_batcher_hand_off() -> None:
+    """
+    Under sustained submissions the leader returns once its own calls are
+    answered and the waiting callers still get theirs.
+    """
+    def _double(batch: list) -> list:
+        time.sleep(0.005)
+        return [arg * 2 for arg in batch]
+
+    batcher = MicroBatcher('test', _double, window=0.02, max_size=4)
+    stop = threading.Event()
+    results: list = []
+
+    def _flood(base: int) -> None:
+        num = 0
+        while not stop.is_set():
+            results.append((base + num, batcher.submit(base + num)))
+            num += 1
+
+    flooders = [threading.Thread(target=_flood, args=(n * 10000,))
+                for n in range(16)]
+    for flooder in flooders:
+        flooder.start()
+    time.sleep(0.05)
+    start = time.monotonic()
+    assert batcher.submit_many([1, 2]) == [2, 4]
+    elapsed = time.monotonic() - start
+    time.sleep(0.1)
+    answered = {arg // 10000 for arg, _ in list(results)}
+    stop.set()
+    for flooder in flooders:
+        flooder.join(2)
+    assert elapsed < 0.5
+    assert not any(flooder.is_alive() for flooder in flooders)
+    assert results and all(out == arg * 2 for arg, out in results)
+    assert answered == set(range(16))
+    assert batcher.stats.largest <= 4 and batcher.stats.batches > 1
@@ -0,0 +1,38 @@
+"""
+Suite of tests for 'cache' sub-module.
+"""
+
+# General imports
+import time
+# Package imports
+from aylluiot.cache import MISSING, ResultCache, cache_key
+
+
+def test_cache_key() -> None:
+    """
+    Test the canonical keys of the arguments.
+    """
+    assert cache_key({'a': 1, 'b': [2]}) == cache_key({'b': [2], 'a': 1})
+    assert cache_key([1, 2]) != cache_key([2, 1])
+    assert cache_key({'data': b'raw'}) is None
+
+
+def test_result_cache() -> None:
+    """
+    Test the eviction, expiration and invalidation of entries.
+    """
+    cache = ResultCache('lookup', max_size=2, ttl=0.1)
+    assert cache.get('a') is MISSING
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is MISSING and len(cache) == 2
+    assert cache.invalidate('c') == 1 and cache.invalidate('c') == 0
+    time.sleep(0.1)
+    assert cache.get('a') is MISSING
+    cache.put('d', 4)
+    assert cache.invalidate() == 1
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.evictions, stats.expirations,
+            stats.invalidations, stats.size) == (1, 3, 1, 1, 2, 0)
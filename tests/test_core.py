@@ -0,0 +1,263 @@
+"""
+Suite of tests for 'core' sub-module.
+"""
+
+# General imports
+import asyncio
+import json
+import pytest
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+# Package imports
+from aylluiot.core import Message, Processor, find_references, \
+    resolve_references
+from aylluiot.devices import DeviceExecutors, DeviceRelayer
+from tests.extended_devices import TestDEFuncsSlow, TestDEFuncsBound, \
+    TestDEFuncsStream, TestDEFuncsLedger, TransferModel, StatusModel
+
+
+class MockConnection:
+    """
+    Stand-in for the MQTT connection that keeps what is published.
+    """
+
+    def __init__(self) -> None:
+        self.published: list = []
+        self.topics: list = []
+
+    def publish(self, topic: str, payload: str, qos: int,
+                retain: bool = False) -> tuple[Future, int]:
+        self.topics.append(topic)
+        self.published.append(json.loads(payload))
+        future: Future = Future()
+        future.set_result({})
+        return future, len(self.published)
+
+
+def test_parallel_sequences() -> None:
+    """
+    Independent commands of a sequence run concurrently but their answers
+    are published in sequence order.
+    """
+    device = DeviceExecutors('Test', [TestDEFuncsSlow()])
+    processor = Processor.device_processor(device.device_type)
+
+    def _run(cmds: list, parallel: bool = False) -> tuple[float, list]:
+        connection = MockConnection()
+        msgs = [Message(message_id=str(num), payload={'cmd': cmd})
+                for num, cmd in enumerate(cmds)]
+        if parallel:
+            for msg in msgs:
+                msg.payload['parallel'] = True
+        start = time.monotonic()
+        processor(msgs, device, connection, 'sub', 'topic')
+        return time.monotonic() - start, connection.published
+
+    elapsed, published = _run(['slow_read'] * 4)
+    assert elapsed < 0.15
+    assert [p['message_id'] for p in published] == ['0', '1', '2', '3']
+    elapsed, _ = _run(['slow_read', 'slow_write'] * 2)
+    assert elapsed >= 0.2
+    elapsed, published = _run(['slow_read', 'slow_write'] * 2, True)
+    assert elapsed < 0.15
+    assert [p['message_id'] for p in published] == ['0', '1', '2', '3']
+
+
+def test_timeout_ends_sequence() -> None:
+    """
+    A timed out command publishes its answer and ends the sequence.
+    """
+    device = DeviceExecutors('Test', [TestDEFuncsSlow()])
+    processor = Processor.device_processor(device.device_type)
+    connection = MockConnection()
+    msgs = [Message(message_id=str(num), payload={'cmd': cmd})
+            for num, cmd in enumerate(['slow_read', 'stuck_read',
+                                       'slow_read'])]
+    output = processor(msgs, device, connection, 'sub', 'topic')
+    assert len(output) == len(connection.published) == 2
+    assert connection.published[-1]['error'] == 'timeout'
+    device.close()
+
+
+def test_deadline_propagation() -> None:
+    """
+    Expired messages are answered without being executed and the rest get
+    their remaining budget, which also shortens their execution budget. Once
+    it runs out they are answered as expired too.
+    """
+    device = DeviceExecutors('Test', [TestDEFuncsSlow()])
+    processor = Processor.device_processor(device.device_type)
+    connection = MockConnection()
+    now = time.time()
+    msgs = [Message(message_id=str(num), payload={'cmd': cmd},
+                    deadline=deadline)
+            for num, (cmd, deadline) in enumerate([
+                ('budget_read', now - 1), ('budget_read', now + 10),
+                ('budget_read', None), ('slow_write', now + 0.01)])]
+    processor(msgs, device, connection, 'sub', 'topic')
+    errors = [p.get('error') for p in connection.published]
+    assert errors == ['expired', None, None, 'expired']
+    assert 9 < connection.published[1]['budget'] <= 10
+    assert connection.published[2]['budget'] is None
+    device.close()
+
+
+def test_references() -> None:
+    """
+    References to previous outputs are found and resolved in nested args.
+    """
+    args = {'a': '$0.output_1', 'b': ['$1', '$$2', 'x'], 'c': '$1.list.1'}
+    answers = [{'message_id': '1', 'output_0': 0, 'output_1': 1},
+               {'message_id': '1', 'list': [5, 6]}]
+    assert find_references(args) == [0, 1, 1]
+    assert resolve_references(args, answers) == {
+        'a': 1, 'b': [{'list': [5, 6]}, '$2', 'x'], 'c': 6}
+    for wrong in ['$2', '$0.output_2', '$1.list.x']:
+        try:
+            resolve_references(wrong, answers)
+            assert False
+        except LookupError:
+            pass
+
+
+def test_chained_sequences() -> None:
+    """
+    Commands using the outputs of previous ones run in a single sequence
+    with both processors.
+    """
+    device = DeviceExecutors('Test', [TestDEFuncsBound()])
+    steps = [{'value': 2}, {'value': '$0.value', 'factor': 3, 'unit': '$$'},
+             ['$1.value'], {'value': '$0.missing'}]
+    msg_queue = [Message('1', {'cmd': 'scale', 'args': a, 'parallel': True})
+                 for a in steps]
+    processors = [Processor.device_processor(device.device_type),
+                  Processor.async_device_processor(device.device_type)]
+    for processor in processors:
+        connection = MockConnection()
+        answers = processor(msg_queue, device, connection, '1', 'topic')
+        if asyncio.iscoroutine(answers):
+            asyncio.run(answers)
+        assert [a.get('value') for a in connection.published] == \
+            [4, 12, 24, None]
+        assert connection.published[1]['unit'] == '$'
+        assert connection.published[3]['error'] == 'unresolved'
+
+
+def test_streamed_sequences() -> None:
+    """
+    Chunks of generator commands are published as they are produced and
+    closed by an end marker, with both processors.
+    """
+    stream = TestDEFuncsStream()
+    device = DeviceExecutors('Test', [stream])
+    processors = [Processor.device_processor(device.device_type),
+                  Processor.async_device_processor(device.device_type)]
+    for processor in processors:
+        for cmd in ['read_rows', 'async_read_rows']:
+            connection = MockConnection()
+            msg_queue = [Message('1', {'cmd': cmd, 'args': 2}),
+                         Message('1', {'cmd': cmd, 'args': None})]
+            answers = processor(msg_queue, device, connection, '1', 'topic')
+            if asyncio.iscoroutine(answers):
+                answers = asyncio.run(answers)
+            assert [(a['chunk'], a.get('row'), a.get('end'))
+                    for a in connection.published] == [
+                (0, 0, None), (1, 1, None), (2, None, True),
+                (0, 0, None), (1, 1, None), (2, 2, None), (3, None, True)]
+            assert [a.payload['chunk'] for a in answers] == [2, 3]
+        for cmd in ['paced_rows', 'async_paced_rows']:
+            connection = MockConnection()
+            stream.delivered = connection.published
+            answers = processor([Message('1', {'cmd': cmd})], device,
+                                connection, '1', 'topic')
+            if asyncio.iscoroutine(answers):
+                asyncio.run(answers)
+            assert [a.get('row') for a in connection.published] == \
+                [0, 1, None]
+        connection = MockConnection()
+        try:
+            answers = processor([Message('1', {'cmd': 'broken_rows'})],
+                                device, connection, '1', 'topic')
+            if asyncio.iscoroutine(answers):
+                asyncio.run(answers)
+            assert False
+        except ConnectionError:
+            pass
+        assert connection.published[-1]['chunk'] == 1
+        assert connection.published[-1]['error'] == 'failed'
+    output = device.message_treatment(Message('1', {'cmd': 'read_rows',
+                                                    'args': 2}))
+    assert output == {'message_id': '1', 'output_0': {'row': 0},
+                      'output_1': {'row': 1}}
+
+
+def test_relayed_sequences() -> None:
+    """
+    Valid messages of concurrent sequences are relayed to the executor in
+    shared batches and every message is answered on its own channel. Only
+    independent messages of the same sender share a parallel sequence.
+    """
+    relayer = DeviceRelayer('Relay', [TransferModel, StatusModel],
+                            'exec/topic', 'Exec',
+                            batch={'window': 0.05, 'max_size': 8})
+    processor = Processor.device_processor(relayer.device_type)
+    connection = MockConnection()
+    options = [{'parallel': True, 'sender': 'alice'}] * 2 + [{}]
+    sequences = [[Message(str(n), {'cmd': 'transfer', 'args': {
+        'address': f'addr{n}', 'amount': n}, **options[n]}),
+                  Message(str(n), {'cmd': 'status', 'args': None,
+                                   **options[n]})]
+                 for n in range(3)]
+    sequences[0].append(Message('0', {'cmd': 'transfer', 'args': {},
+                                      **options[0]}))
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        outputs = list(pool.map(lambda q: processor(
+            q, relayer, connection, q[0].message_id, 'relay/topic'),
+            sequences))
+    assert [[a.payload.get('relayed', a.payload.get('error')) for a in o]
+            for o in outputs] == [[True, True, 'invalid'], [True, True],
+                                  [True, True]]
+    relayed = sorted((p for p, t in zip(connection.published,
+                                        connection.topics)
+                      if t == 'exec/topic'), key=lambda p: p['seq'])
+    assert [(p['seq'], p.get('parallel'), p.get('sender'))
+            for p in relayed] == [(2, None, None), (4, True, 'alice')]
+    assert relayed[0]['cmd'] == ['transfer', 'status'] and \
+        relayed[0]['args'][0]['amount'] == 2
+    assert {p['client_id'] for p in relayed} == {'Exec'}
+    assert sorted(a['amount'] for a in relayed[1]['args'] if a) == [0, 1]
+    assert relayer.stats.relayed == 6 and relayer.stats.batches == 1
+
+
+def test_colocated_relay() -> None:
+    """
+    A relayer with a co-located executor hands it the valid messages, which
+    are executed as on an executor Thing, and only publishes the answers.
+    """
+    executor = DeviceExecutors('Exec', [TestDEFuncsLedger()])
+    relayer = DeviceRelayer('Relay', [TransferModel, StatusModel],
+                            executor=executor)
+    processor = Processor.device_processor(relayer.device_type)
+    connection = MockConnection()
+    msg_queue = [Message('1', {'cmd': 'transfer', 'args': {
+        'address': 'addr1', 'amount': '5'}}),
+                 Message('1', {'cmd': 'transfer', 'args': {'amount': 1}}),
+                 Message('1', {'cmd': 'transfer', 'args': {
+                     'address': '$9.balance', 'amount': 1}}),
+                 Message('1', {'cmd': 'status', 'args': None},
+                         deadline=time.time() - 1),
+                 Message('1', {'cmd': 'status', 'args': None})]
+    answers = processor(msg_queue, relayer, connection, '1', 'relay/topic')
+    assert set(connection.topics) == {'relay/topic'}
+    assert [a.payload.get('balance', a.payload.get('error'))
+            for a in answers] == [5, 'invalid', 'unresolved', 'expired', 5]
+    assert connection.published == [a.payload for a in answers]
+    assert relayer.stats.relayed == 0 and relayer.stats.batches == 0
+    with pytest.raises(ValueError):
+        processor([Message('1', {'cmd': 'transfer', 'args': {
+            'address': 'addr1', 'amount': 0}})], relayer, connection, '1',
+            'relay/topic')
+    with pytest.raises(TypeError):
+        relayer.relay(msg_queue, connection.publish)
+    with pytest.raises(TypeError):
+        DeviceRelayer('Relay', [TransferModel], 'exec/topic')
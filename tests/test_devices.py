@@ -3,13 +3,25 @@ Suite of tests for 'devices' sub-module.
 """
 
 # General imports
+import asyncio
 import logging
+import os
 import pytest
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Callable, Optional
 # Package imports
 from aylluiot.core import Message
-from aylluiot.devices import DeviceExecutors
-from tests.extended_devices import TestDEFuncsOne, TestDEFuncsTwo
+from aylluiot.devices import DeviceExecutors, DeviceRelayer, ExecutorControl
+from aylluiot.lazy import LazyExecutor
+from tests.extended_devices import TestDEFuncsOne, TestDEFuncsTwo, \
+    TestDEFuncsAsync, TestDEFuncsProcess, TestDEFuncsSlow, \
+    TestDEFuncsLimited, TestDEFuncsFlaky, TestDEFuncsBound, \
+    TestDEFuncsCached, TestDEFuncsPolled, TestDEFuncsBatch, \
+    TestDEFuncsPooled, TestDEFuncsAudit, TestDEFuncsHeavy, TestDEFuncsStream, \
+    TestDEFuncsVersioned, TestDEFuncsPrices, TestDEFuncsUsers, \
+    TransferArgs, TransferModel, StatusModel
 
 
 @pytest.fixture
@@ -154,3 +166,581 @@ def test_message_treatment(device_executor, make_message) -> None:
     assert output_4 == {'message_id': '1', 'output_0': 4, 'output_1': 4,
                         'output_2': 4}
     assert output_5 == {'message_id': '1', 'status': 'successful'}
+
+
+def test_async_message_treatment(device_executor, make_message) -> None:
+    """
+    Test coroutine and regular commands through both message treatments.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    device = device_executor(mock_executors=[TestDEFuncsTwo(),
+                                             TestDEFuncsAsync()])
+    msg_1 = make_message({'cmd': 'basic_wait', 'args': None})
+    msg_2 = make_message({'cmd': 'basic_dict', 'args': None})
+
+    async def _run_concurrently() -> list:
+        return await asyncio.gather(
+            *[device.async_message_treatment(m) for m in [msg_1, msg_2]])
+
+    output_1, output_2 = asyncio.run(_run_concurrently())
+    assert output_1 == {'message_id': '1', 'status': 'awaited'}
+    assert output_2 == {'message_id': '1', 'status': 'successful'}
+    assert device.message_treatment(msg_1) == output_1
+
+
+def test_process_message_treatment(device_executor, make_message,
+                                   monkeypatch) -> None:
+    """
+    Test commands declared to be executed on worker processes, which are
+    replaced by swapping their executors without stopping the dispatch.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    TestDEFuncsHeavy.built = 0
+    device = device_executor(mock_executors=[
+        TestDEFuncsTwo(), TestDEFuncsHeavy, TestDEFuncsProcess()])
+    msg_1 = make_message({'cmd': 'worker_pid', 'args': None})
+    msg_2 = make_message({'cmd': 'basic_dict', 'args': None})
+    try:
+        output_1 = device.message_treatment(msg_1)
+        output_2 = asyncio.run(device.async_message_treatment(msg_1))
+        assert os.getpid() not in [output_1['pid'], output_2['pid']]
+        assert TestDEFuncsHeavy.built == 0
+        assert device.message_treatment(msg_2)['status'] == 'successful'
+        pool = device.process_pool
+        new_pool = pool._new_pool
+
+        def _unlocked_pool(executors: list):
+            assert not device._dispatch_lock.locked()
+            return new_pool(executors)
+
+        monkeypatch.setattr(pool, '_new_pool', _unlocked_pool)
+        device.swap_executors([TestDEFuncsProcess()])
+        assert device.message_treatment(msg_1)['pid'] not in \
+            [output_1['pid'], output_2['pid']]
+    finally:
+        device.close()
+
+
+def test_timeout_message_treatment(device_executor, make_message) -> None:
+    """
+    Test commands exceeding their execution budget.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    device = device_executor(mock_executors=[TestDEFuncsSlow(),
+                                             TestDEFuncsAsync()])
+    msg_1 = make_message({'cmd': 'stuck_read', 'args': None})
+    msg_2 = make_message({'cmd': 'stuck_wait', 'args': None})
+    msg_3 = make_message({'cmd': 'slow_write', 'args': None})
+
+    output_1 = device.message_treatment(msg_1)
+    output_2 = asyncio.run(device.async_message_treatment(msg_2))
+    assert output_1['error'] == output_2['error'] == 'timeout'
+    stats = device.watchdog.stats
+    assert (stats.timeouts, stats.cancelled, stats.abandoned) == (2, 1, 1)
+
+    device.default_timeout = 0.01
+    assert device.message_treatment(msg_3)['error'] == 'timeout'
+    msg_4 = make_message({'cmd': 'refused_read', 'args': None})
+    with pytest.raises(TimeoutError, match='Backend'):
+        device.message_treatment(msg_4)
+    with pytest.raises(TimeoutError, match='Backend'):
+        asyncio.run(device.async_message_treatment(msg_4))
+    assert device.watchdog.stats.timeouts == 3
+    device.close()
+
+
+def test_bulkhead_message_treatment(device_executor, make_message) -> None:
+    """
+    Test commands going over their concurrency limits.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    device = device_executor(mock_executors=[TestDEFuncsTwo(),
+                                             TestDEFuncsLimited()])
+
+    def _run_concurrently(cmds: list) -> list:
+        with ThreadPoolExecutor(max_workers=len(cmds)) as pool:
+            outputs = pool.map(
+                device.message_treatment,
+                [make_message({'cmd': c, 'args': None}) for c in cmds])
+        return [o.get('error') for o in outputs]
+
+    errors = _run_concurrently(['full_query'] * 2 + ['basic_dict'])
+    assert errors.count('busy') == 1 and errors[-1] is None
+    errors = _run_concurrently(['tip_query'] * 3 + ['basic_dict'])
+    assert errors.count('busy') == 1 and errors[-1] is None
+    assert set(device.bulkheads) == {'TestDEFuncsLimited.full_query'}
+    assert set(device.executor_bulkheads) == {'TestDEFuncsLimited'}
+    assert device.bulkheads['TestDEFuncsLimited.full_query']\
+        .stats.rejected == 1
+    assert device.command_priority('FULL_QUERY') == 3
+    assert device.command_priority('tip_query') == 0
+    assert device.command_priority('not_a_cmd') == 0
+    short = Message(message_id='1', payload={'cmd': 'full_query'},
+                    deadline=time.time() + 0.03)
+    assert device.message_treatment(short)['error'] == 'expired'
+    msg = make_message({'cmd': 'full_query', 'args': None})
+    assert device.message_treatment(msg)['error'] == 'busy'
+    time.sleep(0.1)
+    assert device.message_treatment(msg)['status'] == 'queried'
+
+
+def test_breaker_message_treatment(device_executor, make_message) -> None:
+    """
+    Test a failing command being short-circuited until it recovers.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    flaky = TestDEFuncsFlaky()
+    device = device_executor(mock_executors=[TestDEFuncsTwo(), flaky])
+    msg = make_message({'cmd': 'remote_read', 'args': None})
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            device.message_treatment(msg)
+    assert device.message_treatment(msg)['error'] == 'unavailable'
+    assert asyncio.run(device.async_message_treatment(msg))['error'] == \
+        'unavailable'
+    flaky.down = False
+    time.sleep(0.1)
+    assert device.message_treatment(msg)['status'] == 'read'
+    breaker = device.breakers['TestDEFuncsFlaky.remote_read']
+    assert breaker.state.value == 'closed'
+    flaky.down = True
+    expired = Message(message_id='1', payload={'cmd': 'remote_read'},
+                      deadline=time.time() - 1)
+    for _ in range(3):
+        assert device.message_treatment(expired)['error'] == 'expired'
+    assert breaker.state.value == 'closed'
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            device.message_treatment(msg)
+    time.sleep(0.1)
+    assert device.message_treatment(expired)['error'] == 'expired'
+    flaky.down = False
+    assert device.message_treatment(msg)['status'] == 'read'
+    assert breaker.state.value == 'closed'
+
+
+def test_command_table(device_executor, make_message) -> None:
+    """
+    Test the resolution of commands, including shared names.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    class TestDEFuncsMirror(TestDEFuncsTwo):
+        pass
+
+    device = device_executor()
+    assert device.commands == ['basic_dict', 'basic_json', 'basic_math']
+    with pytest.raises(ValueError):
+        device_executor(mock_executors=[TestDEFuncsTwo(),
+                                        TestDEFuncsMirror()])
+    device = DeviceExecutors('Test', [TestDEFuncsOne(), TestDEFuncsTwo(),
+                                      TestDEFuncsMirror()], namespaced=True)
+    assert 'basic_dict' not in device.commands
+    assert 'basic_math' in device.commands
+    msg = make_message({'cmd': 'TestDEFuncsMirror.basic_dict', 'args': None})
+    assert device.message_treatment(msg)['status'] == 'successful'
+
+
+def test_namespaced_tables(make_message) -> None:
+    """
+    Test that namespaced commands sharing a method name keep their own
+    limits, breakers, caches and batchers.
+
+    Parameters
+    ----------
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    device = DeviceExecutors('Test', [TestDEFuncsPrices(),
+                                      TestDEFuncsUsers()], namespaced=True)
+
+    def _run_concurrently(cmds: list) -> list:
+        with ThreadPoolExecutor(max_workers=len(cmds)) as pool:
+            return list(pool.map(
+                device.message_treatment,
+                [make_message({'cmd': c, 'args': None}) for c in cmds]))
+
+    outputs = _run_concurrently(['TestDEFuncsUsers.lookup'] * 2)
+    assert [o['src'] for o in outputs] == ['users'] * 2
+    outputs = _run_concurrently(['TestDEFuncsPrices.lookup'] * 2)
+    assert sorted(o.get('error', '') for o in outputs) == ['', 'busy']
+    assert set(device.bulkheads) == {'TestDEFuncsPrices.lookup'}
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            device.message_treatment(make_message(
+                {'cmd': 'TestDEFuncsPrices.remote_read'}))
+    assert device.message_treatment(make_message(
+        {'cmd': 'TestDEFuncsPrices.remote_read'}))['error'] == 'unavailable'
+    assert device.message_treatment(make_message(
+        {'cmd': 'TestDEFuncsUsers.remote_read'}))['src'] == 'users'
+    prices = make_message({'cmd': 'TestDEFuncsPrices.lookup'})
+    assert device.message_treatment(prices)['src'] == 'prices'
+    assert device.message_treatment(make_message(
+        {'cmd': 'TestDEFuncsUsers.lookup'}))['src'] == 'users'
+    assert set(device.caches) == {'TestDEFuncsPrices.lookup'}
+    cache = device.caches['TestDEFuncsPrices.lookup']
+    assert cache.stats.hits == 1 and len(cache) == 1
+    device.message_treatment(make_message({'cmd': 'refresh'}))
+    assert len(cache) == 0
+    outputs = _run_concurrently(['TestDEFuncsPrices.rank',
+                                 'TestDEFuncsUsers.rank'] * 2)
+    assert [o['src'] for o in outputs] == ['prices', 'users'] * 2
+    assert set(device.batchers) == {'TestDEFuncsPrices.rank',
+                                    'TestDEFuncsUsers.rank'}
+
+
+def test_bound_message_treatment(device_executor, make_message) -> None:
+    """
+    Test commands declared with regular parameters.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    device = device_executor(mock_executors=[TestDEFuncsTwo(),
+                                             TestDEFuncsBound()])
+    assert len(device.binders) == 2
+
+    def _run(cmd: str, args) -> dict:
+        msg = make_message({'cmd': cmd, 'args': args})
+        output = device.message_treatment(msg)
+        assert asyncio.run(device.async_message_treatment(msg)) == output
+        return output
+
+    assert _run('scale', {'value': '1.5', 'factor': 4.0}) == \
+        {'message_id': '1', 'value': 6.0, 'unit': None}
+    assert _run('scale', [3, '3', 10])['unit'] == '10'
+    assert _run('scale', 2)['value'] == 4
+    assert _run('tag', ['{"a": 1}', 'x', 'y']) == \
+        {'message_id': '1', 'flags': {'a': 1}, 'names': ['x', 'y'],
+         'enabled': True}
+    assert _run('tag', {'flags': {}, 'enabled': 'false'})['enabled'] is False
+    for cmd, args in [('scale', None), ('scale', {'value': 1, 'size': 2}),
+                      ('scale', [1, 2, 'm', 4]), ('scale', {'value': 'one'}),
+                      ('scale', {'value': 1, 'factor': 1.5}),
+                      ('tag', {'flags': '[1]'})]:
+        with pytest.raises(TypeError):
+            device.message_treatment(make_message({'cmd': cmd,
+                                                   'args': args}))
+
+
+def test_cached_message_treatment(device_executor, make_message) -> None:
+    """
+    Test commands whose answers are memoized.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    cached = TestDEFuncsCached()
+    device = device_executor(mock_executors=[TestDEFuncsTwo(), cached])
+    msg_1 = make_message({'cmd': 'protocol_params',
+                          'args': {'era': 1, 'net': 'main'}})
+    msg_2 = make_message({'cmd': 'protocol_params',
+                          'args': {'net': 'main', 'era': 1}})
+    assert device.message_treatment(msg_1)['calls'] == 1
+    assert device.message_treatment(msg_2) == \
+        {'message_id': '1', 'args': {'era': 1, 'net': 'main'}, 'calls': 1}
+    assert asyncio.run(device.async_message_treatment(msg_1))['calls'] == 1
+    device.message_treatment(make_message({'cmd': 'update_params'}))
+    assert device.message_treatment(msg_1)['calls'] == 2
+    assert device.invalidate_cache('protocol_params', {'era': 1,
+                                                       'net': 'main'}) == 1
+    assert device.invalidate_cache('basic_dict') == 0
+    assert device.message_treatment(msg_1)['calls'] == 3
+    time.sleep(0.2)
+    assert device.message_treatment(msg_1)['calls'] == 4
+    stats = device.caches['TestDEFuncsCached.protocol_params'].stats
+    assert (stats.hits, stats.misses, stats.expirations) == (2, 4, 1)
+
+
+def test_coalesced_message_treatment(device_executor, make_message) -> None:
+    """
+    Test identical concurrent requests sharing a single execution.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    polled = TestDEFuncsPolled()
+    device = device_executor(mock_executors=[TestDEFuncsProcess(), polled])
+
+    def _messages(cmd: str, args_list: list) -> list[Message]:
+        return [Message(str(n), {'cmd': cmd, 'args': a})
+                for n, a in enumerate(args_list)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        outputs = list(pool.map(device.message_treatment, _messages(
+            'chain_tip', [{'a': 1, 'b': 2}, {'b': 2, 'a': 1}, {'a': 1, 'b': 2},
+                          {'a': 2}])))
+    assert [o['message_id'] for o in outputs] == ['0', '1', '2', '3']
+    assert len({o['calls'] for o in outputs[:3]}) == 1 and polled.calls == 2
+
+    async def _run_concurrently(msgs: list[Message]) -> list:
+        return await asyncio.gather(
+            *[device.async_message_treatment(m) for m in msgs])
+
+    outputs = asyncio.run(_run_concurrently(
+        _messages('async_chain_tip', [None] * 3)))
+    assert {o['calls'] for o in outputs} == {3}
+    try:
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            outputs = list(pool.map(device.message_treatment, _messages(
+                'sample_sensor', [None] * 3)))
+        assert len({o['reading'] for o in outputs}) == 1
+    finally:
+        device.close()
+    assert device.flights.coalesced == 6 and device.flights.in_flight == 0
+
+
+def test_coalesced_deadlines(device_executor) -> None:
+    """
+    Test that a message attached to an execution which ran out of the budget
+    of its leader is executed on its own instead of sharing that answer.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    """
+    polled = TestDEFuncsPolled()
+    device = device_executor(mock_executors=[polled])
+
+    def _messages(cmd: str) -> tuple[Message, Message]:
+        return (Message('0', {'cmd': cmd}, deadline=time.time() + 0.03),
+                Message('1', {'cmd': cmd}))
+
+    leader, follower = _messages('chain_tip')
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        first = pool.submit(device.message_treatment, leader)
+        time.sleep(0.01)
+        second = pool.submit(device.message_treatment, follower)
+        assert first.result()['error'] == 'expired'
+        assert second.result()['calls'] == 2
+
+    async def _run_follower(msgs: tuple[Message, Message]) -> list:
+        first = asyncio.create_task(device.async_message_treatment(msgs[0]))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(device.async_message_treatment(msgs[1]))
+        return [await first, await second]
+
+    outputs = asyncio.run(_run_follower(_messages('async_chain_tip')))
+    assert outputs[0]['error'] == 'expired' and outputs[1]['calls'] == 4
+    assert device.flights.coalesced == 2 and device.flights.in_flight == 0
+
+
+def test_batched_message_treatment(device_executor, make_message) -> None:
+    """
+    Test concurrent messages of a batch command executed with one call.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    batch = TestDEFuncsBatch()
+    device = device_executor(mock_executors=[TestDEFuncsTwo(), batch])
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        outputs = list(pool.map(device.message_treatment, [
+            Message(str(n), {'cmd': 'square', 'args': n})
+            for n in range(1, 6)]))
+    assert [o['output'] for o in outputs] == [1, 4, 9, 16, 25]
+    assert [o['message_id'] for o in outputs] == ['1', '2', '3', '4', '5']
+    assert sorted(batch.sizes) == [2, 3]
+    output = asyncio.run(device.async_message_treatment(
+        make_message({'cmd': 'square', 'args': 7})))
+    assert output == {'message_id': '1', 'output': 49}
+    with pytest.raises(ArithmeticError):
+        device.message_treatment(make_message({'cmd': 'square',
+                                               'args': 'boom'}))
+    stats = device.batchers['TestDEFuncsBatch.square'].stats
+    assert (stats.batches, stats.items, stats.largest) == (4, 7, 3)
+    assert 0 < stats.mean_wait <= stats.max_wait
+
+
+def test_pooled_message_treatment(device_executor, make_message) -> None:
+    """
+    Test executors reusing the connections of a shared resource pool.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    pooled, audit = TestDEFuncsPooled(), TestDEFuncsAudit()
+    device = device_executor(mock_executors=[pooled, audit])
+    assert pooled.resources is audit.resources is device.resources
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        outputs = list(pool.map(device.message_treatment, [
+            Message(str(n), {'cmd': 'ledger_read'}) for n in range(4)]))
+    assert len({o['conn'] for o in outputs}) == 2
+    ledger = device.resources.get('ledger')
+    assert ledger.size == 2 and ledger.stats.created == 2
+    output = device.message_treatment(make_message({'cmd': 'audit_read'}))
+    assert output['conn'] in {o['conn'] for o in outputs}
+    device.message_treatment(make_message({'cmd': 'ledger_drop'}))
+    assert device.check_resources() == {'ledger': 1}
+    device.close()
+    assert ledger.closed and ledger.stats.idle == 0
+
+
+def test_lazy_message_treatment(device_executor, make_message) -> None:
+    """
+    Test executors built on their first call or on warm-up.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    TestDEFuncsHeavy.built = 0
+    warm = LazyExecutor(TestDEFuncsStream, warm_up=True)
+    device = device_executor(mock_executors=[
+        TestDEFuncsTwo(), TestDEFuncsHeavy, warm])
+    assert {'predict', 'predict_rows', 'read_rows'} <= set(device.commands)
+    assert device.command_priority('predict') == 2
+    assert device.streaming('predict_rows')
+    assert TestDEFuncsHeavy.built == 0 and not warm.built
+    times = device.warm_up()
+    assert warm.built and list(times) == ['TestDEFuncsStream']
+    assert TestDEFuncsHeavy.built == 0 and device.warm_up() == {}
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        outputs = list(pool.map(device.message_treatment, [
+            Message(str(n), {'cmd': 'predict'}) for n in range(3)]))
+    assert [o['model'] for o in outputs] == ['default'] * 3
+    assert TestDEFuncsHeavy.built == 1
+    assert set(device.init_times) == {'TestDEFuncsHeavy', 'TestDEFuncsStream'}
+    assert device.init_times['TestDEFuncsHeavy'] >= 0.05
+    with pytest.raises(ValueError):
+        device.message_treatment(make_message({'cmd': 'unknown'}))
+
+
+def test_swapped_message_treatment(device_executor, make_message) -> None:
+    """
+    Test replacing executors at runtime while their calls are in flight.
+
+    Parameters
+    ----------
+    device_executor: pytest.fixture(device_executor)
+        Instance to be test against, called trough the fixture.
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    control = ExecutorControl({'versioned': partial(TestDEFuncsVersioned, 3),
+                               'cached': TestDEFuncsCached})
+    device = device_executor(mock_executors=[
+        TestDEFuncsTwo(), TestDEFuncsLimited(), TestDEFuncsVersioned(),
+        control])
+    assert control.device is device
+    bulkhead = device.bulkheads['TestDEFuncsLimited.full_query']
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        old = pool.submit(device.message_treatment,
+                          make_message({'cmd': 'slow_version'}))
+        time.sleep(0.02)
+        assert device.swap_executors([TestDEFuncsVersioned(2)]) == \
+            ['TestDEFuncsVersioned']
+        assert old.result()['version'] == 1
+    output = device.message_treatment(make_message({'cmd': 'slow_version'}))
+    assert output['version'] == 2 and \
+        device.bulkheads['TestDEFuncsLimited.full_query'] is bulkhead
+    output = device.message_treatment(make_message({
+        'cmd': 'swap_executors',
+        'args': {'load': ['versioned', 'cached'],
+                 'remove': ['TestDEFuncsTwo']}}))
+    assert output['replaced'] == ['TestDEFuncsTwo', 'TestDEFuncsVersioned']
+    assert 'protocol_params' in output['commands'] and \
+        'basic_dict' not in output['commands']
+    output = device.message_treatment(make_message({'cmd': 'slow_version'}))
+    assert output['version'] == 3
+    with pytest.raises(ValueError):
+        device.message_treatment(make_message({
+            'cmd': 'swap_executors', 'args': {'load': ['unknown']}}))
+    commands = device.commands
+    with pytest.raises(ValueError):
+        device.swap_executors([TestDEFuncsOne(), type(
+            'TestDEFuncsClone', (TestDEFuncsVersioned,), {})()])
+    assert device.commands == commands
+
+
+def test_relayer_message_treatment(make_message) -> None:
+    """
+    Test the validation of messages by the model indexed for their command.
+
+    Parameters
+    ----------
+    make_message: pytest.fixture(make_message)
+        Factory fixture to create the messages for testing.
+    """
+    with pytest.raises(TypeError):
+        DeviceRelayer('Relay', [TransferArgs], 'exec', 'Exec')
+    with pytest.raises(ValueError):
+        DeviceRelayer('Relay', [TransferModel, TransferModel], 'exec', 'Exec')
+    relayer = DeviceRelayer('Relay', [TransferModel, StatusModel], 'exec',
+                            'Exec')
+    assert relayer.device_id == 'Relay' and relayer.device_type == 2
+    assert relayer.models == {'transfer': TransferModel,
+                              'transfer_all': TransferModel,
+                              'status': StatusModel}
+    output = relayer.message_treatment(make_message({
+        'cmd': 'transfer', 'args': {'address': 'addr1', 'amount': '5'}}))
+    assert output == {'message_id': '1', 'relay': {
+        'cmd': 'transfer', 'args': {'address': 'addr1', 'amount': 5}}}
+    output = relayer.message_treatment(make_message({
+        'cmd': 'transfer', 'args': {'amount': 'five'}}))
+    assert output['error'] == 'invalid' and 'args.address' in \
+        output['detail'] and 'args.amount' in output['detail']
+    output = relayer.message_treatment(make_message({'cmd': 'unknown'}))
+    assert output['error'] == 'invalid'
+    stats = relayer.stats
+    assert (stats.validated, stats.rejected, stats.relayed) == (1, 2, 0)
+    assert 0 < stats.mean_parse <= stats.parse_time
@@ -0,0 +1,161 @@
+"""
+Suite of tests for 'dispatch' sub-module.
+"""
+
+# General imports
+import threading
+import time
+# Package imports
+from aylluiot.dispatch import AdaptiveLimit, MessageDispatcher, QueuePolicy
+
+
+def test_dispatcher_ordering() -> None:
+    """
+    Entries of the same key must keep their order while different keys are
+    executed in parallel.
+    """
+    executed: list = []
+    running: set = set()
+    overlap = threading.Event()
+
+    def _handler(key: str, item: int) -> None:
+        running.add(key)
+        if len(running) > 1:
+            overlap.set()
+        time.sleep(0.01)
+        executed.append((key, item))
+        running.discard(key)
+
+    dispatcher = MessageDispatcher(_handler, workers=3, max_size=50)
+    dispatcher.start()
+    for num in range(5):
+        dispatcher.submit('a', num)
+        dispatcher.submit('b', num)
+    dispatcher.stop()
+
+    assert [i for k, i in executed if k == 'a'] == list(range(5))
+    assert [i for k, i in executed if k == 'b'] == list(range(5))
+    assert overlap.is_set()
+    stats = dispatcher.stats
+    assert stats.submitted == stats.completed == 10
+    assert stats.depth == 0
+    assert stats.max_wait >= stats.avg_wait > 0
+
+
+def test_dispatcher_policies() -> None:
+    """
+    Overflow policies when the queue is full and workers are not running.
+    """
+    rejected: list = []
+    rejecting = MessageDispatcher(lambda k, i: None, max_size=2,
+                                  policy=QueuePolicy.REJECT,
+                                  on_reject=lambda k, i: rejected.append(k))
+    assert rejecting.submit('a', 1) and rejecting.submit('b', 2)
+    assert not rejecting.submit('c', 3)
+    assert rejected == ['c']
+    assert rejecting.stats.rejected == 1
+
+    executed: list = []
+    dropping = MessageDispatcher(lambda k, i: executed.append(k), max_size=2,
+                                 policy=QueuePolicy.DROP_OLDEST)
+    for key in ['a', 'b', 'c']:
+        assert dropping.submit(key, None)
+    assert dropping.depth == 2
+    dropping.start()
+    dropping.stop()
+    assert sorted(executed) == ['b', 'c']
+    assert dropping.stats.dropped == 1
+
+
+def test_dispatcher_priority() -> None:
+    """
+    Entries are executed by priority and aging lets old entries overtake
+    newer ones with a higher priority.
+    """
+    executed: list = []
+    strict = MessageDispatcher(lambda k, i: executed.append(k), workers=1,
+                               aging=0)
+    for key, priority in [('low', 0), ('high', 5), ('mid', 1)]:
+        strict.submit(key, None, priority)
+    strict.start()
+    strict.stop()
+    assert executed == ['high', 'mid', 'low']
+
+    executed.clear()
+    aging = MessageDispatcher(lambda k, i: executed.append(k), workers=1,
+                              aging=100)
+    aging.submit('old', None, 0)
+    time.sleep(0.05)
+    aging.submit('new', None, 2)
+    aging.start()
+    aging.stop()
+    assert executed == ['old', 'new']
+
+    executed.clear()
+    computed_on: list = []
+
+    def _prepare(key: str, item: int) -> tuple:
+        computed_on.append(threading.current_thread().name)
+        return (None if item < 0 else str(item)), item
+
+    lazy = MessageDispatcher(lambda k, i: executed.append((k, i)),
+                             workers=1, max_size=3,
+                             policy=QueuePolicy.DROP_OLDEST, aging=0,
+                             prepare=_prepare)
+    for key, priority in [('dropped', 9), ('low', 0), ('skip', -1),
+                          ('high', 5)]:
+        lazy.submit(key, priority)
+    assert computed_on == [] and lazy.depth == 3
+    lazy.start()
+    lazy.stop()
+    assert executed == [('high', '5'), ('low', '0')]
+    assert len(computed_on) == 3 and lazy.stats.completed == 3
+
+
+def test_adaptive_limit() -> None:
+    """
+    The limit grows with healthy samples while in use and is cut by slow
+    samples or errors, within its bounds.
+    """
+    limiter = AdaptiveLimit(initial=2, min_limit=1, max_limit=4,
+                            max_error_rate=0.5, window=4)
+    assert limiter.acquire() and limiter.acquire() and not limiter.acquire()
+    for _ in range(20):
+        limiter.record('read', 0.01)
+    assert limiter.limit == 4
+    limiter.record('read', 0.1)
+    assert limiter.limit == 2
+    for _ in range(3):
+        limiter.record('write', 0.01, failed=True)
+    assert limiter.limit == 1
+    assert [d.reason for d in limiter.decisions] == \
+        ['healthy', 'healthy', 'latency_gradient', 'errors']
+    stats = limiter.stats
+    assert (stats.in_flight, stats.increases, stats.decreases) == (2, 2, 2)
+
+
+def test_dispatcher_limiter() -> None:
+    """
+    The workers running at once never exceed the adaptive limit.
+    """
+    running: list = []
+    peak: list = [0]
+    lock = threading.Lock()
+
+    def _handler(key: str, item: int) -> None:
+        with lock:
+            running.append(key)
+            peak[0] = max(peak[0], len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(key)
+
+    limiter = AdaptiveLimit(initial=2, max_limit=2)
+    dispatcher = MessageDispatcher(_handler, workers=4, limiter=limiter)
+    dispatcher.start()
+    for num in range(8):
+        dispatcher.submit(str(num), num)
+    dispatcher.stop()
+    assert peak[0] == 2
+    assert dispatcher.stats.completed == 8
+    assert dispatcher.stats.limit == 2
@@ -0,0 +1,87 @@
+"""
+Suite of tests for 'execution' sub-module.
+"""
+
+# General imports
+import os
+import pytest
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+# Package imports
+from aylluiot.execution import EXPIRED, ProcessExecution, Watchdog
+from tests.extended_devices import TestDEFuncsProcess
+
+
+def test_process_execution(monkeypatch) -> None:
+    """
+    Commands run on worker processes, big buffers go through shared memory
+    and workers are replaced after the given number of calls. New workers
+    boot without holding the lock of the pool.
+    """
+    pool = ProcessExecution(workers=2, recycle_after=3, shm_threshold=1024)
+    new_pool = pool._new_pool
+
+    def _unlocked_pool(executors: list):
+        assert not pool._lock.locked()
+        return new_pool(executors)
+
+    monkeypatch.setattr(pool, '_new_pool', _unlocked_pool)
+    pool.start([TestDEFuncsProcess()])
+    try:
+        pids = {pool.call(0, 'worker_pid', None)['pid'] for _ in range(2)}
+        assert os.getpid() not in pids
+        data = os.urandom(1 << 20)
+        assert pool.call(0, 'reverse_bytes', data) == data[::-1]
+        assert pool.recycled == 1
+    finally:
+        pool.shutdown()
+
+
+def test_process_abandon() -> None:
+    """
+    A call abandoned while running on a worker is not reported as cancelled,
+    and the stuck worker is replaced and terminated.
+    """
+    pool = ProcessExecution(workers=1)
+    assert pool._context.get_start_method() != 'fork'
+    watchdog = Watchdog()
+    pool.start([TestDEFuncsProcess()])
+    try:
+        stuck = pool.submit(0, 'hung_worker', None)
+        time.sleep(0.2)
+        assert watchdog.wait(stuck, 0.1, pool.abandon) is EXPIRED
+        stats = watchdog.stats
+        assert (stats.cancelled, stats.abandoned) == (0, 1)
+        assert pool.call(0, 'worker_pid', None)['pid'] != os.getpid()
+        with pytest.raises(BrokenProcessPool):
+            stuck.result(5)
+        assert pool.stuck == 0 and pool.recycled == 1
+        assert watchdog.stats.abandoned_running == 0
+    finally:
+        pool.shutdown()
+        watchdog.shutdown()
+
+
+def test_watchdog_saturation() -> None:
+    """
+    Abandoned calls do not hold back new ones until `max_abandoned` of them
+    are still running, then new calls are refused until they finish.
+    """
+    watchdog = Watchdog(max_abandoned=2)
+    release = threading.Event()
+    try:
+        for _ in range(2):
+            assert watchdog.wait(watchdog.submit(abs, -1), 1) == 1
+            hung = watchdog.submit(release.wait)
+            assert watchdog.wait(hung, 0.02) is EXPIRED
+        assert watchdog.submit(time.sleep, 0) is None
+        assert watchdog.stats.refused == 1
+        release.set()
+        hung.result(1)
+        time.sleep(0.01)
+        assert watchdog.wait(watchdog.submit(abs, -1), 1) == 1
+        assert watchdog.stats.abandoned_running == 0
+    finally:
+        release.set()
+        watchdog.shutdown()
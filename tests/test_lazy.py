@@ -0,0 +1,31 @@
+"""
+Suite of tests for 'lazy' sub-module.
+"""
+
+# General imports
+import pickle
+import pytest
+# Package imports
+from aylluiot.lazy import LazyExecutor
+from tests.extended_devices import TestDEFuncsHeavy
+
+
+def test_lazy_executor() -> None:
+    """
+    Test the deferred construction of an executor and its attributes.
+    """
+    TestDEFuncsHeavy.built = 0
+    lazy = LazyExecutor(TestDEFuncsHeavy, kwargs={'model': 'large'})
+    lazy.tag = 'injected'
+    assert not lazy.built and lazy.init_time is None
+    assert TestDEFuncsHeavy.built == 0 and repr(lazy) == \
+        'LazyExecutor(TestDEFuncsHeavy)'
+    assert lazy.predict() == {'model': 'large'}
+    assert lazy.build() is lazy.build() and TestDEFuncsHeavy.built == 1
+    assert lazy.build().tag == 'injected' and lazy.init_time >= 0.05
+    copy = pickle.loads(pickle.dumps(lazy))
+    assert not copy.built and copy.tag == 'injected'
+    with pytest.raises(AttributeError):
+        copy._missing
+    with pytest.raises(TypeError):
+        LazyExecutor(TestDEFuncsHeavy())
@@ -0,0 +1,54 @@
+"""
+Suite of tests for 'resilience' sub-module.
+"""
+
+# General imports
+import threading
+import time
+# Package imports
+from aylluiot.resilience import Bulkhead, BreakerState, CircuitBreaker
+
+
+def test_bulkhead() -> None:
+    """
+    Slots are limited, waiting callers get freed slots and the limit can be
+    changed at runtime.
+    """
+    bulkhead = Bulkhead('test', 1)
+    assert bulkhead.acquire()
+    assert not bulkhead.acquire()
+    threading.Timer(0.05, bulkhead.release).start()
+    assert bulkhead.acquire(1)
+    bulkhead.limit = 2
+    assert bulkhead.acquire()
+    stats = bulkhead.stats
+    assert (stats.limit, stats.active, stats.rejected) == (2, 2, 1)
+
+
+def test_circuit_breaker() -> None:
+    """
+    Failures and slow calls open the breaker, a failed probe opens it again
+    and a successful one closes it.
+    """
+    changes: list = []
+    breaker = CircuitBreaker('test', failure_rate=0.5, slow_call=0.5,
+                             window=4, min_calls=4, open_for=0.05)
+    breaker.add_listener(lambda *args: changes.append(args[2]))
+    for success, latency in [(True, 0), (True, 0), (True, 1), (False, 0)]:
+        assert breaker.allow()
+        breaker.record(success, latency)
+    assert not breaker.allow()
+    time.sleep(0.05)
+    assert breaker.allow() and not breaker.allow()
+    breaker.record(False)
+    time.sleep(0.05)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    breaker.record(True)
+    assert changes == [BreakerState.OPEN, BreakerState.HALF_OPEN,
+                       BreakerState.OPEN, BreakerState.HALF_OPEN,
+                       BreakerState.CLOSED]
+    stats = breaker.stats
+    assert (stats.state, stats.calls, stats.short_circuited) == \
+        (BreakerState.CLOSED, 0, 2)
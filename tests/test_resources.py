@@ -0,0 +1,73 @@
+"""
+Suite of tests for 'resources' sub-module.
+"""
+
+# General imports
+import pickle
+import pytest
+import threading
+# Package imports
+from aylluiot.resources import ResourcePool, ResourceRegistry
+from tests.extended_devices import FakeConnection
+
+
+def test_resource_pool() -> None:
+    """
+    Test the reuse, health check and closing of pooled resources.
+    """
+    pool = ResourcePool('ledger', FakeConnection, size=2,
+                        check=lambda c: c.alive)
+    with pool.lease() as first:
+        with pool.lease() as second:
+            with pytest.raises(TimeoutError):
+                pool.acquire(timeout=0.05)
+    with pool.lease() as again:
+        assert again in [first, second]
+    with pytest.raises(ConnectionError):
+        with pool.lease() as broken:
+            raise ConnectionError('The backend is down')
+    assert broken.closed and pool.stats.idle == 1
+    stale = pool.acquire()
+    stale.alive = False
+    pool.release(stale)
+    fresh = pool.acquire()
+    assert stale.closed and fresh.alive and pool.stats.created == 3
+    other = pool.acquire()
+    waiter = threading.Timer(0.05, pool.release, [other])
+    waiter.start()
+    assert pool.acquire(timeout=1) is other
+    waiter.join()
+    pool.release(fresh)
+    pool.release(other)
+    stats = pool.stats
+    assert (stats.idle, stats.in_use, stats.waiting, stats.discarded) == \
+        (2, 0, 0, 2)
+    pool.close()
+    assert pool.closed and fresh.closed and other.closed
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+
+
+def test_resource_registry() -> None:
+    """
+    Test pools shared by name, health checked and rebuilt on unpickling.
+    """
+    registry = ResourceRegistry()
+    pool = registry.register('ledger', FakeConnection, size=1,
+                             check=lambda c: c.alive)
+    assert registry.register('ledger', dict) is pool
+    assert 'ledger' in registry and registry.names == ['ledger']
+    with pytest.raises(KeyError):
+        registry.get('node')
+    with registry.lease('ledger') as conn:
+        conn.alive = False
+    assert registry.check_health() == {'ledger': 1}
+    copy = pickle.loads(pickle.dumps(ResourceRegistry()))
+    assert copy.names == []
+    registry.register('plain', FakeConnection)
+    with registry.lease('plain'):
+        pass
+    restored = pickle.loads(pickle.dumps(registry.get('plain')))
+    assert restored.stats.idle == 0 and restored.size == 4
+    registry.close()
+    assert pool.closed and registry.get('plain').closed
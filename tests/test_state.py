@@ -0,0 +1,69 @@
+"""
+Suite of tests for 'state' sub-module.
+"""
+
+# General imports
+import threading
+import time
+# Package imports
+from aylluiot.state import IdempotencyStore, StripedMap, StripedSet
+
+
+def test_striped_map() -> None:
+    """
+    Dictionary operations from several threads, iterating while the map is
+    being modified.
+    """
+    topics = StripedMap({'a': 1}, stripes=4)
+
+    def _writer(num: int) -> None:
+        for item in range(200):
+            topics[f"{num}-{item}"] = item
+            topics.pop(f"{num}-{item - 1}", None)
+
+    threads = [threading.Thread(target=_writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        assert all(isinstance(topic, str) for topic in topics)
+    for thread in threads:
+        thread.join()
+    assert len(topics) == 5 and 'a' in topics and '3-199' in topics
+    assert topics.snapshot()['0-199'] == 199
+    del topics['a']
+    assert topics.get('a') is None
+
+
+def test_striped_set() -> None:
+    """
+    Keys are expired by age and trimmed from the oldest.
+    """
+    cache = StripedSet(['a', 'b', 'f'], stripes=2)
+    time.sleep(0.02)
+    cache.extend(['c', 'd', 'e', 'f'])
+    assert 'a' in cache and len(cache) == 6
+    assert cache.expire(0.01) == 2
+    assert cache.snapshot() == ['c', 'd', 'e', 'f']
+    cache.discard('f')
+    cache.trim(2)
+    assert list(cache) == ['e']
+
+
+def test_idempotency_store() -> None:
+    """
+    Test claiming, completing and forgetting idempotency keys.
+    """
+    store = IdempotencyStore(max_keys=2, window=0.1)
+    assert store.claim('a') == (True, None)
+    assert store.claim('a') == (False, None)
+    store.complete('a', [{'status': 'done'}])
+    assert store.claim('a') == (False, [{'status': 'done'}])
+    store.release('a')
+    assert store.claim('b') == (True, None)
+    store.release('b')
+    assert store.claim('b') == (True, None)
+    store.claim('c')
+    assert len(store) == 2 and store.claim('a') == (True, None)
+    time.sleep(0.1)
+    assert store.claim('c') == (True, None) and len(store) == 1
+    assert store.duplicates == 2
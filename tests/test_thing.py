@@ -0,0 +1,156 @@
+"""
+Suite of tests for 'aws.thing' sub-module.
+"""
+
+# General imports
+import json
+import threading
+import time
+# Package imports
+from aylluiot.admission import AdmissionControl
+from aylluiot.aws.thing import IotCore
+from aylluiot.core import BUSY_ERROR, THROTTLED_ERROR
+from aylluiot.devices import DeviceExecutors
+from aylluiot.dispatch import AdaptiveLimit, QueuePolicy
+from aylluiot.state import IdempotencyStore
+from tests.extended_devices import TestDEFuncsPolled, TestDEFuncsSlow
+from tests.test_core import MockConnection
+
+
+def _make_thing(monkeypatch, handler, **kwargs) -> IotCore:
+    """
+    IotCore Thing publishing on a `MockConnection` instead of AWS.
+    """
+    monkeypatch.setattr(IotCore, '_files_setup',
+                        lambda self, vals: setattr(
+                            self, '_metadata', {'AWS_TOPIC': 'things/+'}))
+    monkeypatch.setattr(IotCore, '_create_connection',
+                        lambda self: MockConnection())
+    return IotCore(handler, 'config', **kwargs)
+
+
+def _payload(thing: IotCore, cmds: list, **options) -> bytes:
+    """
+    Raw payload of a request for the commands of the Thing handler.
+    """
+    return json.dumps({'client_id': thing.handler.device_id,
+                       'seq': len(cmds), 'cmd': cmds, **options}).encode()
+
+
+def test_dispatched_messages(monkeypatch) -> None:
+    """
+    The callback only queues the raw messages. Workers decode them and
+    execute the sequences received on the same topic in parallel.
+    """
+    thing = _make_thing(monkeypatch, DeviceExecutors(
+        'Thing', [TestDEFuncsSlow()]), workers=4)
+    admitted_on: list = []
+    admit = thing._admit_message
+
+    def _admit(*args):
+        admitted_on.append(threading.current_thread().name)
+        return admit(*args)
+
+    monkeypatch.setattr(thing, '_admit_message', _admit)
+    thing.dispatcher.start()
+    start = time.monotonic()
+    thing.manage_messages('things/a', b'not json')
+    for _ in range(4):
+        thing.manage_messages('things/a', _payload(thing, ['slow_read']))
+    thing.dispatcher.stop()
+    elapsed = time.monotonic() - start
+    assert elapsed < 0.15
+    assert len(admitted_on) == 4 and \
+        all(n.startswith('aylluiot-worker') for n in admitted_on)
+    assert len({p['message_id'] for p in thing.connection.published}) == 4
+    assert thing.dispatcher.stats.completed == 5
+
+
+def test_echoed_answers(monkeypatch) -> None:
+    """
+    Answers of the Thing received back through its subscription are dropped
+    before being queued, so they neither loop nor evict real requests.
+    """
+    for policy in [QueuePolicy.REJECT, QueuePolicy.DROP_OLDEST]:
+        thing = _make_thing(monkeypatch, DeviceExecutors(
+            'Thing', [TestDEFuncsSlow()]), workers=1, queue_size=1,
+            queue_policy=policy)
+        thing.manage_messages('things/a', _payload(thing, ['slow_read']))
+        thing.manage_messages('things/a', _payload(thing, ['slow_read']))
+        for answer in list(thing.connection.published):
+            thing.manage_messages('things/a', json.dumps(answer).encode())
+        stats = thing.dispatcher.stats
+        assert stats.depth == 1 and stats.submitted == 1 + (
+            policy == QueuePolicy.DROP_OLDEST)
+        assert [p['error'] for p in thing.connection.published] == (
+            [BUSY_ERROR] if policy == QueuePolicy.REJECT else [])
+        thing.dispatcher.start()
+        thing.dispatcher.stop()
+        for answer in list(thing.connection.published):
+            thing.manage_messages('things/a', json.dumps(answer).encode())
+        assert thing.dispatcher.stats.submitted == stats.submitted
+
+
+def test_queued_deadlines(monkeypatch) -> None:
+    """
+    The `ttl` of a message counts from its reception, so it can expire
+    while queued, and running out of its budget is not a failure for the
+    adaptive limit.
+    """
+    thing = _make_thing(monkeypatch, DeviceExecutors(
+        'Thing', [TestDEFuncsSlow()]), workers=1,
+        concurrency=AdaptiveLimit(initial=1))
+    thing.manage_messages('things/a', _payload(
+        thing, ['budget_read'], ttl=0.05))
+    thing.manage_messages('things/a', _payload(
+        thing, ['slow_write'], ttl=0.12))
+    time.sleep(0.1)
+    thing.dispatcher.start()
+    thing.dispatcher.stop()
+    assert [p['error'] for p in thing.connection.published] == \
+        ['expired', 'expired']
+    stats = thing.dispatcher.limiter.stats
+    assert stats.samples == 2 and stats.error_rate == 0
+
+
+def test_throttled_messages(monkeypatch) -> None:
+    """
+    Messages over the `admission` limits of their publisher, told apart by
+    their topic, are answered as throttled before being queued and never
+    reach the handler.
+    """
+    executor = TestDEFuncsPolled()
+    thing = _make_thing(monkeypatch, DeviceExecutors('Thing', [executor]),
+                        workers=1, admission=AdmissionControl(
+                            client_rate=0.01, client_burst=1, reply=True))
+    thing.dispatcher.start()
+    for topic in ['things/alice', 'things/alice', 'things/bob']:
+        thing.manage_messages(topic, _payload(
+            thing, ['chain_tip'], sender='bob'))
+    thing.manage_messages('things/carol', b'not json')
+    thing.dispatcher.stop()
+    assert executor.calls == 2 and thing.dispatcher.stats.submitted == 3
+    errors = [(t, p) for t, p in zip(thing.connection.topics,
+                                     thing.connection.published)
+              if 'error' in p]
+    assert [(t, p['error']) for t, p in errors] == [
+        ('things/alice', THROTTLED_ERROR)]
+    stats = thing.admission.stats
+    assert stats.shed_by == {'client_rate': 1} and stats.in_flight == 0
+
+
+def test_replayed_messages(monkeypatch) -> None:
+    """
+    Deliveries of a known `idempotency_key` get the stored answers published
+    again without executing the command twice.
+    """
+    executor = TestDEFuncsPolled()
+    thing = _make_thing(monkeypatch, DeviceExecutors('Thing', [executor]),
+                        idempotency=IdempotencyStore())
+    for key in ['pay-1', 'pay-1', 'pay-2']:
+        thing.manage_messages('things/a', _payload(
+            thing, ['chain_tip'], idempotency_key=key))
+    assert executor.calls == 2
+    first, replayed, other = thing.connection.published
+    assert replayed == first and first['calls'] == 1
+    assert other['calls'] == 2